@@ -0,0 +1,65 @@
+"""
+benchmarks/bench_embedding_index.py
+Recall@k versus query latency of the exact and IVF embedding indexes.
+
+Usage:
+    python benchmarks/bench_embedding_index.py --companies 5000 --dim 768 --k 10
+"""
+import argparse
+import time
+
+import numpy as np
+
+from adv_hedging.nlp.index import EmbeddingIndex, IVFIndex
+from generators import make_synthetic_embeddings
+
+def recall_at_k(approx: np.ndarray, exact: np.ndarray) -> float:
+    """Share of the true top-k neighbours that the approximate search returned."""
+    hits = [len(np.intersect1d(a[a >= 0], e)) for a, e in zip(approx, exact)]
+    return float(np.sum(hits)) / exact.size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--companies", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    embeddings = make_synthetic_embeddings(args.companies, args.dim)
+    queries = np.arange(args.companies)
+
+    print(f"{args.companies} companies x {args.dim} dims, all-universe peer lookup (k={args.k})\n")
+    print(f"{'Index':<22}{'Build (s)':>10}{'Query all (ms)':>16}{'Recall@k':>10}{'Memory (MB)':>13}")
+
+    exact_idx = None
+    for dtype in [np.float32, np.float16]:
+        start = time.perf_counter()
+        index = EmbeddingIndex(embeddings, dtype=dtype)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        _, found = index.search_ids(queries, k=args.k)
+        query = time.perf_counter() - start
+
+        if exact_idx is None:
+            exact_idx = found
+        name = f"exact {np.dtype(dtype).name}"
+        print(f"{name:<22}{build:>10.2f}{query * 1e3:>16.1f}{recall_at_k(found, exact_idx):>10.3f}"
+              f"{index.vectors.nbytes / 1e6:>13.1f}")
+
+    start = time.perf_counter()
+    ivf = IVFIndex(embeddings)
+    build = time.perf_counter() - start
+
+    for nprobe in [1, 2, 4, 8, 16, 32]:
+        if nprobe > ivf.num_lists:
+            break
+        start = time.perf_counter()
+        _, found = ivf.search(ivf.vectors[queries], k=args.k, exclude=queries, nprobe=nprobe)
+        query = time.perf_counter() - start
+        name = f"ivf nprobe={nprobe}/{ivf.num_lists}"
+        print(f"{name:<22}{build:>10.2f}{query * 1e3:>16.1f}{recall_at_k(found, exact_idx):>10.3f}"
+              f"{ivf.vectors.nbytes / 1e6:>13.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+benchmarks/bench_factor_parallel.py
+Measures how calculate_factor_returns scales from 1 to N worker processes.
+
+Usage:
+    python benchmarks/bench_factor_parallel.py --assets 3000 --days 2520 --method huber
+"""
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from adv_hedging.risk_model.factor_engine import calculate_factor_returns
+from generators import make_synthetic_data
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--assets", type=int, default=3000)
+    parser.add_argument("--days", type=int, default=2520)
+    parser.add_argument("--method", default="huber", choices=["ols", "huber"])
+    parser.add_argument("--max-jobs", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    returns_df, exposures_df = make_synthetic_data(args.assets, args.days)
+    print(f"Universe: {args.assets} assets x {args.days} days ({args.method.upper()})")
+
+    job_counts = sorted({1, *[2 ** k for k in range(1, 8) if 2 ** k < args.max_jobs], args.max_jobs})
+
+    baseline_time = None
+    reference = None
+    for n_jobs in job_counts:
+        start = time.perf_counter()
+        f_ret = calculate_factor_returns(returns_df, exposures_df, method=args.method, n_jobs=n_jobs)
+        elapsed = time.perf_counter() - start
+
+        if reference is None:
+            baseline_time, reference = elapsed, f_ret
+        else:
+            # Parallel output must be identical to the serial run
+            pd.testing.assert_frame_equal(f_ret, reference)
+
+        print(f"n_jobs={n_jobs:>3}: {elapsed:8.2f}s  speedup x{baseline_time / elapsed:5.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+benchmarks/generators.py
+Synthetic data at production scale for the benchmarks: returns and exposures
+for thousands of assets over decades, a factor risk model, and a text corpus
+of millions of words.
+"""
+import numpy as np
+import pandas as pd
+
+# Vocabulary for the synthetic corpus (word lengths roughly like English prose)
+_VOCAB_SIZE = 20000
+
+def make_synthetic_data(num_assets: int, num_days: int, num_factors: int = 7, seed: int = 42):
+    """Fat-tailed returns driven by random exposures, with ~1% missing data."""
+    rng = np.random.default_rng(seed)
+    tickers = [f"STOCK_{i}" for i in range(num_assets)]
+    dates = pd.bdate_range("2000-01-03", periods=num_days)
+
+    exposures = rng.standard_normal((num_assets, num_factors))
+    factor_rets = rng.normal(0, 0.005, size=(num_days, num_factors))
+    noise = rng.standard_t(df=4, size=(num_days, num_assets)) * 0.01
+    returns = factor_rets @ exposures.T + noise
+    returns[rng.random(returns.shape) < 0.01] = np.nan
+
+    returns_df = pd.DataFrame(returns, index=dates, columns=tickers)
+    exposures_df = pd.DataFrame(exposures, index=tickers, columns=[f"F{k}" for k in range(num_factors)])
+    return returns_df, exposures_df
+
+def make_risk_model(exposures_df: pd.DataFrame, seed: int = 42):
+    """(factor covariance, specific variances) consistent with `make_synthetic_data`."""
+    rng = np.random.default_rng(seed)
+    factors = exposures_df.columns
+    mixing = rng.standard_normal((len(factors), len(factors))) * 0.005
+    factor_cov = pd.DataFrame(mixing @ mixing.T + np.eye(len(factors)) * 2.5e-5, index=factors, columns=factors)
+    specific = pd.Series(rng.uniform(5e-5, 2e-4, len(exposures_df)), index=exposures_df.index)
+    return factor_cov, specific
+
+def make_synthetic_embeddings(num_companies: int, dim: int, num_sectors: int = 50, seed: int = 42):
+    """Clustered vectors, roughly like description embeddings grouped by industry."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((num_sectors, dim))
+    labels = rng.integers(num_sectors, size=num_companies)
+    return centers[labels] + 0.8 * rng.standard_normal((num_companies, dim))
+
+def make_synthetic_corpus(num_companies: int, words_per_company: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Wikipedia-like frame (ticker, title, URL, sector, content) with
+    `num_companies * words_per_company` words of text in total. Page lengths
+    vary from a quarter to twice `words_per_company`, with paragraph breaks.
+    """
+    rng = np.random.default_rng(seed)
+    vocab = np.array([f"w{i:x}" * (1 + i % 3) for i in range(_VOCAB_SIZE)])
+
+    lengths = rng.uniform(0.25, 1.75, num_companies)
+    lengths = np.maximum((lengths / lengths.mean() * words_per_company).astype(int), 1)
+
+    contents = []
+    for length in lengths:
+        words = vocab[rng.zipf(1.3, size=length) % _VOCAB_SIZE]
+        words[np.arange(80, length, 80)] = "\n\n"  # Paragraphs
+        contents.append(" ".join(words))
+
+    tickers = [f"STOCK_{i}" for i in range(num_companies)]
+    return pd.DataFrame({
+        'ticker': tickers,
+        'title': [f"Company {i}" for i in range(num_companies)],
+        'URL': [f"https://en.wikipedia.org/wiki/Company_{i}" for i in range(num_companies)],
+        'sector': rng.choice(['Information Technology', 'Financials', 'Health Care', 'Energy'], num_companies),
+        'content': contents,
+    })
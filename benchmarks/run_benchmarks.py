@@ -0,0 +1,154 @@
+"""
+benchmarks/run_benchmarks.py
+Times the main entry points of the package on synthetic data and compares
+them with a stored baseline.
+
+Every case is run `--repeat` times for the wall time (best run kept), then
+once more under tracemalloc for the peak memory allocated by Python and NumPy.
+
+Usage:
+    python benchmarks/run_benchmarks.py --scale production --save-baseline benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --scale production --baseline benchmarks/baseline.json
+"""
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from adv_hedging.hedging.metrics import calculate_hedged_volatility
+from adv_hedging.hedging.optimization import optimize_hedge_weights
+from adv_hedging.nlp.text_processing import prepare_corpus_for_embedding
+from adv_hedging.risk_model.factor_engine import calculate_factor_returns
+from generators import make_risk_model, make_synthetic_corpus, make_synthetic_data
+
+# Problem sizes: assets, days (252 per year), targets hedged, companies and words per page
+SCALES = {
+    'small': dict(assets=200, days=504, targets=20, companies=200, words=1000),
+    'medium': dict(assets=1000, days=2520, targets=100, companies=1000, words=2000),
+    'production': dict(assets=3000, days=5040, targets=650, companies=3000, words=2000),
+}
+
+def build_cases(scale: dict) -> dict:
+    """{name: zero-argument callable}, with the synthetic inputs generated up front."""
+    returns_df, exposures_df = make_synthetic_data(scale['assets'], scale['days'])
+    factor_cov, specific = make_risk_model(exposures_df)
+    corpus = make_synthetic_corpus(scale['companies'], scale['words'])
+
+    targets = exposures_df.index[:scale['targets']]
+    rng = np.random.default_rng(0)
+    hedge_weights = {
+        t: pd.Series(0.1, index=rng.choice(exposures_df.index.drop(t), size=10, replace=False))
+        for t in targets
+    }
+
+    def hedged_volatility():
+        for t, w in hedge_weights.items():
+            calculate_hedged_volatility(returns_df[t], returns_df[w.index], w)
+
+    return {
+        'factor_returns_ols': lambda: calculate_factor_returns(returns_df, exposures_df, method='ols'),
+        'factor_returns_huber': lambda: calculate_factor_returns(returns_df, exposures_df, method='huber'),
+        'optimize_hedge_weights': lambda: optimize_hedge_weights(
+            exposures_df.loc[targets[0]], exposures_df.drop(targets[0]), factor_cov, specific.drop(targets[0])
+        ),
+        'optimize_hedge_weights_admm': lambda: optimize_hedge_weights(
+            exposures_df.loc[targets[0]], exposures_df.drop(targets[0]), factor_cov, specific.drop(targets[0]),
+            solver='admm', cardinality='iht'
+        ),
+        'prepare_corpus_for_embedding': lambda: prepare_corpus_for_embedding(corpus),
+        'calculate_hedged_volatility': hedged_volatility,
+    }
+
+def measure(func, repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {'seconds': min(times), 'peak_mb': peak / 1e6}
+
+def compare(results: dict, baseline: dict, tolerance: float) -> pd.DataFrame:
+    """Ratios of the current run to the baseline; Regression flags ratios above 1 + tolerance."""
+    rows = []
+    for name, current in results.items():
+        old = baseline.get('results', {}).get(name)
+        if old is None:
+            continue
+        time_ratio = current['seconds'] / old['seconds']
+        memory_ratio = current['peak_mb'] / old['peak_mb'] if old['peak_mb'] > 0 else np.nan
+        rows.append({
+            'Case': name,
+            'Seconds': current['seconds'],
+            'Baseline_Seconds': old['seconds'],
+            'Time_Ratio': time_ratio,
+            'Peak_MB': current['peak_mb'],
+            'Baseline_Peak_MB': old['peak_mb'],
+            'Memory_Ratio': memory_ratio,
+            'Regression': time_ratio > 1 + tolerance or memory_ratio > 1 + tolerance,
+        })
+    return pd.DataFrame(rows).set_index('Case') if rows else pd.DataFrame()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", default='small', choices=list(SCALES))
+    parser.add_argument("--cases", nargs='+', help="Subset of cases to run (default all)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", help="Write this run's results as a baseline JSON")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown / memory growth (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    scale = SCALES[args.scale]
+    print(f"Generating '{args.scale}' data: {scale}")
+    cases = build_cases(scale)
+    names = args.cases or list(cases)
+
+    results = {}
+    for name in names:
+        results[name] = measure(cases[name], args.repeat)
+        print(f"{name:<30}{results[name]['seconds']:>10.3f}s{results[name]['peak_mb']:>12.1f} MB")
+
+    run = {
+        'scale': args.scale,
+        'sizes': scale,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'results': results,
+    }
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(run, f, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('scale') != args.scale:
+            print(f"Baseline was recorded at scale '{baseline.get('scale')}', not '{args.scale}'.")
+
+        report = compare(results, baseline, args.tolerance)
+        print()
+        print(report.to_string(float_format="%.3f"))
+        if not report.empty and report['Regression'].any():
+            print(f"\nRegressions: {', '.join(report.index[report['Regression']])}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+scripts/build_embedding_store.py
+Chunks the Wikipedia corpus and embeds it on CPU into the chunk embedding store
+read by run_clustering_analysis.py and run_hedge_backtest.py.
+
+Usage:
+    python scripts/build_embedding_store.py --workers 4 --quantize int8 --metrics embedding_metrics.json
+"""
+import argparse
+import logging
+
+import numpy as np
+
+from adv_hedging.config import EMBEDDING_STORE_DIR
+from adv_hedging.data.loaders import load_wiki_data
+from adv_hedging.nlp.cache import EmbeddingCache
+from adv_hedging.nlp.embedding import DEFAULT_MODEL, EmbeddingPipeline
+from adv_hedging.nlp.text_processing import load_tokenizer
+from adv_hedging.telemetry import dump_metrics, enable_metrics
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--output-dir", default=str(EMBEDDING_STORE_DIR))
+    parser.add_argument("--chunk-tokens", type=int, default=512)
+    parser.add_argument("--overlap", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--quantize", choices=['float32', 'float16', 'int8'], default='float32')
+    parser.add_argument("--no-cache", action='store_true', help="Re-encode every chunk")
+    parser.add_argument("--log-level", default='INFO', help="DEBUG also logs every timed span")
+    parser.add_argument("--metrics", help="Write timings and counters to this JSON file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.metrics:
+        enable_metrics()
+
+    df = load_wiki_data()
+    pipeline = EmbeddingPipeline(
+        model_name=args.model,
+        batch_size=args.batch_size,
+        num_workers=args.workers,
+        quantize=None if args.quantize == 'float32' else np.dtype(args.quantize),
+        cache=None if args.no_cache else EmbeddingCache()
+    )
+
+    store = pipeline.embed_corpus(
+        df,
+        args.output_dir,
+        chunk_size=args.chunk_tokens,
+        overlap=args.overlap,
+        tokenizer=load_tokenizer(args.model)
+    )
+    print(f"Stored {store.num_chunks.sum()} chunks for {len(store)} companies in {args.output_dir} "
+          f"({pipeline.chunks_per_sec:.1f} chunks/sec, {pipeline.stats['encoded']} encoded)")
+
+    if args.metrics:
+        dump_metrics(args.metrics)
+
+if __name__ == "__main__":
+    main()
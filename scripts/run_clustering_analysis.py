@@ -1,63 +1,69 @@
 """
 scripts/run_clustering_analysis.py
 Run the UMAP + HDBScan loop to find AI clusters.
+
+Usage:
+    python scripts/run_clustering_analysis.py --neighbors 5 10 15 30 --min-dist 0.0 0.1 0.25 --n-jobs -1
 """
-import pandas as pd
-import numpy as np
-# Note: Requires 'umap-learn' and 'hdbscan' installed
-import umap
-import hdbscan
-from sklearn.metrics import adjusted_rand_score, adjusted_mutual_info_score
+import argparse
+import logging
 
-from adv_hedging.data.loaders import load_wiki_data
+from adv_hedging.config import EMBEDDING_STORE_DIR
+from adv_hedging.data.loaders import load_embedding_matrix, load_wiki_data
 from adv_hedging.constants import AI_MAKERS, AI_USERS, AI_CATEGORIES
+# Note: Requires 'umap-learn' and 'hdbscan' installed
+from adv_hedging.nlp.clustering import sweep_clustering
+from adv_hedging.nlp.store import EmbeddingStore
+from adv_hedging.utils import ArtifactCache
 
 def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--neighbors", type=int, nargs='+', default=[5, 10, 15])
+    parser.add_argument("--min-dist", type=float, nargs='+', default=[0.0, 0.1])
+    parser.add_argument("--min-cluster-size", type=int, nargs='+', default=[3])
+    parser.add_argument("--n-jobs", type=int, default=1)
+    parser.add_argument("--no-cache", action='store_true', help="Recompute every reduction")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
     print("Loading data...")
-    df = load_wiki_data()
-    
-    # Filter for AI companies
+    # Filter for AI companies (only the ticker column is read)
     ai_universe = AI_MAKERS + AI_USERS
-    df_ai = df[df['ticker'].isin(ai_universe)].copy()
+    df_ai = load_wiki_data(columns=['ticker'], tickers=ai_universe).drop_duplicates('ticker')
     
     # Map ground truth labels
     df_ai['expert_label'] = df_ai['ticker'].map(AI_CATEGORIES)
-    ground_truth = df_ai['expert_label'].values
     
     print(f"Analyzing {len(df_ai)} AI companies...")
     
-    # Parse embeddings (assuming they are stored as arrays in parquet)
-    # If they are strings/lists, ensure they are converted to numpy matrix
-    embeddings = np.stack(df_ai['embedding_mpnet'].values)
-    
-    best_score = -1
-    best_params = {}
-    
-    # Hyperparameter Tuning Loop
-    neighbors_list = [5, 10, 15]
-    min_dist_list = [0.0, 0.1]
+    # Company vectors pooled from the memory-mapped chunk store if it exists,
+    # otherwise the per-company embeddings stored in the parquet
+    if (EMBEDDING_STORE_DIR / "embeddings.npy").exists():
+        company_vectors = EmbeddingStore(EMBEDDING_STORE_DIR).to_frame(method='mean')
+    else:
+        company_vectors = load_embedding_matrix('embedding_mpnet', tickers=ai_universe)
+
+    df_ai = df_ai[df_ai['ticker'].isin(company_vectors.index)]
+    ground_truth = df_ai['expert_label'].values
+    embeddings = company_vectors.loc[df_ai['ticker']].to_numpy()
     
-    for n_neighbors in neighbors_list:
-        for min_dist in min_dist_list:
-            # 1. Run UMAP
-            reducer = umap.UMAP(n_neighbors=n_neighbors, min_dist=min_dist, n_components=2, random_state=42)
-            embedding_2d = reducer.fit_transform(embeddings)
-            
-            # 2. Run HDBScan
-            clusterer = hdbscan.HDBSCAN(min_cluster_size=3)
-            labels = clusterer.fit_predict(embedding_2d)
-            
-            # 3. Score (Ignoring Noise -1)
-            mask = labels != -1
-            if mask.sum() > 5: # Need enough points to score
-                ari = adjusted_rand_score(ground_truth[mask], labels[mask])
-                
-                if ari > best_score:
-                    best_score = ari
-                    best_params = {'n': n_neighbors, 'd': min_dist}
-                    print(f"New Best ARI: {ari:.3f} (Neighbors={n_neighbors}, Dist={min_dist})")
-
-    print(f"\nOptimization Complete. Best Params: {best_params}")
+    # Hyperparameter sweep: one kNN graph for the whole grid, reductions
+    # spread over processes and cached under data/cache
+    results = sweep_clustering(
+        embeddings,
+        ground_truth,
+        n_neighbors_list=args.neighbors,
+        min_dist_list=args.min_dist,
+        min_cluster_sizes=args.min_cluster_size,
+        n_jobs=args.n_jobs,
+        cache=None if args.no_cache else ArtifactCache()
+    )
+    print(results.to_string(index=False, float_format="%.3f"))
+
+    best = results.iloc[0]
+    print(f"\nOptimization Complete. Best ARI: {best['ARI']:.3f} / AMI: {best['AMI']:.3f} "
+          f"(Neighbors={best['n_neighbors']}, Dist={best['min_dist']}, MinCluster={best['min_cluster_size']})")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
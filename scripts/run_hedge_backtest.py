@@ -1,67 +1,129 @@
 """
 scripts/run_hedge_backtest.py
 Runs the systematic comparison between Factor Hedges and NLP Hedges.
+
+Walk-forward: the risk model and hedges are rebuilt at every rebalance date
+from data known at that date, and judged on the returns that follow.
+Results are checkpointed, so re-running after a crash resumes where it stopped.
+
+Daily returns are read from data/processed/returns.parquet, written by
+notebooks/01_factor_model_construction.ipynb. On a fresh checkout, pass
+--download to fetch them from yfinance for the Bloomberg universe first.
+
+Usage:
+    python scripts/run_hedge_backtest.py --download --start 2023-01-01 --end 2025-01-01
+    python scripts/run_hedge_backtest.py --returns data/processed/returns.parquet --n-jobs -1
+    python scripts/run_hedge_backtest.py --log-level DEBUG --metrics backtest_metrics.json
 """
+import argparse
+import logging
+
 import pandas as pd
-import numpy as np
-from tqdm import tqdm
 
-from adv_hedging.data.loaders import load_wiki_data, load_risk_factors
-from adv_hedging.risk_model.factor_engine import calculate_factor_returns
-from adv_hedging.hedging.optimization import optimize_hedge_weights
-from adv_hedging.hedging.metrics import calculate_hedged_volatility
+from adv_hedging.backtest.runner import run_backtest
+from adv_hedging.config import EMBEDDING_STORE_DIR, PROCESSED_DATA_DIR, RETURNS_FILE
+from adv_hedging.data.loaders import download_returns, load_embedding_matrix, load_returns, load_risk_factors
+from adv_hedging.nlp.store import EmbeddingStore
+from adv_hedging.telemetry import dump_metrics, enable_metrics
+from adv_hedging.utils import ArtifactCache
+
+logger = logging.getLogger(__name__)
+
+# Bloomberg exposure headers (see notebooks/01_factor_model_construction.ipynb)
+FACTOR_RENAME_MAP = {
+    'PORT US Sz Fact Exp:D-1': 'Size',
+    'PORT US Val Fact Exp:D-1': 'Value',
+    'PORT US Mom Fact Exp:D-1': 'Momentum',
+    'PORT US Vol Fact Exp:D-1': 'Volatility',
+    'PORT US Prof Fact Exp:D-1': 'Profitability',
+    'PORT US Lev Fact Exp:D-1': 'Leverage',
+    'PORT US Trd Act Fact Exp:D-1': 'Trading_Activity'
+}
+
+def load_exposures() -> pd.DataFrame:
+    """Factor exposures (Index=Ticker, Cols=Factors) from the Bloomberg export."""
+    df_factors = load_risk_factors(columns=['Ticker.1', *FACTOR_RENAME_MAP])
+    exposures = df_factors.rename(columns={'Ticker.1': 'ticker', **FACTOR_RENAME_MAP})
+    exposures = exposures.set_index('ticker')[list(FACTOR_RENAME_MAP.values())].dropna()
+
+    # Bloomberg uses "ZTS US", returns use "ZTS"
+    exposures.index = [t.split()[0] for t in exposures.index]
+    return exposures[~exposures.index.duplicated()]
+
+def load_embeddings(embedding_col: str) -> pd.DataFrame:
+    """
+    Description embeddings (Index=Ticker, Cols=Dims): pooled from the chunk
+    embedding store if one was built, else the Nomic / MPNet columns.
+    """
+    if (EMBEDDING_STORE_DIR / "embeddings.npy").exists():
+        return EmbeddingStore(EMBEDDING_STORE_DIR).to_frame(method='mean')
+
+    nomic_path = PROCESSED_DATA_DIR / "nomic_embeddings.parquet"
+    if embedding_col == 'embedding_nomic':
+        if nomic_path.exists():
+            return load_embedding_matrix('embedding_nomic', path=nomic_path)
+        logger.warning("Nomic embeddings not found, falling back to MPNet.")
+        embedding_col = 'embedding_mpnet'
+
+    return load_embedding_matrix(embedding_col)
 
 def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--returns", default=str(RETURNS_FILE),
+                        help="Parquet of daily returns (Index=Date, Cols=Tickers)")
+    parser.add_argument("--download", action='store_true',
+                        help="Download the returns from yfinance into --returns before running")
+    parser.add_argument("--start", default="2023-01-01", help="First day downloaded with --download")
+    parser.add_argument("--end", default="2025-01-01", help="Day after the last one downloaded with --download")
+    parser.add_argument("--output-dir", default=str(PROCESSED_DATA_DIR / "backtest"))
+    parser.add_argument("--frequency", default='M', help="D, W, M, Q, Y or a number of trading days")
+    parser.add_argument("--lookback", type=int, default=252)
+    parser.add_argument("--max-positions", type=int, default=10)
+    parser.add_argument("--embedding-col", default='embedding_nomic')
+    parser.add_argument("--n-jobs", type=int, default=1)
+    parser.add_argument("--no-resume", action='store_true', help="Ignore existing checkpoints")
+    parser.add_argument("--no-cache", action='store_true', help="Recompute the risk model of every rebalance")
+    parser.add_argument("--log-level", default='INFO', help="DEBUG also logs every timed span")
+    parser.add_argument("--metrics", help="Write timings and counters to this JSON file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.metrics:
+        enable_metrics()
+
+    frequency = int(args.frequency) if args.frequency.isdigit() else args.frequency
+
     # 1. Load Data
-    print("Loading datasets...")
-    df_wiki = load_wiki_data()
-    df_factors = load_risk_factors()
-    
-    # 2. Setup Results Container
-    results = []
-    
-    # Limit to first 20 stocks for demo/testing purposes
-    # In production, remove the [:20]
-    test_universe = df_wiki['ticker'].unique()[:20]
-    
-    print("Starting Hedge Comparison Loop...")
-    for target_ticker in tqdm(test_universe):
-        
-        # --- A. Factor Hedge ---
-        # (This is simplified pseudocode - relies on the modules we built)
-        # In a real run, you'd calculate specific exposures for this ticker
-        try:
-            # Placeholder for factor engine call
-            # weights_factor = optimize_hedge_weights(...)
-            # vol_factor = calculate_hedged_volatility(...)
-            vol_factor = 0.15 # Dummy value for script framework
-        except Exception:
-            vol_factor = np.nan
-            
-        # --- B. NLP Hedge (Nearest Neighbor) ---
-        # 1. Get Target Embedding
-        # 2. Find Top 10 cosine similarity
-        # 3. Equal weight them
-        try:
-            # vol_nlp = ...
-            vol_nlp = 0.14 # Dummy value for script framework
-        except:
-            vol_nlp = np.nan
-            
-        results.append({
-            'Ticker': target_ticker,
-            'Factor_Vol': vol_factor,
-            'NLP_Vol': vol_nlp,
-            'Winner': 'NLP' if vol_nlp < vol_factor else 'Factor'
-        })
-    
-    # 3. Save Results
-    res_df = pd.DataFrame(results)
+    logger.info("Loading datasets...")
+    exposures = load_exposures()
+    if args.download:
+        download_returns(exposures.index, start=args.start, end=args.end, path=args.returns)
+    returns_df = load_returns(path=args.returns)
+    embeddings = load_embeddings(args.embedding_col)
+
+    # 2. Run the walk-forward backtest over the full universe
+    summary = run_backtest(
+        returns_df,
+        exposures,
+        args.output_dir,
+        embeddings=embeddings,
+        frequency=frequency,
+        lookback=args.lookback,
+        max_positions=args.max_positions,
+        num_neighbors=args.max_positions,
+        n_jobs=args.n_jobs,
+        resume=not args.no_resume,
+        cache=None if args.no_cache else ArtifactCache()
+    )
+
+    # 3. Report
     print("\nSummary Results:")
-    print(res_df['Winner'].value_counts())
-    
-    res_df.to_csv("hedge_comparison_results.csv", index=False)
-    print("Results saved to hedge_comparison_results.csv")
+    print(summary['Winner'].value_counts())
+    print(summary[['Unhedged_Vol', 'Factor_Vol', 'NLP_Vol']].median().rename('Median'))
+    print(f"Results saved to {args.output_dir}")
+
+    if args.metrics:
+        dump_metrics(args.metrics)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,94 @@
+"""
+src/adv_hedging/backtest/data.py
+Point-in-time views of the backtest inputs (no look-ahead).
+"""
+import numpy as np
+import pandas as pd
+
+from adv_hedging.risk_model.covariance import calculate_specific_variances, ewma_covariance
+from adv_hedging.risk_model.factor_engine import align_exposures
+from adv_hedging.utils import ArtifactCache, content_hash
+
+class PointInTimeData:
+    """
+    Wraps the full-sample inputs of a backtest and only ever hands out what
+    was known at the close of a given date.
+
+    Args:
+        returns_df: DataFrame of asset returns (Index=Date, Cols=Tickers)
+        exposures_df: Static or time-varying exposures (see `align_exposures`)
+        embeddings: Optional DataFrame of text embeddings (Index=Tickers);
+                    descriptions are treated as static
+    """
+
+    def __init__(self, returns_df: pd.DataFrame, exposures_df: pd.DataFrame, embeddings: pd.DataFrame = None):
+        self.returns_df = returns_df.sort_index()
+        self.exposures_df = exposures_df
+        self.embeddings = embeddings
+
+        # Align exposures to the calendar once; each date then just picks its snapshot
+        self.tickers, self.factors, self._snapshots, self._snap_idx = align_exposures(
+            exposures_df, self.returns_df.columns, self.returns_df.index
+        )
+        self._exposures_hash = None
+
+    @property
+    def dates(self) -> pd.DatetimeIndex:
+        return self.returns_df.index
+
+    def returns(self, date, lookback: int = None) -> pd.DataFrame:
+        """Returns up to and including `date` (the last `lookback` days if given)."""
+        end = self.returns_df.index.searchsorted(date, side='right')
+        start = 0 if lookback is None else max(end - lookback, 0)
+        return self.returns_df.iloc[start:end]
+
+    def exposures(self, date) -> pd.DataFrame:
+        """Exposures in force at `date` (Index=Tickers, Cols=Factors); empty before the first snapshot."""
+        pos = self.returns_df.index.searchsorted(date, side='right') - 1
+        if pos < 0 or self._snap_idx[pos] < 0:
+            return pd.DataFrame(columns=self.factors, dtype=float)
+        snapshot = pd.DataFrame(self._snapshots[self._snap_idx[pos]], index=self.tickers, columns=self.factors)
+        return snapshot[np.isfinite(snapshot.values).all(axis=1)]
+
+    def risk_model(
+        self,
+        factor_returns: pd.DataFrame,
+        date,
+        lookback: int = 252,
+        half_life: float = 90,
+        cache: ArtifactCache = None
+    ):
+        """
+        Factor covariance, specific variances and exposures known at `date`.
+
+        Args:
+            cache: Optional utils.ArtifactCache holding the covariance and
+                   specific variances, keyed on the content of their inputs
+
+        Returns:
+            (universe_exposures, factor_cov, specific_variances), restricted to
+            the tickers that have both exposures and a specific risk estimate.
+        """
+        window = factor_returns.loc[:date].dropna(how='all').tail(lookback)
+        returns = self.returns(date, lookback)
+
+        key = cached = None
+        if cache is not None:
+            if self._exposures_hash is None:
+                self._exposures_hash = content_hash(self.exposures_df)
+            key = cache.key('risk_model', window, returns, self._exposures_hash, half_life=half_life)
+            cached = cache.get(key, mmap=False)
+
+        if cached is not None:
+            factor_cov, specific_variances = cached
+        else:
+            factor_cov = ewma_covariance(window, half_life=half_life)
+            specific_variances = calculate_specific_variances(
+                returns, self.exposures_df, window, half_life=half_life
+            ).dropna()
+            if cache is not None:
+                cache.put(key, (factor_cov, specific_variances))
+
+        exposures = self.exposures(date)
+        universe = exposures.index.intersection(specific_variances.index)
+        return exposures.loc[universe], factor_cov, specific_variances.loc[universe]
@@ -0,0 +1,217 @@
+"""
+src/adv_hedging/backtest/runner.py
+Walk-forward comparison of Factor and NLP hedges with resumable checkpoints.
+"""
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from adv_hedging.backtest.data import PointInTimeData
+from adv_hedging.backtest.schedule import holding_periods, rebalance_dates
+from adv_hedging.hedging.core import EmbeddingHedgeEngine, FactorHedgeEngine
+from adv_hedging.risk_model.factor_store import update_factor_returns
+from adv_hedging.telemetry import progress_bar, span
+from adv_hedging.utils import ArtifactCache, content_hash
+
+logger = logging.getLogger(__name__)
+
+def _write_parquet(df: pd.DataFrame, path: Path) -> None:
+    """Atomic Parquet write, so an interrupted run never leaves a partial file."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    df.to_parquet(tmp_path)
+    os.replace(tmp_path, path)
+
+def _to_long(weights: pd.DataFrame) -> pd.DataFrame:
+    """Non-zero weights as (Target, Ticker, Weight) rows."""
+    long = weights.rename_axis(index='Target', columns='Ticker').stack().rename('Weight').reset_index()
+    return long[long['Weight'] != 0].reset_index(drop=True)
+
+def _prepare_checkpoints(output_dir: Path, settings: dict, resume: bool) -> Path:
+    """
+    Returns the checkpoint directory, emptying it unless the previous run
+    used exactly the same settings and input data and `resume` is set.
+    """
+    checkpoint_dir = output_dir / "checkpoints"
+    settings_path = output_dir / "settings.json"
+
+    previous = json.loads(settings_path.read_text()) if settings_path.exists() else None
+    if checkpoint_dir.exists() and (not resume or previous != settings):
+        if resume:
+            logger.warning("Backtest settings or inputs changed, discarding checkpoints.")
+        shutil.rmtree(checkpoint_dir)
+
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    settings_path.write_text(json.dumps(settings, indent=2))
+    return checkpoint_dir
+
+def _hedge_returns(pit: PointInTimeData, schedule, checkpoint_dir: Path, engines, targets) -> pd.DataFrame:
+    """
+    Out-of-sample daily returns of each target, unhedged and net of each
+    engine's hedge (weights set at a rebalance close are held until the next).
+    """
+    held = holding_periods(pit.dates, schedule)
+    frames = []
+
+    for date in schedule:
+        days = held.index[held == date]
+        if len(days) == 0:
+            continue
+        returns = pit.returns_df.loc[days]
+        target_returns = returns[targets].to_numpy(dtype=float)
+        frame = pd.DataFrame(
+            {'Unhedged': target_returns.ravel()},
+            index=pd.MultiIndex.from_product([days, targets], names=['Date', 'Target'])
+        )
+
+        for engine in engines:
+            long = pd.read_parquet(checkpoint_dir / f"{engine}_{date:%Y%m%d}.parquet")
+            weights = long.pivot(index='Target', columns='Ticker', values='Weight').reindex(index=targets)
+            has_hedge = weights.notna().any(axis=1).to_numpy()
+
+            H = returns[weights.columns].to_numpy(dtype=float)
+            W = weights.fillna(0.0).to_numpy(dtype=float)
+            # A day is missing if any held name has no return
+            missing = (np.isnan(H).astype(float) @ (W != 0).T) > 0
+            hedge = np.nan_to_num(H) @ W.T
+            hedge[missing] = np.nan
+            hedge[:, ~has_hedge] = np.nan  # Targets outside that date's universe
+
+            frame[engine] = (target_returns - hedge).ravel()
+
+        frames.append(frame)
+
+    return pd.concat(frames)
+
+def summarize_backtest(hedge_returns: pd.DataFrame, annualization: float = 252) -> pd.DataFrame:
+    """
+    Per-target annualized volatility of the unhedged and hedged returns,
+    measured over the days where every engine has a hedge.
+    """
+    engines = [c for c in hedge_returns.columns if c != 'Unhedged']
+    complete = hedge_returns.dropna()
+    vols = complete.groupby(level='Target').std() * np.sqrt(annualization)
+    summary = vols.rename(columns={'Unhedged': 'Unhedged_Vol', **{e: f"{e}_Vol" for e in engines}})
+
+    for engine in engines:
+        summary[f"{engine}_Risk_Reduction"] = 1 - summary[f"{engine}_Vol"] / summary['Unhedged_Vol']
+    if {'Factor', 'NLP'} <= set(engines):
+        summary['Winner'] = np.where(summary['NLP_Vol'] < summary['Factor_Vol'], 'NLP', 'Factor')
+
+    summary.index.name = 'Ticker'
+    return summary
+
+def run_backtest(
+    returns_df: pd.DataFrame,
+    exposures_df: pd.DataFrame,
+    output_dir,
+    embeddings: pd.DataFrame = None,
+    targets=None,
+    frequency='M',
+    lookback: int = 252,
+    half_life: float = 90,
+    max_positions: int = 10,
+    num_neighbors: int = 10,
+    method: str = 'huber',
+    cardinality: str = 'iht',
+    n_jobs: int = 1,
+    resume: bool = True,
+    cache: ArtifactCache = None
+) -> pd.DataFrame:
+    """
+    Walk-forward backtest of Factor (and, given embeddings, NLP) hedges.
+
+    At each rebalance date the risk model is rebuilt from data known at that
+    close (factor returns come from the incremental factor store), hedges are
+    optimized for every target at once (in parallel with `n_jobs`) and
+    checkpointed to Parquet. A crashed or interrupted run picks up from the
+    last completed rebalance when re-run with the same settings and data.
+
+    Outputs written to `output_dir`:
+        factor_returns.parquet  Incremental factor return store
+        checkpoints/            Hedge weights per engine and rebalance date
+        hedge_returns.parquet   Daily out-of-sample returns (Date, Target) per engine
+        summary.parquet         Per-target volatilities, risk reductions, winner
+
+    Args:
+        returns_df: DataFrame of asset returns (Index=Date, Cols=Tickers)
+        exposures_df: Static or time-varying exposures (see `align_exposures`)
+        output_dir: Directory for the store, checkpoints and results
+        embeddings: Optional description embeddings (Index=Tickers, Cols=Dims)
+        targets: Tickers to hedge (defaults to the whole universe)
+        frequency: Rebalance frequency (see `rebalance_dates`)
+        lookback: Trading days of history used by the risk model
+        half_life: EWMA half-life of the covariance and specific risk
+        max_positions: Names per factor hedge
+        num_neighbors: Names per NLP hedge
+        method: Factor regression method, 'ols' or 'huber'
+        cardinality: Factor hedge name selection (see `optimize_hedge_weights`)
+        n_jobs: Worker processes for the hedge optimization (-1 = all cores)
+        resume: Re-use checkpoints from a previous run with the same settings
+        cache: Optional utils.ArtifactCache for the risk model of each
+               rebalance, re-used by runs with other hedge settings
+
+    Returns:
+        The summary DataFrame (Index=Ticker).
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    pit = PointInTimeData(returns_df, exposures_df, embeddings)
+    targets = pit.tickers if targets is None else pd.Index(targets).intersection(pit.tickers)
+    engines = ['Factor'] + (['NLP'] if embeddings is not None else [])
+
+    settings = {
+        'targets': list(targets), 'frequency': frequency, 'lookback': lookback, 'half_life': half_life,
+        'max_positions': max_positions, 'num_neighbors': num_neighbors, 'method': method,
+        'cardinality': cardinality, 'engines': engines,
+        # Checkpoints are only valid for the data they were computed from
+        'inputs': content_hash(pit.returns_df, exposures_df, embeddings),
+    }
+    checkpoint_dir = _prepare_checkpoints(output_dir, settings, resume)
+
+    # Each day's regression only uses that day's data, so one full-sample
+    # (incremental) estimation is already point-in-time
+    factor_returns = update_factor_returns(
+        pit.returns_df, exposures_df, output_dir / "factor_returns.parquet", method=method
+    )
+
+    schedule = rebalance_dates(pit.dates, frequency, min_history=lookback)
+    done = [d for d in schedule if all((checkpoint_dir / f"{e}_{d:%Y%m%d}.parquet").exists() for e in engines)]
+    logger.info("Backtest: %d rebalances, %d already checkpointed.", len(schedule), len(done))
+
+    # Descriptions are static, so the embedding engine is fitted once
+    nlp_engine = EmbeddingHedgeEngine(embeddings, num_neighbors=num_neighbors).fit() if 'NLP' in engines else None
+
+    for date in progress_bar(schedule.difference(done), desc="Rebalancing"):
+        with span('backtest.risk_model', logger):
+            universe_exposures, factor_cov, specific_variances = pit.risk_model(
+                factor_returns, date, lookback=lookback, half_life=half_life, cache=cache
+            )
+
+        with span('backtest.factor_hedges', logger):
+            factor_engine = FactorHedgeEngine(
+                universe_exposures, factor_cov, specific_variances,
+                max_positions=max_positions, cardinality=cardinality
+            ).fit()
+            factor_targets = targets.intersection(universe_exposures.index)
+            weights = {'Factor': factor_engine.calculate_hedges(factor_targets, n_jobs=n_jobs)}
+
+        if nlp_engine is not None:
+            with span('backtest.nlp_hedges', logger):
+                nlp_targets = factor_targets.intersection(nlp_engine.tickers)
+                weights['NLP'] = nlp_engine.calculate_hedges(nlp_targets, universe=universe_exposures.index)
+
+        for engine, engine_weights in weights.items():
+            _write_parquet(_to_long(engine_weights), checkpoint_dir / f"{engine}_{date:%Y%m%d}.parquet")
+
+    hedge_returns = _hedge_returns(pit, schedule, checkpoint_dir, engines, targets)
+    _write_parquet(hedge_returns, output_dir / "hedge_returns.parquet")
+
+    summary = summarize_backtest(hedge_returns)
+    _write_parquet(summary, output_dir / "summary.parquet")
+    return summary
@@ -0,0 +1,54 @@
+"""
+src/adv_hedging/backtest/schedule.py
+Rebalance calendars for walk-forward backtests.
+"""
+import numpy as np
+import pandas as pd
+
+# Calendar frequencies map to pandas period codes
+_PERIODS = {'W': 'W', 'M': 'M', 'Q': 'Q', 'Y': 'Y'}
+
+def rebalance_dates(dates, frequency='M', min_history: int = 252) -> pd.DatetimeIndex:
+    """
+    Picks the rebalance dates out of a trading calendar.
+
+    Args:
+        dates: Trading days (e.g. the index of the returns DataFrame)
+        frequency: 'D' (every day), 'W', 'M', 'Q', 'Y' (last trading day of
+                   each calendar period) or an int (every n trading days)
+        min_history: Number of trading days needed before the first
+                     rebalance, so the risk model has a full lookback
+
+    Returns:
+        DatetimeIndex of rebalance dates (a subset of `dates`).
+    """
+    dates = pd.DatetimeIndex(dates).sort_values().unique()
+    eligible = np.arange(len(dates)) >= min_history - 1
+
+    if isinstance(frequency, (int, np.integer)):
+        positions = np.arange(len(dates))
+        first = np.argmax(eligible) if eligible.any() else len(dates)
+        mask = eligible & ((positions - first) % frequency == 0)
+    elif frequency == 'D':
+        mask = eligible
+    elif frequency in _PERIODS:
+        periods = dates.to_period(_PERIODS[frequency])
+        # Last trading day of each period
+        mask = eligible & np.append(periods[1:] != periods[:-1], True)
+    else:
+        raise ValueError(f"Unknown rebalance frequency '{frequency}'. Use 'D', 'W', 'M', 'Q', 'Y' or an int.")
+
+    return dates[mask]
+
+def holding_periods(dates, rebalances) -> pd.Series:
+    """
+    Maps every trading day to the rebalance date whose hedge is held on it:
+    weights set at the close of rebalance k apply to the days after it, up
+    to and including rebalance k+1. Days before the first rebalance map to NaT.
+    """
+    dates = pd.DatetimeIndex(dates)
+    rebalances = pd.DatetimeIndex(rebalances)
+    pos = rebalances.searchsorted(dates, side='left') - 1
+    held = pd.Series(pd.NaT, index=dates, dtype='datetime64[ns]')
+    held[pos >= 0] = rebalances[pos[pos >= 0]]
+    return held
@@ -12,4 +12,13 @@ PROCESSED_DATA_DIR = DATA_DIR / "processed"
 
 # Filenames (match exactly what you uploaded)
 WIKI_PARQUET_FILE = RAW_DATA_DIR / "20250930_stk_wiki_em.parquet"
-BLOOMBERG_EXCEL_FILE = RAW_DATA_DIR / "20250928_US_Port.xlsx"
\ No newline at end of file
+BLOOMBERG_EXCEL_FILE = RAW_DATA_DIR / "20250928_US_Port.xlsx"
+
+# Daily returns panel (Index=Date, Cols=Tickers), see data/loaders.py
+RETURNS_FILE = PROCESSED_DATA_DIR / "returns.parquet"
+
+# Bloomberg export converted to Parquet, one partition per snapshot (see data/loaders.py)
+RISK_FACTORS_DIR = INTERIM_DATA_DIR / "risk_factors"
+
+# Chunk embedding store (see adv_hedging.nlp.store)
+EMBEDDING_STORE_DIR = PROCESSED_DATA_DIR / "embedding_store"
@@ -0,0 +1,34 @@
+"""
+src/adv_hedging/data/cleaning.py
+Fixes for known problems in the raw Wikipedia dataset.
+"""
+import pandas as pd
+
+# Tickers whose scraped page is an S&P index list instead of the company page
+URL_FIXES = {
+    'VLTO': "https://en.wikipedia.org/wiki/Veralto",
+    'UMBF': "https://en.wikipedia.org/wiki/UMB_Financial_Corporation",
+}
+
+def clean_wiki_data(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Points the bad Veralto / UMB rows at the company pages, in one vectorized
+    pass over the ticker column. Returns a copy; only the columns present
+    (URL, title) are touched.
+
+    The scraped `content` of those rows is still the index list page and
+    should be re-fetched before it is embedded.
+    """
+    df = df.copy()
+    fixed_urls = df['ticker'].map(URL_FIXES)
+    bad = fixed_urls.notna()
+    if not bad.any():
+        return df
+
+    if 'URL' in df.columns:
+        df.loc[bad, 'URL'] = fixed_urls[bad]
+    if 'title' in df.columns:
+        # Title follows the page name, e.g. ".../UMB_Financial_Corporation" -> "UMB Financial Corporation"
+        df.loc[bad, 'title'] = fixed_urls[bad].str.rsplit('/', n=1).str[-1].str.replace('_', ' ')
+
+    return df
@@ -0,0 +1,223 @@
+"""
+src/adv_hedging/data/loaders.py
+Loaders for the Wikipedia dataset, the Bloomberg risk-factor export and the
+daily returns panel.
+
+Both are scanned with pyarrow.dataset, so only the requested columns are read
+(column projection) and ticker / snapshot filters are applied while scanning
+(predicate pushdown). The Bloomberg workbook is converted once into a Parquet
+dataset partitioned by snapshot date; Excel is parsed again only when the
+workbook is newer than its conversion.
+"""
+import logging
+import re
+from datetime import date, datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from adv_hedging.config import BLOOMBERG_EXCEL_FILE, RETURNS_FILE, RISK_FACTORS_DIR, WIKI_PARQUET_FILE
+from adv_hedging.data.cleaning import clean_wiki_data
+
+logger = logging.getLogger(__name__)
+
+# Partition column of the risk-factor dataset (date of the Bloomberg export)
+SNAPSHOT_COL = 'as_of'
+_PARTITIONING = ds.partitioning(pa.schema([(SNAPSHOT_COL, pa.date32())]), flavor='hive')
+
+def _ticker_filter(tickers, column: str):
+    return ds.field(column).isin(list(tickers)) if tickers is not None else None
+
+def load_wiki_data(columns=None, tickers=None, path=WIKI_PARQUET_FILE) -> pd.DataFrame:
+    """
+    Wikipedia dataset (one row per company), with the Veralto / UMB fixes.
+
+    Args:
+        columns: Columns to read (default all). Leaving out the embedding
+                 columns makes this several times cheaper.
+        tickers: Only read these companies
+    """
+    read_cols = None if columns is None else list(dict.fromkeys(['ticker', *columns]))
+    table = ds.dataset(path, format='parquet').to_table(columns=read_cols, filter=_ticker_filter(tickers, 'ticker'))
+
+    df = clean_wiki_data(table.to_pandas())
+    return df if columns is None else df[list(columns)]
+
+def load_embedding_matrix(column: str = 'embedding_mpnet', tickers=None, path=WIKI_PARQUET_FILE) -> pd.DataFrame:
+    """
+    Embeddings (Index=Ticker, Cols=Dims) as float32.
+
+    The column is read as one fixed-size-list Arrow array and its flat value
+    buffer reshaped to (N, D), instead of building a pandas object column of
+    per-row arrays and stacking it. Rows without an embedding are dropped, and
+    the first row of a duplicated ticker is kept.
+    """
+    table = ds.dataset(path, format='parquet').to_table(
+        columns=['ticker', column], filter=_ticker_filter(tickers, 'ticker')
+    )
+    table = table.filter(pc.is_valid(table[column]))
+    vectors = table[column].combine_chunks()
+
+    if not pa.types.is_fixed_size_list(vectors.type):
+        lengths = pc.unique(pc.list_value_length(vectors)).to_pylist()
+        if len(lengths) > 1:
+            raise ValueError(f"Embeddings in '{column}' have different sizes: {sorted(lengths)}")
+        dim = lengths[0] if lengths else 0
+        vectors = vectors.cast(pa.list_(pa.float32(), dim))
+
+    dim = vectors.type.list_size
+    matrix = vectors.flatten().to_numpy(zero_copy_only=False).astype(np.float32, copy=False).reshape(-1, dim)
+
+    embeddings = pd.DataFrame(matrix, index=pd.Index(table['ticker'].to_pylist(), name='ticker'))
+    return embeddings[~embeddings.index.duplicated()]
+
+def _snapshot_date(excel_path) -> date:
+    """Export date from the file name (e.g. 20250928_US_Port.xlsx), else its modification date."""
+    match = re.match(r"(\d{8})", Path(excel_path).name)
+    if match:
+        return datetime.strptime(match.group(1), "%Y%m%d").date()
+    return date.fromtimestamp(Path(excel_path).stat().st_mtime)
+
+def write_risk_factor_snapshot(df: pd.DataFrame, as_of, output_dir=RISK_FACTORS_DIR) -> None:
+    """Writes one Bloomberg export as the `as_of` partition, replacing an existing one."""
+    df = df.copy()
+
+    # Excel columns mixing text and numbers are stored as text
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].astype("string")
+    df[SNAPSHOT_COL] = pd.Timestamp(as_of).date()
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    i = table.schema.get_field_index(SNAPSHOT_COL)
+    table = table.set_column(i, SNAPSHOT_COL, table[SNAPSHOT_COL].cast(pa.date32()))
+
+    ds.write_dataset(
+        table,
+        output_dir,
+        format='parquet',
+        partitioning=_PARTITIONING,
+        basename_template="part-{i}.parquet",
+        existing_data_behavior='delete_matching'
+    )
+
+def convert_risk_factors(excel_path=BLOOMBERG_EXCEL_FILE, output_dir=RISK_FACTORS_DIR) -> None:
+    """One-off conversion of the Bloomberg workbook to the Parquet dataset."""
+    logger.info("Converting %s to Parquet (one-off)...", Path(excel_path).name)
+    write_risk_factor_snapshot(pd.read_excel(excel_path), _snapshot_date(excel_path), output_dir)
+
+def _needs_conversion(excel_path, dataset_dir) -> bool:
+    dataset_dir, excel_path = Path(dataset_dir), Path(excel_path)
+    parts = list(dataset_dir.glob(f"{SNAPSHOT_COL}=*/*.parquet"))
+    if not excel_path.exists():
+        return False
+    return not parts or excel_path.stat().st_mtime > max(p.stat().st_mtime for p in parts)
+
+def risk_factor_snapshots(dataset_dir=RISK_FACTORS_DIR) -> list:
+    """Sorted snapshot dates in the dataset, from the partition directories (no data read)."""
+    return sorted(
+        datetime.strptime(p.name.split("=", 1)[1], "%Y-%m-%d").date()
+        for p in Path(dataset_dir).glob(f"{SNAPSHOT_COL}=*")
+    )
+
+def load_risk_factors(
+    columns=None,
+    tickers=None,
+    start=None,
+    end=None,
+    excel_path=BLOOMBERG_EXCEL_FILE,
+    dataset_dir=RISK_FACTORS_DIR
+) -> pd.DataFrame:
+    """
+    Bloomberg risk-factor export (one row per security and snapshot).
+
+    By default only the latest snapshot is read, laid out like the workbook.
+    With `start` and/or `end`, every snapshot in that range is read and the
+    snapshot date is returned in an 'as_of' column.
+
+    Args:
+        columns: Columns to read (default all), e.g. ['Ticker.1', 'PORT US Sz Fact Exp:D-1']
+        tickers: Bloomberg tickers as in 'Ticker.1' (e.g. "ZTS US")
+    """
+    if _needs_conversion(excel_path, dataset_dir):
+        convert_risk_factors(excel_path, dataset_dir)
+
+    latest = start is None and end is None
+    snapshots = risk_factor_snapshots(dataset_dir)
+    if not snapshots:
+        raise FileNotFoundError(
+            f"No risk-factor snapshots in {dataset_dir} and no workbook at {excel_path} to convert."
+        )
+    if latest:
+        start = end = snapshots[-1]
+
+    predicate = None
+    if start is not None:
+        predicate = ds.field(SNAPSHOT_COL) >= pd.Timestamp(start).date()
+    if end is not None:
+        upper = ds.field(SNAPSHOT_COL) <= pd.Timestamp(end).date()
+        predicate = upper if predicate is None else predicate & upper
+    ticker_filter = _ticker_filter(tickers, 'Ticker.1')
+    if ticker_filter is not None:
+        predicate = predicate & ticker_filter if predicate is not None else ticker_filter
+
+    dataset = ds.dataset(dataset_dir, format='parquet', partitioning=_PARTITIONING)
+    read_cols = None
+    if columns is not None:
+        read_cols = list(columns) + ([] if latest else [SNAPSHOT_COL])
+
+    df = dataset.to_table(columns=read_cols, filter=predicate).to_pandas(date_as_object=False)
+    if latest and SNAPSHOT_COL in df.columns:
+        df = df.drop(columns=SNAPSHOT_COL)
+    return df
+
+def download_returns(tickers, start="2023-01-01", end="2025-01-01", path=RETURNS_FILE) -> pd.DataFrame:
+    """
+    Daily returns (Index=Date, Cols=Tickers) from yfinance adjusted closes,
+    as in notebook 01, written to `path` for `load_returns`.
+    Tickers yfinance cannot find are left out.
+    """
+    import yfinance as yf
+
+    prices = yf.download(list(tickers), start=start, end=end, auto_adjust=True, progress=False)['Close']
+    returns_df = prices.pct_change().dropna(how='all').dropna(axis=1, how='all')
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    returns_df.to_parquet(path)
+    logger.info("Saved returns for %d tickers over %d days to %s", returns_df.shape[1], len(returns_df), path)
+    return returns_df
+
+def load_returns(tickers=None, start=None, end=None, path=RETURNS_FILE) -> pd.DataFrame:
+    """
+    Daily returns panel written by notebook 01 or `download_returns`.
+
+    Args:
+        tickers: Only read these columns (tickers missing from the file are skipped)
+        start, end: Optional date range (inclusive)
+    """
+    if not Path(path).exists():
+        raise FileNotFoundError(
+            f"No returns file at {path}. Run notebooks/01_factor_model_construction.ipynb "
+            "or adv_hedging.data.loaders.download_returns first."
+        )
+
+    schema = ds.dataset(path, format='parquet').schema
+    read_cols = None
+    if tickers is not None:
+        available = set(schema.names)
+        read_cols = [t for t in tickers if t in available]
+
+    # The date range is pushed down to pyarrow, which skips row groups outside it
+    index_cols = (schema.pandas_metadata or {}).get('index_columns', [])
+    if not index_cols or not isinstance(index_cols[0], str):
+        return pd.read_parquet(path, columns=read_cols).loc[start:end]
+
+    filters = []
+    if start is not None:
+        filters.append((index_cols[0], '>=', pd.Timestamp(start)))
+    if end is not None:
+        filters.append((index_cols[0], '<=', pd.Timestamp(end)))
+    return pd.read_parquet(path, columns=read_cols, filters=filters or None)
@@ -0,0 +1,110 @@
+"""
+src/adv_hedging/hedging/cache.py
+LRU cache of hedge solutions, with optional disk backing.
+"""
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from adv_hedging.telemetry import increment
+from adv_hedging.utils import ArtifactCache, content_hash
+
+class HedgeCache:
+    """
+    Maps (target exposures, universe, risk model, solver settings) to the
+    optimal hedge weights.
+
+    Target exposures are quantized to `exposure_tolerance` before hashing, so
+    re-hedges after immaterial exposure moves hit the cache. The universe and
+    risk model are identified either by an explicit `model_version` (cheap,
+    the caller bumps it whenever the risk model is re-estimated) or, when no
+    version is given, by hashing their contents.
+
+    Args:
+        max_entries: Number of solutions kept in memory (least recently used
+                     entries are evicted first)
+        cache_dir: Optional directory of a utils.ArtifactCache where every
+                   solution is also written, so the cache survives restarts
+        exposure_tolerance: Quantization step for the target exposures
+        max_bytes: Budget of the disk copy
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        cache_dir=None,
+        exposure_tolerance: float = 1e-4,
+        max_bytes: int = 1024**3
+    ):
+        self.max_entries = max_entries
+        self.disk = ArtifactCache(cache_dir, max_bytes=max_bytes) if cache_dir is not None else None
+        self.exposure_tolerance = exposure_tolerance
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key(
+        self,
+        target_exposures: pd.Series,
+        universe_exposures: pd.DataFrame,
+        factor_cov_matrix: pd.DataFrame,
+        specific_variances: pd.Series,
+        model_version=None,
+        init_weights: pd.Series = None,
+        **settings
+    ) -> str:
+        """
+        Hex digest identifying one hedge problem (`settings` e.g. max_positions,
+        solver). A warm start can change the hedge found, so `init_weights`
+        is part of the key.
+        """
+        quantized = np.round(target_exposures.to_numpy(dtype=float) / self.exposure_tolerance).astype(np.int64)
+        target = pd.Series(quantized, index=target_exposures.index)
+
+        # Universe membership always matters, the numbers only without a version
+        if model_version is not None:
+            model = ('version', model_version)
+        else:
+            model = (universe_exposures, factor_cov_matrix, specific_variances)
+
+        return content_hash(target, settings, init_weights, universe_exposures.index, model)
+
+    def get(self, key: str):
+        """Stored weights (np.ndarray) for `key`, or None."""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            increment('hedge_cache.hits')
+            return self._entries[key].copy()
+
+        weights = self.disk.get(key, mmap=False) if self.disk is not None else None
+        if weights is not None:
+            self._store(key, weights)
+            self.hits += 1
+            increment('hedge_cache.hits')
+            return weights.copy()
+
+        self.misses += 1
+        increment('hedge_cache.misses')
+        return None
+
+    def put(self, key: str, weights) -> None:
+        weights = np.asarray(weights, dtype=float).copy()
+        self._store(key, weights)
+
+        if self.disk is not None:
+            self.disk.put(key, weights)
+
+    def _store(self, key: str, weights: np.ndarray) -> None:
+        self._entries[key] = weights
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Empties the in-memory cache (disk entries are kept)."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
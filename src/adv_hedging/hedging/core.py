@@ -1,18 +1,50 @@
 """
 src/adv_hedging/hedging/core.py
-Abstract base class for hedging strategies.
+Abstract base class for hedging strategies, and the Factor / Embedding engines.
 """
 from abc import ABC, abstractmethod
+
+import numpy as np
 import pandas as pd
 
+from adv_hedging.hedging.optimization import _hedge_from_qp, _hedges_from_qp
+from adv_hedging.hedging.qp import TrackingErrorQP
+from adv_hedging.nlp.index import EmbeddingIndex, IVFIndex
+
 class HedgeEngine(ABC):
     """
     Interface for different hedging strategies (Factor vs Embedding).
+
+    Lifecycle: `fit()` builds the expensive, universe-wide state once;
+    `calculate_hedge` / `calculate_hedges` are then cheap queries against it.
+    Querying an engine that was not fitted fits it first. Both queries raise
+    ValueError for targets outside the fitted universe.
     """
-    
+
     def __init__(self, universe_data):
         self.universe_data = universe_data
-        
+        self.is_fitted = False
+        self._last_hedge = None
+
+    def fit(self) -> "HedgeEngine":
+        """
+        Precomputes the state shared by every query. Returns self.
+        """
+        self.is_fitted = True
+        return self
+
+    def _ensure_fitted(self):
+        if not self.is_fitted:
+            self.fit()
+
+    def _check_targets(self, tickers) -> pd.Index:
+        """Targets as an Index, raising ValueError if any is not in the fitted universe."""
+        targets = pd.Index(tickers)
+        missing = targets.difference(self.universe_data.index, sort=False)
+        if len(missing):
+            raise ValueError(f"Targets not in the {type(self).__name__} universe: {list(missing)}")
+        return targets
+
     @abstractmethod
     def calculate_hedge(self, target_ticker: str) -> pd.Series:
         """
@@ -20,10 +52,162 @@ class HedgeEngine(ABC):
         Index = Tickers, Values = Weights.
         """
         pass
-        
+
+    def calculate_hedges(self, tickers) -> pd.DataFrame:
+        """
+        Hedges for several targets (Index=Targets, Cols=Tickers).
+        Engines override this with a vectorized version.
+        """
+        return pd.DataFrame({t: self.calculate_hedge(t) for t in tickers}).T
+
     @abstractmethod
     def get_hedge_rationale(self) -> str:
         """
         Returns a string explaining why this hedge was chosen.
         """
-        pass
\ No newline at end of file
+        pass
+
+class FactorHedgeEngine(HedgeEngine):
+    """
+    Minimum tracking-error hedge against the factor risk model.
+
+    `fit()` builds the factor-form QP (B S, the Woodbury factorization of the
+    Hessian, the bounds) once; each hedge then only solves for a new linear term.
+
+    Args:
+        universe_data: Factor exposures of the hedge universe (Index=Tickers, Cols=Factors)
+        factor_cov_matrix: Factor covariance (Factors x Factors)
+        specific_variances: Specific variances (Index=Tickers)
+        max_positions: Names per hedge
+        cardinality: Name selection strategy (see `optimize_hedge_weights`)
+    """
+
+    def __init__(
+        self,
+        universe_data: pd.DataFrame,
+        factor_cov_matrix: pd.DataFrame,
+        specific_variances: pd.Series,
+        max_positions: int = 10,
+        cardinality: str = 'iht'
+    ):
+        super().__init__(universe_data)
+        self.factor_cov_matrix = factor_cov_matrix
+        self.specific_variances = specific_variances
+        self.max_positions = max_positions
+        self.cardinality = cardinality
+        self.qp = None
+
+    def fit(self) -> "FactorHedgeEngine":
+        factors = self.universe_data.columns
+        self.qp = TrackingErrorQP(
+            self.universe_data.values,
+            self.factor_cov_matrix.loc[factors, factors].values,
+            self.specific_variances.loc[self.universe_data.index].values,
+            lower=0.0, upper=0.25, budget=(0.7, 1.3)
+        )
+        return super().fit()
+
+    def calculate_hedge(self, target_ticker: str) -> pd.Series:
+        self._ensure_fitted()
+        self._check_targets([target_ticker])
+        tickers = self.universe_data.index
+        target = self.universe_data.loc[target_ticker].values
+
+        # A stock cannot hedge itself
+        upper = self.qp.upper.copy()
+        upper[tickers.get_loc(target_ticker)] = 0.0
+
+        weights = pd.Series(
+            _hedge_from_qp(self.qp, target, self.max_positions, upper=upper, cardinality=self.cardinality),
+            index=tickers
+        )
+        self._last_hedge = (target_ticker, weights, self.qp.objective(weights.values, target))
+        return weights
+
+    def calculate_hedges(self, tickers, n_jobs: int = 1) -> pd.DataFrame:
+        """Hedges for several targets, sharing the fitted QP (parallel with `n_jobs`)."""
+        self._ensure_fitted()
+        targets = self._check_targets(tickers)
+        return _hedges_from_qp(
+            self.qp, self.universe_data.loc[targets], self.universe_data.index,
+            max_positions=self.max_positions, n_jobs=n_jobs, cardinality=self.cardinality
+        )
+
+    def get_hedge_rationale(self) -> str:
+        if self._last_hedge is None:
+            return "No hedge calculated yet."
+        target, weights, objective = self._last_hedge
+        held = weights[weights > 0].sort_values(ascending=False)
+        return (
+            f"Factor hedge for {target}: {len(held)} names chosen to offset its exposures to "
+            f"{', '.join(self.universe_data.columns)} at minimum tracking error "
+            f"(residual risk {np.sqrt(objective):.2%}). Largest positions: "
+            + ", ".join(f"{t} {w:.1%}" for t, w in held.head(5).items())
+        )
+
+class EmbeddingHedgeEngine(HedgeEngine):
+    """
+    Equal-weight basket of the companies whose descriptions are closest to
+    the target's (cosine similarity of text embeddings).
+
+    `fit()` builds the embedding index once (see nlp/index.py); queries are
+    then top-k lookups against it.
+
+    Args:
+        universe_data: Embeddings of the hedge universe (Index=Tickers, Cols=Dims)
+        num_neighbors: Names per hedge
+        index: 'exact' (blocked matrix product) or 'ivf' (approximate)
+        dtype: Index storage dtype, np.float32 or np.float16
+    """
+
+    def __init__(self, universe_data: pd.DataFrame, num_neighbors: int = 10, index: str = 'exact', dtype=np.float32):
+        super().__init__(universe_data)
+        self.num_neighbors = num_neighbors
+        self.index_kind = index
+        self.dtype = dtype
+        self.tickers = universe_data.index
+        self.index = None
+
+    def fit(self) -> "EmbeddingHedgeEngine":
+        index_cls = {'exact': EmbeddingIndex, 'ivf': IVFIndex}[self.index_kind]
+        self.index = index_cls(self.universe_data.values, ids=self.tickers, dtype=self.dtype)
+        return super().fit()
+
+    def calculate_hedge(self, target_ticker: str) -> pd.Series:
+        return self.calculate_hedges([target_ticker]).iloc[0]
+
+    def calculate_hedges(self, tickers, universe=None) -> pd.DataFrame:
+        """
+        Hedges for several targets.
+
+        Args:
+            tickers: Targets (must have embeddings, else ValueError)
+            universe: Optional subset of tickers the hedges may use (e.g. the
+                      names with returns at a backtest date)
+        """
+        self._ensure_fitted()
+        targets = self._check_targets(tickers)
+        allowed = None if universe is None else self.tickers.isin(universe)
+
+        scores, positions = self.index.search_ids(targets, k=self.num_neighbors, allowed=allowed)
+
+        # Equal weights over the neighbours found (fewer than k if the universe is small)
+        found = positions >= 0
+        counts = found.sum(axis=1, keepdims=True)
+        weights = np.zeros((len(targets), len(self.tickers)))
+        rows = np.repeat(np.arange(len(targets)), found.sum(axis=1))
+        weights[rows, positions[found]] = (1.0 / np.maximum(counts, 1)).repeat(found.sum(axis=1))
+
+        if len(targets):
+            last = found[-1]
+            self._last_hedge = (targets[-1], self.tickers[positions[-1][last]], scores[-1][last])
+        return pd.DataFrame(weights, index=targets, columns=self.tickers)
+
+    def get_hedge_rationale(self) -> str:
+        if self._last_hedge is None:
+            return "No hedge calculated yet."
+        target, neighbors, sims = self._last_hedge
+        return (
+            f"NLP hedge for {target}: equal weights in the {len(neighbors)} companies with the most "
+            "similar descriptions: " + ", ".join(f"{t} ({s:.2f})" for t, s in zip(neighbors, sims))
+        )
@@ -40,4 +40,109 @@ def calculate_risk_reduction(unhedged_vol: float, hedged_vol: float) -> float:
     """Returns the percentage reduction in volatility."""
     if unhedged_vol == 0:
         return 0.0
-    return 1 - (hedged_vol / unhedged_vol)
\ No newline at end of file
+    return 1 - (hedged_vol / unhedged_vol)
+
+def _window_sums(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing-window column sums via one cumulative sum (O(T) for any window)."""
+    csum = np.cumsum(values, axis=0, dtype=float)
+    csum[window:] = csum[window:] - csum[:-window]
+    return csum
+
+def _rolling_moments(X: np.ndarray, window: int):
+    """
+    Trailing-window statistics of each column of X (T, K), skipping NaNs:
+    number of valid days, sum of squared deviations from the window mean,
+    and raw sum of squares.
+    """
+    valid = ~np.isnan(X)
+
+    # Centering each column first keeps the cumulative sums well conditioned
+    with np.errstate(invalid='ignore'):
+        center = np.nan_to_num(np.nanmean(np.where(valid.any(axis=0), X, 0.0), axis=0))
+    Xc = np.where(valid, X - center, 0.0)
+    X0 = np.where(valid, X, 0.0)
+
+    n = _window_sums(valid, window)
+    s1 = _window_sums(Xc, window)
+    s2 = _window_sums(Xc * Xc, window)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sq_dev = np.clip(s2 - s1 * s1 / n, 0.0, None)
+    return n, sq_dev, _window_sums(X0 * X0, window)
+
+def evaluate_rolling_hedges(
+    returns_df: pd.DataFrame,
+    hedge_weights: dict,
+    window: int = 63,
+    min_periods: int = None,
+    annualization: float = 252
+) -> pd.DataFrame:
+    """
+    Walk-forward evaluation of many hedges at once.
+
+    For every strategy, target and trailing window of `window` days, computes
+    the same numbers as `calculate_hedged_volatility` and
+    `calculate_risk_reduction` on that window, plus the tracking error
+    (root mean square of the target minus hedge basket returns). Net returns
+    for all (strategy, target) pairs come from one matrix product, and the
+    window statistics from cumulative sums, so the cost is O(T) in the number
+    of days rather than O(T x window).
+
+    Args:
+        returns_df: DataFrame of asset returns (Index=Date, Cols=Tickers),
+                    covering both the targets and the hedge universe
+        hedge_weights: {strategy: DataFrame of weights (Index=Targets, Cols=Tickers)},
+                       e.g. outputs of `optimize_hedges_batch`
+        window: Rolling window length (days)
+        min_periods: Minimum number of valid days in a window (defaults to `window`)
+        annualization: Scaling applied to daily volatilities (252 = annual)
+
+    Returns:
+        DataFrame indexed by (Date, Strategy, Target) with columns
+        Unhedged_Vol, Hedged_Vol, Tracking_Error and Risk_Reduction
+        (NaN for windows with fewer than `min_periods` valid days).
+    """
+    min_periods = window if min_periods is None else min_periods
+    strategies = list(hedge_weights)
+    targets = hedge_weights[strategies[0]].index
+    num_strategies = len(strategies)
+
+    # (S, G, N) weight stack over the hedge tickers, flattened to (S*G, N)
+    tickers = pd.Index(sorted(set().union(*(w.columns for w in hedge_weights.values()))))
+    tickers = tickers.intersection(returns_df.columns)
+    W = np.stack([
+        hedge_weights[s].reindex(index=targets, columns=tickers).fillna(0.0).to_numpy(dtype=float)
+        for s in strategies
+    ]).reshape(num_strategies * len(targets), len(tickers))
+
+    H = returns_df[tickers].to_numpy(dtype=float)
+    R = returns_df[targets].to_numpy(dtype=float)
+
+    # Net returns (T, S*G); a day is missing if the target or any held name is
+    hedge_missing = (np.isnan(H).astype(float) @ (W != 0).T) > 0
+    net = np.tile(R, num_strategies) - np.nan_to_num(H) @ W.T
+    net[hedge_missing] = np.nan
+
+    target_n, target_sq_dev, _ = _rolling_moments(R, window)
+    net_n, net_sq_dev, net_raw_sq = _rolling_moments(net, window)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        unhedged_vol = np.where(target_n >= min_periods, np.sqrt(target_sq_dev / (target_n - 1)), np.nan)
+        unhedged_vol = np.tile(unhedged_vol, num_strategies)
+
+        enough = net_n >= min_periods
+        hedged_vol = np.where(enough, np.sqrt(net_sq_dev / (net_n - 1)), np.nan)
+        tracking_error = np.where(enough, np.sqrt(net_raw_sq / net_n), np.nan)
+        risk_reduction = np.where(unhedged_vol == 0, 0.0, 1 - hedged_vol / unhedged_vol)
+
+    # Columns are ordered (strategy, target), matching the product below
+    index = pd.MultiIndex.from_product(
+        [returns_df.index, strategies, targets], names=['Date', 'Strategy', 'Target']
+    )
+    scale = np.sqrt(annualization)
+    return pd.DataFrame({
+        'Unhedged_Vol': unhedged_vol.ravel() * scale,
+        'Hedged_Vol': hedged_vol.ravel() * scale,
+        'Tracking_Error': tracking_error.ravel() * scale,
+        'Risk_Reduction': risk_reduction.ravel(),
+    }, index=index)
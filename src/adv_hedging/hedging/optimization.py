@@ -2,10 +2,21 @@
 src/adv_hedging/hedging/optimization.py
 Core optimization logic for portfolio hedging.
 """
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import pandas as pd
 from scipy.optimize import minimize
 
+from adv_hedging.hedging.cache import HedgeCache
+from adv_hedging.hedging.cardinality import select_hedge
+from adv_hedging.hedging.qp import TrackingErrorQP
+from adv_hedging.telemetry import increment, span, timed
+
+logger = logging.getLogger(__name__)
+
 def objective_tracking_error(weights, target_exposures, universe_exposures, factor_cov_matrix, specific_variances):
     """
     Objective function: Minimize Active Risk (Tracking Error).
@@ -30,89 +41,278 @@ def objective_tracking_error(weights, target_exposures, universe_exposures, fact
     
     return systemic_variance + specific_variance
 
-def optimize_hedge_weights(
-    target_exposures: pd.Series,
-    universe_exposures: pd.DataFrame,
-    factor_cov_matrix: pd.DataFrame,
-    specific_variances: pd.Series,
-    max_positions: int = 10
-) -> pd.Series:
+def gradient_tracking_error(weights, target_exposures, universe_exposures, factor_cov_matrix, specific_variances):
     """
-    Calculates optimal hedge weights subject to constraints.
-    Uses a two-stage approach to handle cardinality (max 10 stocks).
+    Analytic gradient of `objective_tracking_error` with respect to the weights:
+    -2 * B * Factor_Cov * (target - B'w) + 2 * specific_variances * w
     """
-    num_assets = len(universe_exposures)
-    
-    # --- STAGE 1: Relaxed Optimization (Find the best "dense" hedge) ---
-    
-    # Constraints: 
+    net_exposure = target_exposures - weights @ universe_exposures
+    return -2 * universe_exposures @ (factor_cov_matrix @ net_exposure) + 2 * specific_variances * weights
+
+def _solve_slsqp(targ_exp_vals, univ_exp_vals, cov_vals, spec_vals, maxiter=None, x0=None):
+    """
+    Runs one stage of the hedge optimization with scipy SLSQP.
+    Bounds 0 <= w <= 0.25 and 0.7 <= sum(w) <= 1.3, as in TrackingErrorQP.
+    `x0` optionally replaces the equal-weight initial guess.
+    """
+    num_assets = len(univ_exp_vals)
+
+    # Constraints:
     # 1. Fully invested hedge (sum of weights between 0.7 and 1.3 as per project specs)
     #    Eq constraint: sum(w) - 1.0 = 0 (Softened to bounds below)
+    ones = np.ones(num_assets)
     cons = [
-        {'type': 'ineq', 'fun': lambda w: np.sum(w) - 0.7}, # Sum >= 0.7
-        {'type': 'ineq', 'fun': lambda w: 1.3 - np.sum(w)}, # Sum <= 1.3
+        {'type': 'ineq', 'fun': lambda w: np.sum(w) - 0.7, 'jac': lambda w: ones},  # Sum >= 0.7
+        {'type': 'ineq', 'fun': lambda w: 1.3 - np.sum(w), 'jac': lambda w: -ones}, # Sum <= 1.3
     ]
-    
+
     # Bounds: 0 <= w <= 0.25 (as per project specs)
     bounds = [(0.0, 0.25) for _ in range(num_assets)]
-    
-    # Initial Guess: Equal weight
-    init_guess = np.ones(num_assets) / num_assets
-    
-    # Matrix alignment for numpy math
-    univ_exp_vals = universe_exposures.values
-    targ_exp_vals = target_exposures.values
-    cov_vals = factor_cov_matrix.values
-    spec_vals = specific_variances.values
-    
-    result = minimize(
+
+    # Initial Guess: Equal weight, unless warm-started from a prior solution
+    init_guess = np.ones(num_assets) / num_assets if x0 is None else np.asarray(x0, dtype=float)
+
+    options = {'disp': False}
+    if maxiter is not None:
+        options['maxiter'] = maxiter
+
+    return minimize(
         objective_tracking_error,
         init_guess,
         args=(targ_exp_vals, univ_exp_vals, cov_vals, spec_vals),
+        jac=gradient_tracking_error,
         method='SLSQP',
         bounds=bounds,
         constraints=cons,
-        options={'disp': False, 'maxiter': 100}
+        options=options
     )
-    
+
+def _hedge_from_qp(
+    qp: TrackingErrorQP,
+    targ_exp_vals,
+    max_positions,
+    upper=None,
+    cardinality='iht',
+    init_weights=None
+) -> np.ndarray:
+    """
+    Cardinality-constrained hedge on a prebuilt TrackingErrorQP, so the
+    universe-side factorization can be shared by many targets.
+    """
+    return select_hedge(
+        qp, targ_exp_vals, max_positions, strategy=cardinality, upper=upper, init_weights=init_weights
+    ).x
+
+@timed('optimization.hedge', logger)
+def optimize_hedge_weights(
+    target_exposures: pd.Series,
+    universe_exposures: pd.DataFrame,
+    factor_cov_matrix: pd.DataFrame,
+    specific_variances: pd.Series,
+    max_positions: int = 10,
+    solver: str = 'slsqp',
+    cardinality: str = 'topn',
+    init_weights: pd.Series = None,
+    cache: HedgeCache = None,
+    model_version=None
+) -> pd.Series:
+    """
+    Calculates optimal hedge weights subject to constraints.
+    Holds at most `max_positions` stocks (max 10 by default).
+
+    Args:
+        solver: 'slsqp' (scipy SLSQP with the analytic gradient) or 'admm'
+                (factor-form QP, see hedging/qp.py), much faster on large universes
+        cardinality: How the ADMM solver picks the names, one of
+                     'topn', 'greedy', 'iht' or 'swap' (see hedging/cardinality.py).
+                     SLSQP always uses the two-stage top-N approach.
+        init_weights: Optional prior hedge (Index=Tickers), e.g. the previous
+                      re-balance for the same target. Its names and weights
+                      seed the solver (see `cardinality.warm_start`).
+        cache: Optional HedgeCache; a hit returns the stored weights directly
+        model_version: Risk model identifier used in the cache key (if None,
+                       the universe and risk model contents are hashed)
+    """
+    if cache is not None:
+        cache_key = cache.key(
+            target_exposures, universe_exposures, factor_cov_matrix, specific_variances,
+            model_version=model_version, init_weights=init_weights,
+            max_positions=max_positions, solver=solver, cardinality=cardinality
+        )
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return pd.Series(cached, index=universe_exposures.index)
+
+    weights = _optimize_hedge_weights(
+        target_exposures, universe_exposures, factor_cov_matrix, specific_variances,
+        max_positions, solver, cardinality, init_weights
+    )
+
+    # Failed solves (all-zero weights) are not cached
+    if cache is not None and weights.any():
+        cache.put(cache_key, weights.values)
+    return weights
+
+def _optimize_hedge_weights(
+    target_exposures, universe_exposures, factor_cov_matrix, specific_variances,
+    max_positions, solver, cardinality, init_weights
+) -> pd.Series:
+    # Matrix alignment for numpy math
+    univ_exp_vals = universe_exposures.values
+    targ_exp_vals = target_exposures.values
+    cov_vals = factor_cov_matrix.values
+    spec_vals = specific_variances.values
+
+    # Prior hedge aligned to the universe (names no longer in it are dropped)
+    init_vals = None
+    if init_weights is not None:
+        init_vals = init_weights.reindex(universe_exposures.index).fillna(0.0).values
+
+    if solver == 'admm':
+        qp = TrackingErrorQP(univ_exp_vals, cov_vals, spec_vals, lower=0.0, upper=0.25, budget=(0.7, 1.3))
+        weights = _hedge_from_qp(qp, targ_exp_vals, max_positions, cardinality=cardinality, init_weights=init_vals)
+        return pd.Series(weights, index=universe_exposures.index)
+
+    # --- STAGE 1: Relaxed Optimization (Find the best "dense" hedge) ---
+
+    result = _solve_slsqp(targ_exp_vals, univ_exp_vals, cov_vals, spec_vals, maxiter=100, x0=init_vals)
+
     if not result.success:
-        print(f"Warning: Stage 1 Optimization failed: {result.message}")
+        logger.warning("Stage 1 optimization failed: %s", result.message)
+        increment('optimization.stage1_failed')
         return pd.Series(0, index=universe_exposures.index)
 
     # --- STAGE 2: Cardinality Constraint (Pick Top N) ---
-    
+
     full_weights = pd.Series(result.x, index=universe_exposures.index)
-    
+
     # Sort by weight and pick top N
     top_tickers = full_weights.sort_values(ascending=False).head(max_positions).index
-    
+
     # Subset data for re-optimization
     subset_univ = universe_exposures.loc[top_tickers]
     subset_spec = specific_variances.loc[top_tickers]
-    num_subset = len(top_tickers)
-    
+
     # Re-run optimization on just these N stocks
-    # Update bounds and constraints for the smaller set
-    subset_bounds = [(0.0, 0.25) for _ in range(num_subset)]
-    subset_init = np.ones(num_subset) / num_subset
-    
-    # Same constraints (Sum >= 0.7, Sum <= 1.3)
-    subset_cons = [
-        {'type': 'ineq', 'fun': lambda w: np.sum(w) - 0.7},
-        {'type': 'ineq', 'fun': lambda w: 1.3 - np.sum(w)},
-    ]
-    
-    result_stage2 = minimize(
-        objective_tracking_error,
-        subset_init,
-        args=(targ_exp_vals, subset_univ.values, cov_vals, subset_spec.values),
-        method='SLSQP',
-        bounds=subset_bounds,
-        constraints=subset_cons
-    )
-    
+    # (same bounds and constraints for the smaller set)
+    result_stage2 = _solve_slsqp(targ_exp_vals, subset_univ.values, cov_vals, subset_spec.values)
+
     # Construct final Series
     final_weights = pd.Series(0.0, index=universe_exposures.index)
     final_weights.loc[top_tickers] = result_stage2.x
-    
-    return final_weights
\ No newline at end of file
+
+    return final_weights
+
+# Per-worker state for optimize_hedges_batch (set once by the pool initializer)
+_BATCH_QP = None
+
+def _init_batch_worker(qp):
+    global _BATCH_QP
+    _BATCH_QP = qp
+
+def _solve_batch_chunk(targets, uppers, max_positions, cardinality='iht', inits=None, qp=None):
+    """Solves a chunk of targets against the shared QP."""
+    qp = qp or _BATCH_QP
+    inits = [None] * len(targets) if inits is None else inits
+    return np.vstack([
+        _hedge_from_qp(qp, target, max_positions, upper=upper, cardinality=cardinality, init_weights=init)
+        for target, upper, init in zip(targets, uppers, inits)
+    ])
+
+def optimize_hedges_batch(
+    targets_df: pd.DataFrame,
+    universe_exposures: pd.DataFrame,
+    factor_cov_matrix: pd.DataFrame,
+    specific_variances: pd.Series,
+    max_positions: int = 10,
+    exclude_self: bool = True,
+    n_jobs: int = 1,
+    chunk_size: int = 64,
+    cardinality: str = 'iht',
+    init_weights: pd.DataFrame = None
+) -> pd.DataFrame:
+    """
+    Hedges many targets against one universe and risk model.
+
+    The universe-side matrices (B S, the Woodbury factorization of the QP
+    Hessian, the bounds) are built once and shared by every target; each
+    target only changes the linear term of the QP.
+
+    Args:
+        targets_df: Target exposures (Index=Targets, Cols=Factors)
+        universe_exposures: DataFrame of exposures (Index=Tickers, Cols=Factors)
+        factor_cov_matrix: Factor covariance (Factors x Factors)
+        specific_variances: Series of specific variances (Index=Tickers)
+        max_positions: Cardinality of each hedge
+        exclude_self: A target that is also in the universe cannot hedge itself
+        n_jobs: Number of worker processes (-1 = all cores)
+        chunk_size: Targets per task when running in parallel
+        cardinality: Name selection strategy (see `optimize_hedge_weights`)
+        init_weights: Optional prior hedges (Index=Targets, Cols=Tickers) used
+                      as warm starts; targets missing from it start cold
+
+    Returns:
+        DataFrame of weights (Index=Targets, Cols=Tickers)
+    """
+    factors = universe_exposures.columns
+    qp = TrackingErrorQP(
+        universe_exposures.values,
+        factor_cov_matrix.loc[factors, factors].values,
+        specific_variances.loc[universe_exposures.index].values,
+        lower=0.0, upper=0.25, budget=(0.7, 1.3)
+    )
+    logger.info("Optimizing hedges for %d targets over %d names...", len(targets_df), len(universe_exposures))
+    with span('optimization.batch', logger):
+        return _hedges_from_qp(
+            qp, targets_df[factors], universe_exposures.index, max_positions, exclude_self,
+            n_jobs, chunk_size, cardinality, init_weights
+        )
+
+def _hedges_from_qp(
+    qp: TrackingErrorQP,
+    targets_df: pd.DataFrame,
+    tickers: pd.Index,
+    max_positions: int = 10,
+    exclude_self: bool = True,
+    n_jobs: int = 1,
+    chunk_size: int = 64,
+    cardinality: str = 'iht',
+    init_weights: pd.DataFrame = None
+) -> pd.DataFrame:
+    """Body of `optimize_hedges_batch` on a prebuilt QP over `tickers`."""
+    targets = targets_df.to_numpy(dtype=float)
+
+    # Per-target upper bounds (0 for the target itself)
+    uppers = np.tile(qp.upper, (len(targets), 1))
+    if exclude_self:
+        self_pos = tickers.get_indexer(targets_df.index)
+        has_self = self_pos >= 0
+        uppers[np.flatnonzero(has_self), self_pos[has_self]] = 0.0
+
+    inits = None
+    if init_weights is not None:
+        inits = init_weights.reindex(index=targets_df.index, columns=tickers).to_numpy(dtype=float)
+        inits = [None if np.isnan(row).all() else np.nan_to_num(row) for row in inits]
+
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+
+    if n_jobs > 1 and len(targets) > chunk_size:
+        starts = range(0, len(targets), chunk_size)
+        # The QP is pickled once per worker, not once per target
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_batch_worker, initargs=(qp,)) as executor:
+            chunks = executor.map(
+                _solve_batch_chunk,
+                [targets[i : i + chunk_size] for i in starts],
+                [uppers[i : i + chunk_size] for i in starts],
+                [max_positions] * len(starts),
+                [cardinality] * len(starts),
+                [None if inits is None else inits[i : i + chunk_size] for i in starts]
+            )
+            weights = np.vstack(list(chunks))
+    elif len(targets) > 0:
+        weights = _solve_batch_chunk(targets, uppers, max_positions, cardinality, inits, qp=qp)
+    else:
+        weights = np.zeros((0, len(tickers)))
+
+    return pd.DataFrame(weights, index=targets_df.index, columns=tickers)
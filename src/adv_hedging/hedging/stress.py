@@ -0,0 +1,248 @@
+"""
+src/adv_hedging/hedging/stress.py
+Scenario analysis and stress tests of hedged positions.
+
+A hedged position is long one target and short its hedge basket, so its
+factor exposure is b_target - w' B. Stacking those net exposures for every
+(strategy, target) pair into one (P, F) matrix, the P&L of K factor scenarios
+is a single (K, F) x (F, P) product, whatever the number of scenarios.
+
+Units follow the risk model: factor covariances and specific variances are
+annualized (as returned by risk_model.covariance), factor returns are daily,
+and horizons are counted in trading days. Covariances are scaled to a
+horizon by `horizon / annualization`.
+"""
+import numpy as np
+import pandas as pd
+
+def historical_scenarios(factor_returns: pd.DataFrame, horizon: int = 1) -> pd.DataFrame:
+    """
+    Realized factor moves over every (overlapping) window of `horizon` days.
+
+    Args:
+        factor_returns: Daily factor returns (Index=Date, Cols=Factors), e.g.
+                        the output of `calculate_factor_returns`
+    Returns:
+        DataFrame of shocks (Index=window end date, Cols=Factors)
+    """
+    clean = factor_returns.dropna()
+    if horizon == 1:
+        return clean
+
+    sums = np.vstack([np.zeros(clean.shape[1]), np.cumsum(clean.to_numpy(dtype=float), axis=0)])
+    return pd.DataFrame(sums[horizon:] - sums[:-horizon], index=clean.index[horizon - 1:], columns=clean.columns)
+
+def hypothetical_scenarios(shocks: dict, factors) -> pd.DataFrame:
+    """
+    Named factor shocks, e.g. {'Momentum crash': {'Momentum': -0.08, 'Volatility': 0.03}}.
+    Factors a scenario does not mention are not shocked.
+    """
+    scenarios = pd.DataFrame.from_dict(shocks, orient='index').reindex(columns=list(factors))
+    return scenarios.fillna(0.0)
+
+def factor_shock_grid(
+    factor_cov_matrix: pd.DataFrame,
+    sigmas=(-5, -4, -3, -2, 2, 3, 4, 5),
+    horizon: int = 1,
+    annualization: float = 252
+) -> pd.DataFrame:
+    """
+    One scenario per (factor, size): the factor moves by `size` standard
+    deviations over `horizon` trading days, the other factors by their
+    conditional expectation given that move (beta to the shocked factor).
+
+    Args:
+        factor_cov_matrix: Annualized factor covariance
+        annualization: Periods per year of `factor_cov_matrix` (1 if daily)
+    """
+    cov = factor_cov_matrix.to_numpy(dtype=float) * (horizon / annualization)
+    vols = np.sqrt(np.diag(cov))
+    betas = cov / np.diag(cov)[None, :]  # column j: regression of every factor on factor j
+
+    names, rows = [], []
+    for j, factor in enumerate(factor_cov_matrix.columns):
+        for size in sigmas:
+            names.append(f"{factor} {size:+g}sd")
+            rows.append(betas[:, j] * size * vols[j])
+    return pd.DataFrame(rows, index=names, columns=factor_cov_matrix.columns)
+
+def monte_carlo_scenarios(
+    factor_cov_matrix: pd.DataFrame,
+    num_draws: int = 10000,
+    horizon: int = 1,
+    seed: int = 0,
+    annualization: float = 252
+) -> pd.DataFrame:
+    """
+    Gaussian factor moves over `horizon` trading days drawn from the
+    annualized factor covariance (`annualization` periods per year).
+    """
+    cov = factor_cov_matrix.to_numpy(dtype=float) * (horizon / annualization)
+
+    # Square root via eigh, which tolerates covariances that are only PSD
+    eigvals, eigvecs = np.linalg.eigh(cov)
+    root = eigvecs * np.sqrt(np.clip(eigvals, 0.0, None))
+
+    rng = np.random.default_rng(seed)
+    draws = rng.standard_normal((num_draws, len(cov))) @ root.T
+    return pd.DataFrame(draws, columns=factor_cov_matrix.columns)
+
+def _net_exposures(hedge_weights: dict, target_exposures: pd.DataFrame, universe_exposures: pd.DataFrame):
+    """(P, F) net factor exposures of every (strategy, target) pair, plus the (S, G, N) weight stack."""
+    strategies = list(hedge_weights)
+    targets = target_exposures.index
+    W = np.stack([
+        hedge_weights[s].reindex(index=targets, columns=universe_exposures.index).fillna(0.0).to_numpy(dtype=float)
+        for s in strategies
+    ])
+    hedge_exposures = W @ universe_exposures.to_numpy(dtype=float)  # (S, G, F)
+    net = target_exposures.to_numpy(dtype=float)[None, :, :] - hedge_exposures
+    return net.reshape(-1, net.shape[-1]), W
+
+def scenario_pnl(
+    hedge_weights: dict,
+    target_exposures: pd.DataFrame,
+    universe_exposures: pd.DataFrame,
+    scenarios: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Factor P&L of every hedged position under every scenario.
+
+    Args:
+        hedge_weights: {strategy: DataFrame of weights (Index=Targets, Cols=Tickers)},
+                       e.g. outputs of `optimize_hedges_batch`
+        target_exposures: Exposures of the targets (Index=Targets, Cols=Factors)
+        universe_exposures: Exposures of the hedge universe (Index=Tickers, Cols=Factors)
+        scenarios: Factor shocks (Index=Scenarios, Cols=Factors)
+
+    Returns:
+        DataFrame (Index=Scenarios, Cols=(Strategy, Target)) of returns per
+        unit long the target. An 'Unhedged' strategy is included.
+    """
+    factors = universe_exposures.columns
+    weights = {'Unhedged': pd.DataFrame(0.0, index=target_exposures.index, columns=universe_exposures.index)}
+    weights.update(hedge_weights)
+
+    net, _ = _net_exposures(weights, target_exposures[factors], universe_exposures)
+    pnl = scenarios[factors].to_numpy(dtype=float) @ net.T
+
+    columns = pd.MultiIndex.from_product([list(weights), target_exposures.index], names=['Strategy', 'Target'])
+    return pd.DataFrame(pnl, index=scenarios.index, columns=columns)
+
+def monte_carlo_pnl(
+    hedge_weights: dict,
+    target_exposures: pd.DataFrame,
+    universe_exposures: pd.DataFrame,
+    factor_cov_matrix: pd.DataFrame,
+    specific_variances: pd.Series,
+    num_draws: int = 10000,
+    horizon: int = 1,
+    seed: int = 0,
+    annualization: float = 252
+) -> pd.DataFrame:
+    """
+    Simulated P&L over `horizon` trading days of every hedged position: factor
+    draws from the covariance plus Gaussian specific returns of the target and
+    the hedge names.
+
+    The specific part of each position is drawn from its exact marginal
+    distribution, N(0, s_target + sum_j w_j^2 s_j), so per-target VaR/CVaR are
+    exact without simulating every stock.
+
+    Args:
+        factor_cov_matrix: Annualized factor covariance
+        specific_variances: Annualized specific variances
+        annualization: Periods per year of both risk inputs (1 if daily)
+
+    Returns:
+        DataFrame (Index=Draw, Cols=(Strategy, Target)), as `scenario_pnl`.
+    """
+    factors = universe_exposures.columns
+    scenarios = monte_carlo_scenarios(factor_cov_matrix.loc[factors, factors], num_draws, horizon, seed, annualization)
+    pnl = scenario_pnl(hedge_weights, target_exposures, universe_exposures, scenarios)
+
+    # Specific variance of each (strategy, target) position, in the column order of `pnl`
+    strategies = pnl.columns.get_level_values('Strategy').unique()
+    weights = {s: hedge_weights.get(s, pd.DataFrame()) for s in strategies}
+    _, W = _net_exposures(weights, target_exposures[factors], universe_exposures)
+    spec = specific_variances.reindex(universe_exposures.index).fillna(0.0).to_numpy(dtype=float)
+    target_spec = specific_variances.reindex(target_exposures.index).fillna(0.0).to_numpy(dtype=float)
+    position_spec = (target_spec[None, :] + (W ** 2) @ spec).ravel() * (horizon / annualization)
+
+    rng = np.random.default_rng(seed + 1)
+    pnl += rng.standard_normal(pnl.shape) * np.sqrt(position_spec)[None, :]
+    return pnl
+
+def var_cvar(pnl: pd.DataFrame, alpha: float = 0.99) -> pd.DataFrame:
+    """
+    Historical-simulation VaR and CVaR (expected shortfall) of each column,
+    as positive losses.
+
+    Returns:
+        DataFrame (Index=pnl columns) with VaR, CVaR and Worst_Loss.
+    """
+    values = pnl.to_numpy(dtype=float)
+    num_tail = max(int(np.ceil((1 - alpha) * len(values))), 1)
+
+    # Partial sort: the num_tail worst outcomes of every column, without a full sort
+    tail = np.partition(values, num_tail - 1, axis=0)[:num_tail]
+    return pd.DataFrame({
+        'VaR': -tail.max(axis=0),
+        'CVaR': -tail.mean(axis=0),
+        'Worst_Loss': -values.min(axis=0),
+    }, index=pnl.columns)
+
+def stress_test_hedges(
+    hedge_weights: dict,
+    universe_exposures: pd.DataFrame,
+    factor_cov_matrix: pd.DataFrame,
+    specific_variances: pd.Series,
+    target_exposures: pd.DataFrame = None,
+    factor_returns: pd.DataFrame = None,
+    hypothetical: pd.DataFrame = None,
+    num_draws: int = 10000,
+    horizon: int = 1,
+    alpha: float = 0.99,
+    seed: int = 0,
+    annualization: float = 252
+) -> pd.DataFrame:
+    """
+    VaR / CVaR of every hedged position under each scenario set:
+    'Historical' (windows of `factor_returns`), 'Hypothetical' (the given
+    shocks, or `factor_shock_grid` by default) and 'Monte Carlo'.
+
+    Args:
+        hedge_weights: {strategy: DataFrame of weights (Index=Targets, Cols=Tickers)}
+        factor_cov_matrix, specific_variances: Annualized risk model
+        target_exposures: Exposures of the targets; defaults to their rows of
+                          `universe_exposures`
+        factor_returns: Daily factor returns; the historical set is skipped if None
+        horizon: Scenario horizon in trading days
+        annualization: Periods per year of the risk model (1 if daily)
+
+    Returns:
+        DataFrame indexed by (Scenario_Set, Strategy, Target) with columns VaR,
+        CVaR and Worst_Loss (positive losses per unit long the target). The
+        'Unhedged' strategy is the target alone.
+    """
+    if target_exposures is None:
+        targets = hedge_weights[next(iter(hedge_weights))].index
+        target_exposures = universe_exposures.loc[targets]
+
+    factors = universe_exposures.columns
+    factor_cov = factor_cov_matrix.loc[factors, factors]
+    if hypothetical is None:
+        hypothetical = factor_shock_grid(factor_cov, horizon=horizon, annualization=annualization)
+
+    pnls = {}
+    if factor_returns is not None:
+        pnls['Historical'] = scenario_pnl(
+            hedge_weights, target_exposures, universe_exposures, historical_scenarios(factor_returns[factors], horizon)
+        )
+    pnls['Hypothetical'] = scenario_pnl(hedge_weights, target_exposures, universe_exposures, hypothetical)
+    pnls['Monte Carlo'] = monte_carlo_pnl(
+        hedge_weights, target_exposures, universe_exposures, factor_cov, specific_variances,
+        num_draws, horizon, seed, annualization
+    )
+
+    return pd.concat({name: var_cvar(pnl, alpha) for name, pnl in pnls.items()}, names=['Scenario_Set'])
@@ -0,0 +1,179 @@
+"""
+src/adv_hedging/nlp/cache.py
+Content-addressed cache of chunk embeddings, stored in SQLite.
+
+An embedding is keyed by a hash of (model name, chunk text), so re-embedding
+a refreshed corpus only sends new or edited chunks to the encoder.
+"""
+import sqlite3
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+from adv_hedging.config import DATA_DIR
+from adv_hedging.telemetry import increment
+from adv_hedging.utils import content_hash
+
+DEFAULT_CACHE_PATH = DATA_DIR / "cache" / "embeddings.sqlite"
+
+# SQLite's default limit on the number of ? parameters in one statement is 999
+_LOOKUP_BATCH = 900
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key BLOB PRIMARY KEY,
+    dtype TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    nbytes INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used);
+
+-- Running byte total, kept up to date by triggers so the budget check is O(1)
+CREATE TABLE IF NOT EXISTS totals (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO totals VALUES ('nbytes', (SELECT COALESCE(SUM(nbytes), 0) FROM embeddings));
+CREATE TRIGGER IF NOT EXISTS embeddings_insert AFTER INSERT ON embeddings BEGIN
+    UPDATE totals SET value = value + NEW.nbytes WHERE name = 'nbytes';
+END;
+CREATE TRIGGER IF NOT EXISTS embeddings_update AFTER UPDATE OF nbytes ON embeddings BEGIN
+    UPDATE totals SET value = value + NEW.nbytes - OLD.nbytes WHERE name = 'nbytes';
+END;
+CREATE TRIGGER IF NOT EXISTS embeddings_delete AFTER DELETE ON embeddings BEGIN
+    UPDATE totals SET value = value - OLD.nbytes WHERE name = 'nbytes';
+END;
+"""
+
+# Upsert rather than INSERT OR REPLACE: a replace deletes without firing the delete trigger
+_UPSERT = """
+INSERT INTO embeddings VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET
+    dtype = excluded.dtype, vector = excluded.vector, nbytes = excluded.nbytes, last_used = excluded.last_used
+"""
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache with size-bounded least-recently-used eviction.
+
+    Usage:
+        cache = EmbeddingCache()
+        vectors = cache.encode(MODEL_NAME, chunks, lambda texts: model.encode(texts))
+
+    Args:
+        path: SQLite file (created with its directory on first use)
+        max_bytes: Budget for the stored vectors; the least recently used
+                   entries are evicted once it is exceeded
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes: int = 2 * 1024**3):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    @staticmethod
+    def key(model_name: str, text: str) -> bytes:
+        return bytes.fromhex(content_hash(model_name, text))
+
+    def get_many(self, model_name: str, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Cached embedding of each text, None where it is missing."""
+        keys = [self.key(model_name, text) for text in texts]
+        found = {}
+        for i in range(0, len(keys), _LOOKUP_BATCH):
+            batch = list(set(keys[i : i + _LOOKUP_BATCH]))
+            rows = self._conn.execute(
+                f"SELECT key, dtype, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+            ).fetchall()
+            found.update({k: np.frombuffer(v, dtype=d) for k, d, v in rows})
+
+        if found:
+            now = time.time()
+            with self._conn:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?", [(now, k) for k in found]
+                )
+
+        vectors = [found.get(k) for k in keys]
+        num_found = sum(v is not None for v in vectors)
+        self.hits += num_found
+        self.misses += len(vectors) - num_found
+        increment('embedding_cache.hits', num_found)
+        increment('embedding_cache.misses', len(vectors) - num_found)
+        return vectors
+
+    def put_many(self, model_name: str, texts: Sequence[str], vectors) -> None:
+        now = time.time()
+        rows = []
+        for text, vector in zip(texts, vectors):
+            vector = np.ascontiguousarray(vector)
+            rows.append((self.key(model_name, text), vector.dtype.str, vector.tobytes(), vector.nbytes, now))
+
+        with self._conn:
+            self._conn.executemany(_UPSERT, rows)
+        self._evict()
+
+    def encode(
+        self,
+        model_name: str,
+        texts: Sequence[str],
+        encode_fn: Callable[[List[str]], np.ndarray],
+        batch_size: int = 4096
+    ) -> np.ndarray:
+        """
+        Embeddings (len(texts), dim) of `texts`, calling `encode_fn` only on
+        the distinct texts that are not cached yet.
+        """
+        vectors = self.get_many(model_name, texts)
+        missing = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+
+        computed = {}
+        for i in range(0, len(missing), batch_size):
+            batch = missing[i : i + batch_size]
+            encoded = np.asarray(encode_fn(batch))
+            self.put_many(model_name, batch, encoded)
+            computed.update(zip(batch, encoded))
+
+        return np.stack([v if v is not None else computed[t] for t, v in zip(texts, vectors)])
+
+    @property
+    def nbytes(self) -> int:
+        return self._conn.execute("SELECT value FROM totals WHERE name = 'nbytes'").fetchone()[0]
+
+    def _evict(self) -> None:
+        # The running total makes this check free; entries are only scanned when over budget
+        excess = self.nbytes - self.max_bytes
+        if excess <= 0:
+            return
+
+        # Oldest entries first, until the store is back under budget
+        stale = []
+        for key, nbytes in self._conn.execute("SELECT key, nbytes FROM embeddings ORDER BY last_used, rowid"):
+            stale.append((key,))
+            excess -= nbytes
+            if excess <= 0:
+                break
+
+        with self._conn:
+            self._conn.executemany("DELETE FROM embeddings WHERE key = ?", stale)
+
+    def clear(self) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM embeddings")
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,161 @@
+"""
+src/adv_hedging/nlp/clustering.py
+UMAP + HDBSCAN hyperparameter sweep over company embeddings.
+
+The expensive part of UMAP is the k-nearest-neighbour graph, and it depends
+only on the embeddings: it is built once (cosine, exact) at the largest
+n_neighbors of the grid and sliced for every other setting. Reductions run in
+a process pool and can be cached on disk (see utils.ArtifactCache), so
+re-running or widening the grid only computes the new settings.
+"""
+import itertools
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import adjusted_mutual_info_score, adjusted_rand_score
+
+from adv_hedging.nlp.index import EmbeddingIndex
+
+# Arrays shared with the worker processes through memory-mapped .npy files
+_SHARED_ARRAYS = ('embeddings', 'indices', 'distances')
+
+def knn_graph(embeddings, n_neighbors: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cosine kNN graph in UMAP's `precomputed_knn` layout: (indices, distances),
+    both (N, n_neighbors), with every point its own first neighbour at distance 0.
+    Slicing the first n columns gives the graph for n_neighbors=n.
+    """
+    index = EmbeddingIndex(embeddings)
+    num = len(index)
+    k = min(n_neighbors, num) - 1
+    scores, positions = index.search(index.vectors, k=k, exclude=np.arange(num))
+
+    indices = np.hstack([np.arange(num)[:, None], positions])
+    distances = np.hstack([np.zeros((num, 1)), np.clip(1.0 - scores, 0.0, None)]).astype(np.float32)
+    return indices, distances
+
+def score_clustering(labels_true, labels, min_points: int = 5) -> dict:
+    """ARI / AMI against the expert labels, ignoring HDBSCAN noise (-1)."""
+    labels_true, labels = np.asarray(labels_true), np.asarray(labels)
+    mask = labels != -1
+    scores = {
+        'Clusters': len(np.unique(labels[mask])),
+        'Noise_Share': 1.0 - mask.mean() if len(labels) else np.nan,
+        'ARI': np.nan,
+        'AMI': np.nan,
+    }
+    if mask.sum() > min_points:  # Need enough points to score
+        scores['ARI'] = adjusted_rand_score(labels_true[mask], labels[mask])
+        scores['AMI'] = adjusted_mutual_info_score(labels_true[mask], labels[mask])
+    return scores
+
+def _reduce(embeddings, knn_indices, knn_dists, n_neighbors, min_dist, n_components, random_state):
+    import umap
+
+    reducer = umap.UMAP(
+        n_neighbors=n_neighbors,
+        min_dist=min_dist,
+        n_components=n_components,
+        metric='cosine',
+        random_state=random_state,
+        precomputed_knn=(knn_indices[:, :n_neighbors], knn_dists[:, :n_neighbors], None)
+    )
+    return reducer.fit_transform(embeddings)
+
+def _reduce_worker(tmp_dir, n_neighbors, min_dist, n_components, random_state):
+    """Worker entry point: inputs are memory-mapped from the .npy files written by the parent."""
+    embeddings, knn_indices, knn_dists = (
+        np.load(os.path.join(tmp_dir, f"{name}.npy"), mmap_mode='r') for name in _SHARED_ARRAYS
+    )
+    start = time.perf_counter()
+    reduced = _reduce(embeddings, knn_indices, knn_dists, n_neighbors, min_dist, n_components, random_state)
+    return reduced, time.perf_counter() - start
+
+def sweep_clustering(
+    embeddings,
+    labels_true,
+    n_neighbors_list: Sequence[int] = (5, 10, 15),
+    min_dist_list: Sequence[float] = (0.0, 0.1),
+    min_cluster_sizes: Sequence[int] = (3,),
+    n_components: int = 2,
+    random_state: int = 42,
+    n_jobs: int = 1,
+    cache=None
+) -> pd.DataFrame:
+    """
+    Scores every (n_neighbors, min_dist, min_cluster_size) combination.
+
+    Args:
+        embeddings: (N, D) company vectors
+        labels_true: (N,) expert labels (e.g. constants.AI_CATEGORIES)
+        n_jobs: Worker processes for the UMAP reductions (-1 = all cores)
+        cache: Optional utils.ArtifactCache holding the 2-D reductions
+
+    Returns:
+        One row per combination, best ARI first, with columns n_neighbors,
+        min_dist, min_cluster_size, Clusters, Noise_Share, ARI, AMI, Seconds
+        (UMAP time, 0 for cached reductions).
+    """
+    import hdbscan
+
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+
+    grid = list(itertools.product(n_neighbors_list, min_dist_list))
+    keys = {
+        params: cache.key('umap', embeddings, n_neighbors=params[0], min_dist=params[1],
+                          n_components=n_components, random_state=random_state)
+        for params in grid
+    } if cache is not None else {}
+
+    reductions, seconds = {}, {}
+    for params in grid:
+        cached = cache.get(keys[params]) if cache is not None else None
+        if cached is not None:
+            reductions[params], seconds[params] = np.asarray(cached), 0.0
+
+    todo = [params for params in grid if params not in reductions]
+    if todo:
+        # One neighbour graph for the whole grid
+        knn_indices, knn_dists = knn_graph(embeddings, max(n for n, _ in todo))
+
+        if n_jobs > 1 and len(todo) > 1:
+            with tempfile.TemporaryDirectory(prefix="clustering_") as tmp_dir:
+                for name, array in zip(_SHARED_ARRAYS, (embeddings, knn_indices, knn_dists)):
+                    np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+
+                with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                    futures = {
+                        params: executor.submit(_reduce_worker, tmp_dir, *params, n_components, random_state)
+                        for params in todo
+                    }
+                    for params, future in futures.items():
+                        reductions[params], seconds[params] = future.result()
+        else:
+            for params in todo:
+                start = time.perf_counter()
+                reductions[params] = _reduce(embeddings, knn_indices, knn_dists, *params, n_components, random_state)
+                seconds[params] = time.perf_counter() - start
+
+        if cache is not None:
+            for params in todo:
+                cache.put(keys[params], reductions[params])
+
+    rows = []
+    for (n_neighbors, min_dist), min_cluster_size in itertools.product(grid, min_cluster_sizes):
+        labels = hdbscan.HDBSCAN(min_cluster_size=min_cluster_size).fit_predict(reductions[(n_neighbors, min_dist)])
+        rows.append({
+            'n_neighbors': n_neighbors,
+            'min_dist': min_dist,
+            'min_cluster_size': min_cluster_size,
+            **score_clustering(labels_true, labels),
+            'Seconds': seconds[(n_neighbors, min_dist)],
+        })
+
+    return pd.DataFrame(rows).sort_values('ARI', ascending=False, na_position='last').reset_index(drop=True)
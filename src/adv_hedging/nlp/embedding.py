@@ -0,0 +1,183 @@
+"""
+src/adv_hedging/nlp/embedding.py
+Batched CPU embedding of the chunked corpus with sentence-transformers.
+
+Chunks are sorted into length buckets before batching, so each batch is
+padded only to the length of similar chunks instead of the longest one in the
+corpus. Output is streamed to an EmbeddingStore (see nlp/store.py), from which
+`EmbeddingStore.to_index()` builds the peer-search index.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from adv_hedging.nlp.store import EmbeddingStore, EmbeddingStoreWriter
+from adv_hedging.nlp.text_processing import iter_corpus_chunks
+from adv_hedging.telemetry import increment, span
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = 'nomic-ai/nomic-embed-text-v1.5'
+DEFAULT_PREFIX = "clustering: "  # Nomic task prefix for grouping (see notebook 02)
+
+def load_model(model_name: str = DEFAULT_MODEL, device: str = 'cpu'):
+    """SentenceTransformer model; imported lazily so the package works without it."""
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(model_name, device=device, trust_remote_code=True)
+
+def length_buckets(texts: Sequence[str], batch_size: int) -> List[np.ndarray]:
+    """
+    Positions of `texts` grouped into batches of similar length (longest
+    first, so memory peaks on the first batch rather than the last).
+    """
+    lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+    order = np.argsort(-lengths, kind='stable')
+    return [order[i : i + batch_size] for i in range(0, len(order), batch_size)]
+
+def quantize_embeddings(vectors, dtype=np.int8) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Compresses float embeddings for storage.
+
+    Returns:
+        (quantized, scales): int8 rows with one float32 scale per row
+        (vector ~= row * scale), or float16/float32 rows and scales=None.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    dtype = np.dtype(dtype)
+    if dtype != np.int8:
+        return vectors.astype(dtype), None
+
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.round(vectors / scales[:, None]).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+def dequantize_embeddings(quantized, scales=None) -> np.ndarray:
+    vectors = np.asarray(quantized, dtype=np.float32)
+    if scales is not None:
+        vectors = vectors * np.asarray(scales, dtype=np.float32)[:, None]
+    return vectors
+
+class EmbeddingPipeline:
+    """
+    Embeds chunks with a sentence-transformers model.
+
+    Args:
+        model: Loaded model (anything with `encode` and
+               `get_sentence_embedding_dimension`); loaded from `model_name` if None
+        model_name: Hugging Face model id, also the key of the embedding cache
+        prefix: Task prefix prepended to every chunk
+        batch_size: Chunks per forward pass
+        num_workers: Threads encoding batches concurrently (PyTorch releases the GIL)
+        quantize: None (float32), np.float16 or np.int8 storage in `embed_corpus`
+        cache: Optional EmbeddingCache (see nlp/cache.py), so unchanged chunks
+               are not re-encoded
+    """
+
+    def __init__(
+        self,
+        model=None,
+        model_name: str = DEFAULT_MODEL,
+        prefix: str = DEFAULT_PREFIX,
+        batch_size: int = 32,
+        num_workers: int = 1,
+        quantize=None,
+        cache=None,
+        device: str = 'cpu'
+    ):
+        self.model = model if model is not None else load_model(model_name, device)
+        self.model_name = model_name
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.num_workers = num_workers
+        self.quantize = np.dtype(quantize) if quantize is not None else None
+        self.cache = cache
+        self.stats = {'chunks': 0, 'encoded': 0, 'seconds': 0.0}
+
+    @property
+    def dim(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    @property
+    def chunks_per_sec(self) -> float:
+        return self.stats['chunks'] / self.stats['seconds'] if self.stats['seconds'] > 0 else 0.0
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(texts, batch_size=len(texts), convert_to_numpy=True, show_progress_bar=False)
+
+    def _encode_uncached(self, texts: List[str]) -> np.ndarray:
+        """Length-bucketed encoding, batches spread over the worker threads."""
+        buckets = length_buckets(texts, self.batch_size)
+        batches = [[texts[i] for i in idx] for idx in buckets]
+
+        if self.num_workers > 1:
+            with ThreadPoolExecutor(max_workers=self.num_workers) as pool:
+                results = list(pool.map(self._encode_batch, batches))
+        else:
+            results = [self._encode_batch(batch) for batch in batches]
+
+        embeddings = np.empty((len(texts), self.dim), dtype=np.float32)
+        for idx, vectors in zip(buckets, results):
+            embeddings[idx] = vectors
+        self.stats['encoded'] += len(texts)
+        return embeddings
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Float32 embeddings (len(texts), dim), in the order of `texts`."""
+        start = time.perf_counter()
+        texts = [f"{self.prefix}{t}" for t in texts]
+
+        with span('embedding.encode', logger):
+            if self.cache is not None:
+                embeddings = self.cache.encode(self.model_name, texts, self._encode_uncached)
+            else:
+                embeddings = self._encode_uncached(texts)
+
+        increment('embedding.chunks', len(texts))
+        self.stats['chunks'] += len(texts)
+        self.stats['seconds'] += time.perf_counter() - start
+        return np.asarray(embeddings, dtype=np.float32)
+
+    def embed_corpus(
+        self,
+        data,
+        path,
+        chunk_size: int = 500,
+        overlap: int = 50,
+        tokenizer=None,
+        corpus_batch: int = 4096
+    ) -> EmbeddingStore:
+        """
+        Chunks, embeds and writes a corpus to an EmbeddingStore at `path`,
+        `corpus_batch` chunks at a time.
+
+        Args:
+            data: DataFrame or iterable of DataFrames / Arrow record batches
+                  (see text_processing.iter_corpus_chunks)
+            tokenizer: Optional fast tokenizer; chunk_size is then in tokens,
+                       prefix included
+        """
+        if tokenizer is not None and self.prefix:
+            chunk_size -= len(tokenizer([self.prefix], add_special_tokens=False)['input_ids'][0])
+
+        store_dtype = self.quantize if self.quantize is not None else np.float32
+        with EmbeddingStoreWriter(path, dim=self.dim, dtype=store_dtype) as writer:
+            for batch in iter_corpus_chunks(data, chunk_size, overlap, batch_size=corpus_batch, tokenizer=tokenizer):
+                tickers = np.array([ticker for ticker, _, _ in batch], dtype=object)
+                vectors, scales = quantize_embeddings(self.encode([text for _, _, text in batch]), store_dtype)
+
+                # Runs of consecutive chunks of the same company
+                bounds = np.concatenate([[0], np.flatnonzero(tickers[1:] != tickers[:-1]) + 1, [len(batch)]])
+                for start, stop in zip(bounds[:-1], bounds[1:]):
+                    writer.append(
+                        tickers[start], vectors[start:stop],
+                        scales=scales[start:stop] if scales is not None else None
+                    )
+
+                logger.info("Embedded %d chunks (%.1f chunks/sec)", self.stats['chunks'], self.chunks_per_sec)
+
+        return EmbeddingStore(path)
@@ -0,0 +1,254 @@
+"""
+src/adv_hedging/nlp/index.py
+Cosine-similarity search over company embeddings.
+
+Two indexes share one interface (`search`, `save`, `load`):
+    EmbeddingIndex: exact, blocked matrix-multiply top-k
+    IVFIndex: approximate inverted-file index (k-means lists, pure NumPy)
+
+Vectors are L2-normalized on the way in, so inner product = cosine
+similarity, and stored as float32 or float16 (half the memory; scores are
+always computed in float32).
+"""
+from pathlib import Path
+
+import numpy as np
+
+def normalize_embeddings(vectors, dtype=np.float32) -> np.ndarray:
+    """Row-wise L2 normalization (zero rows stay zero), cast to `dtype`."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return (vectors / np.where(norms > 0, norms, 1.0)).astype(dtype)
+
+def _merge_topk(best_scores, best_idx, scores, idx, k):
+    """Keeps the k best of the running top-k and a new block of candidates."""
+    scores = np.concatenate([best_scores, scores], axis=1)
+    idx = np.concatenate([best_idx, idx], axis=1)
+    if scores.shape[1] > k:
+        keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        scores = np.take_along_axis(scores, keep, axis=1)
+        idx = np.take_along_axis(idx, keep, axis=1)
+    return scores, idx
+
+def _sort_topk(scores, idx):
+    order = np.argsort(-scores, axis=1, kind='stable')
+    return np.take_along_axis(scores, order, axis=1), np.take_along_axis(idx, order, axis=1)
+
+class EmbeddingIndex:
+    """
+    Exact top-k cosine search.
+
+    Queries are scored against the database `block_size` rows at a time and
+    merged into a running top-k, so memory stays O(queries x block_size)
+    whatever the universe size.
+
+    Args:
+        embeddings: (N, D) vectors (normalized here)
+        ids: Optional labels for the rows (e.g. tickers)
+        dtype: Storage dtype, np.float32 or np.float16
+        block_size: Database rows scored per matrix product
+    """
+
+    kind = 'exact'
+
+    def __init__(self, embeddings, ids=None, dtype=np.float32, block_size: int = 4096):
+        self.vectors = normalize_embeddings(embeddings, dtype=dtype)
+        self.ids = np.arange(len(self.vectors)) if ids is None else np.asarray(ids)
+        if self.ids.dtype == object:
+            self.ids = self.ids.astype(str)  # Saved without pickle
+        self.block_size = block_size
+        self._positions = {label: i for i, label in enumerate(self.ids)}
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def positions(self, labels) -> np.ndarray:
+        """Row positions of `labels` (KeyError for unknown labels)."""
+        return np.array([self._positions[label] for label in labels], dtype=int)
+
+    def _prepare(self, queries, k, exclude):
+        queries = normalize_embeddings(np.atleast_2d(queries))
+        k = min(k, len(self))
+        exclude = np.full(len(queries), -1) if exclude is None else np.asarray(exclude)
+        return queries, k, exclude
+
+    def search(self, queries, k: int = 10, exclude=None, allowed=None):
+        """
+        Top-k most similar rows for each query.
+
+        Args:
+            queries: (Q, D) query vectors
+            k: Number of neighbours
+            exclude: Optional (Q,) row position to skip per query (e.g. the
+                     query's own row), -1 for none
+            allowed: Optional (N,) boolean mask of rows that may be returned
+
+        Returns:
+            (scores, positions), both (Q, k), best first. Slots that cannot be
+            filled (too few allowed rows) have score -inf and position -1.
+        """
+        queries, k, exclude = self._prepare(queries, k, exclude)
+        num_queries = len(queries)
+        best_scores = np.full((num_queries, 0), -np.inf, dtype=np.float32)
+        best_idx = np.full((num_queries, 0), -1)
+
+        for start in range(0, len(self), self.block_size):
+            block = self.vectors[start : start + self.block_size].astype(np.float32, copy=False)
+            scores = queries @ block.T
+            cols = np.arange(start, start + len(block))
+
+            # Self-matches and disallowed rows can never win
+            own = (exclude >= start) & (exclude < start + len(block))
+            scores[np.flatnonzero(own), exclude[own] - start] = -np.inf
+            if allowed is not None:
+                scores[:, ~allowed[start : start + len(block)]] = -np.inf
+
+            block_k = min(k, len(block))
+            top = np.argpartition(-scores, block_k - 1, axis=1)[:, :block_k]
+            best_scores, best_idx = _merge_topk(
+                best_scores, best_idx, np.take_along_axis(scores, top, axis=1), cols[top], k
+            )
+
+        best_idx = np.where(np.isfinite(best_scores), best_idx, -1)
+        return _sort_topk(best_scores, best_idx)
+
+    def search_ids(self, labels, k: int = 10, allowed=None):
+        """Neighbours of rows already in the index, by label, excluding themselves."""
+        pos = self.positions(labels)
+        return self.search(self.vectors[pos].astype(np.float32), k=k, exclude=pos, allowed=allowed)
+
+    def _arrays(self) -> dict:
+        return {'vectors': self.vectors, 'ids': self.ids}
+
+    def save(self, path) -> None:
+        """Writes the index to a single .npz file."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(path, kind=np.array(self.kind), block_size=np.array(self.block_size), **self._arrays())
+
+    @classmethod
+    def _from_arrays(cls, data):
+        index = cls.__new__(cls)
+        index.vectors = data['vectors']
+        index.ids = data['ids']
+        index.block_size = int(data['block_size'])
+        index._positions = {label: i for i, label in enumerate(index.ids)}
+        return index
+
+    @staticmethod
+    def load(path) -> "EmbeddingIndex":
+        """Loads an index written by `save` (exact or IVF)."""
+        with np.load(path, allow_pickle=False) as data:
+            data = dict(data)
+        cls = {'exact': EmbeddingIndex, 'ivf': IVFIndex}[str(data['kind'])]
+        return cls._from_arrays(data)
+
+class IVFIndex(EmbeddingIndex):
+    """
+    Approximate top-k cosine search with an inverted file.
+
+    The database is clustered with spherical k-means into `num_lists` lists;
+    a query is only scored against the members of its `nprobe` closest
+    lists. Recall grows with `nprobe` (nprobe = num_lists is exact).
+
+    Args:
+        embeddings: (N, D) vectors (normalized here)
+        ids: Optional labels for the rows
+        num_lists: Number of k-means lists (defaults to ~sqrt(N))
+        nprobe: Lists scanned per query
+        dtype: Storage dtype, np.float32 or np.float16
+        num_iter: k-means iterations
+        seed: k-means initialization seed
+    """
+
+    kind = 'ivf'
+
+    def __init__(
+        self,
+        embeddings,
+        ids=None,
+        num_lists: int = None,
+        nprobe: int = 8,
+        dtype=np.float32,
+        num_iter: int = 20,
+        seed: int = 0
+    ):
+        super().__init__(embeddings, ids=ids, dtype=dtype)
+        self.num_lists = num_lists or max(1, int(np.sqrt(len(self))))
+        self.nprobe = nprobe
+
+        self.centroids, assignments = self._train(num_iter, seed)
+
+        # Rows grouped by list: members of list l are order[offsets[l]:offsets[l + 1]]
+        self.order = np.argsort(assignments, kind='stable')
+        self.offsets = np.searchsorted(assignments[self.order], np.arange(self.num_lists + 1))
+
+    def _train(self, num_iter, seed):
+        """Spherical k-means (cosine), returns (centroids, assignments)."""
+        X = self.vectors.astype(np.float32)
+        rng = np.random.default_rng(seed)
+        centroids = X[rng.choice(len(X), size=self.num_lists, replace=False)]
+
+        for _ in range(num_iter):
+            assignments = np.argmax(X @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, X)
+
+            # Empty lists are re-seeded with random rows
+            empty = ~np.bincount(assignments, minlength=self.num_lists).astype(bool)
+            sums[empty] = X[rng.choice(len(X), size=empty.sum())]
+            centroids = normalize_embeddings(sums)
+
+        return centroids, np.argmax(X @ centroids.T, axis=1)
+
+    def search(self, queries, k: int = 10, exclude=None, allowed=None, nprobe: int = None):
+        """Same as `EmbeddingIndex.search`, scanning only the `nprobe` closest lists."""
+        queries, k, exclude = self._prepare(queries, k, exclude)
+        nprobe = min(nprobe or self.nprobe, self.num_lists)
+
+        probe = np.argpartition(-(queries @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+
+        # Loop over lists rather than queries: every query probing a list is
+        # scored against its members in one matrix product
+        scores_out = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        idx_out = np.full((len(queries), k), -1)
+        probe_queries = np.repeat(np.arange(len(queries)), nprobe)
+        probe_lists = probe.ravel()
+        by_list = np.argsort(probe_lists, kind='stable')
+        list_bounds = np.searchsorted(probe_lists[by_list], np.arange(self.num_lists + 1))
+
+        for l in range(self.num_lists):
+            members = self.order[self.offsets[l] : self.offsets[l + 1]]
+            qs = probe_queries[by_list[list_bounds[l] : list_bounds[l + 1]]]
+            if len(members) == 0 or len(qs) == 0:
+                continue
+
+            scores = queries[qs] @ self.vectors[members].astype(np.float32, copy=False).T
+            scores[members[None, :] == exclude[qs][:, None]] = -np.inf
+            if allowed is not None:
+                scores[:, ~allowed[members]] = -np.inf
+
+            top_k = min(k, len(members))
+            top = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+            scores_out[qs], idx_out[qs] = _merge_topk(
+                scores_out[qs], idx_out[qs], np.take_along_axis(scores, top, axis=1), members[top], k
+            )
+
+        idx_out = np.where(np.isfinite(scores_out), idx_out, -1)
+        return _sort_topk(scores_out, idx_out)
+
+    def _arrays(self) -> dict:
+        return {
+            **super()._arrays(), 'centroids': self.centroids, 'order': self.order,
+            'offsets': self.offsets, 'nprobe': np.array(self.nprobe),
+        }
+
+    @classmethod
+    def _from_arrays(cls, data):
+        index = super()._from_arrays(data)
+        index.centroids = data['centroids']
+        index.order = data['order']
+        index.offsets = data['offsets']
+        index.nprobe = int(data['nprobe'])
+        index.num_lists = len(index.centroids)
+        return index
@@ -0,0 +1,249 @@
+"""
+src/adv_hedging/nlp/store.py
+On-disk store of chunk embeddings, grouped by company.
+
+Layout of a store directory:
+    embeddings.npy  (num_chunks, dim) float32/float16/int8 matrix, memory-mapped on read
+    offsets.npy     (num_companies + 1,) int64; company i owns rows offsets[i]:offsets[i+1]
+    tickers.npy     (num_companies,) company tickers
+    scales.npy      (num_chunks,) float32 per-row scales, int8 stores only
+
+Chunks of one company are contiguous, so pooling to company vectors is a
+segmented reduction over row ranges and never copies the whole matrix.
+"""
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from adv_hedging.nlp.index import EmbeddingIndex, IVFIndex
+
+EMBEDDINGS_FILE = "embeddings.npy"
+OFFSETS_FILE = "offsets.npy"
+TICKERS_FILE = "tickers.npy"
+SCALES_FILE = "scales.npy"
+
+# Bytes reserved for the .npy header, so it can be rewritten once the final row count is known
+_HEADER_SIZE = 128
+
+def _npy_header(shape, dtype) -> bytes:
+    """Version 1.0 .npy header padded to exactly _HEADER_SIZE bytes."""
+    header = repr({'descr': np.dtype(dtype).str, 'fortran_order': False, 'shape': tuple(shape)})
+    header = header.ljust(_HEADER_SIZE - 10 - 1) + "\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1")
+
+class EmbeddingStoreWriter:
+    """
+    Streams chunk embeddings to a store, company by company.
+
+    Usage:
+        with EmbeddingStoreWriter(path, dim=768) as writer:
+            for ticker, vectors in ...:
+                writer.append(ticker, vectors)
+
+    Rows of one company may arrive over several `append` calls, as long as
+    companies are not interleaved. Nothing is visible under `path` until the
+    writer closes successfully.
+
+    With dtype=np.int8 every row needs a scale (see nlp.embedding.quantize_embeddings);
+    the stored vector is then int8_row * scale.
+    """
+
+    def __init__(self, path, dim: int, dtype=np.float32):
+        self.path = Path(path)
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self._tmp_path = self.path / (EMBEDDINGS_FILE + ".tmp")
+        self._file = open(self._tmp_path, "wb")
+        self._file.write(_npy_header((0, dim), self.dtype))
+        self._num_rows = 0
+        self._tickers = []
+        self._offsets = [0]
+        self._scales = [] if self.dtype == np.int8 else None
+
+    def append(self, ticker: str, vectors, scales=None) -> None:
+        vectors = np.ascontiguousarray(np.atleast_2d(vectors), dtype=self.dtype)
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dimensional embeddings, got {vectors.shape[1]}")
+        if self._scales is not None:
+            if scales is None or len(scales) != len(vectors):
+                raise ValueError("int8 stores need one scale per appended row")
+            self._scales.append(np.asarray(scales, dtype=np.float32))
+
+        if not self._tickers or self._tickers[-1] != ticker:
+            if ticker in self._tickers:
+                raise ValueError(f"Chunks of {ticker} must be appended contiguously")
+            self._tickers.append(ticker)
+            self._offsets.append(self._num_rows)
+
+        self._file.write(vectors.tobytes())
+        self._num_rows += len(vectors)
+        self._offsets[-1] = self._num_rows
+
+    def _save_tmp(self, name: str, array: np.ndarray) -> Path:
+        tmp_path = self.path / (name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, array)
+        return tmp_path
+
+    def close(self) -> None:
+        # Final shape goes into the reserved header
+        self._file.seek(0)
+        self._file.write(_npy_header((self._num_rows, self.dim), self.dtype))
+        self._file.close()
+
+        # Every file is written next to its final path first, then all are moved into place
+        staged = {
+            OFFSETS_FILE: self._save_tmp(OFFSETS_FILE, np.asarray(self._offsets, dtype=np.int64)),
+            TICKERS_FILE: self._save_tmp(TICKERS_FILE, np.asarray(self._tickers, dtype=str)),
+        }
+        if self._scales is not None:
+            scales = np.concatenate(self._scales or [np.zeros(0, dtype=np.float32)])
+            staged[SCALES_FILE] = self._save_tmp(SCALES_FILE, scales)
+        staged[EMBEDDINGS_FILE] = self._tmp_path
+
+        # Scales of an older int8 store would otherwise be applied to float rows
+        if self._scales is None:
+            (self.path / SCALES_FILE).unlink(missing_ok=True)
+        for name, tmp_path in staged.items():
+            os.replace(tmp_path, self.path / name)
+
+    def abort(self) -> None:
+        self._file.close()
+        for name in (EMBEDDINGS_FILE, OFFSETS_FILE, TICKERS_FILE, SCALES_FILE):
+            (self.path / (name + ".tmp")).unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+def write_embedding_store(path, embeddings, tickers, offsets, dtype=np.float32) -> None:
+    """
+    Writes an in-memory chunk matrix to a store.
+
+    Args:
+        embeddings: (num_chunks, dim) chunk embeddings, grouped by company
+        tickers: (num_companies,) ticker of each group
+        offsets: (num_companies + 1,) group boundaries, as returned by
+                 `prepare_corpus_with_index`
+    """
+    embeddings = np.asarray(embeddings)
+    with EmbeddingStoreWriter(path, dim=embeddings.shape[1], dtype=dtype) as writer:
+        # Companies without chunks are kept, so the store lines up with `tickers`
+        for ticker, start, stop in zip(tickers, offsets[:-1], offsets[1:]):
+            writer.append(ticker, embeddings[start:stop])
+
+class EmbeddingStore:
+    """
+    Read side of a store: the chunk matrix is memory-mapped (zero-copy) and
+    pooled to one vector per company on demand.
+
+    Args:
+        path: Store directory
+        block_rows: Approximate number of chunk rows pooled per block, which
+                    bounds the memory used by `pool`
+    """
+
+    def __init__(self, path, block_rows: int = 65536):
+        self.path = Path(path)
+        self.embeddings = np.load(self.path / EMBEDDINGS_FILE, mmap_mode='r')
+        self.offsets = np.load(self.path / OFFSETS_FILE)
+        self.tickers = pd.Index(np.load(self.path / TICKERS_FILE))
+        self.block_rows = block_rows
+
+        scales_path = self.path / SCALES_FILE
+        self.scales = np.load(scales_path) if scales_path.exists() else None
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    @property
+    def dim(self) -> int:
+        return self.embeddings.shape[1]
+
+    @property
+    def num_chunks(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def _rows(self, start: int, stop: int) -> np.ndarray:
+        """Rows start:stop as float32, dequantized for int8 stores."""
+        block = np.asarray(self.embeddings[start:stop], dtype=np.float32)
+        if self.scales is not None:
+            block *= self.scales[start:stop, None]
+        return block
+
+    def chunks(self, ticker: str) -> np.ndarray:
+        """
+        Chunk embeddings of one company: a read-only view into the memmap, or
+        a dequantized float32 copy for int8 stores.
+        """
+        i = self.tickers.get_loc(ticker)
+        if self.scales is not None:
+            return self._rows(self.offsets[i], self.offsets[i + 1])
+        return self.embeddings[self.offsets[i] : self.offsets[i + 1]]
+
+    def pool(self, method: str = 'mean', normalize: bool = True) -> np.ndarray:
+        """
+        One vector per company (num_companies, dim), float32.
+
+        Args:
+            method: 'mean' or 'max' over the company's chunks
+            normalize: L2-normalize the pooled vectors
+        """
+        if method not in ('mean', 'max'):
+            raise ValueError(f"Unknown pooling '{method}'. Use 'mean' or 'max'.")
+
+        pooled = np.zeros((len(self), self.dim), dtype=np.float32)
+        counts = self.num_chunks
+
+        # Companies are processed in blocks of about `block_rows` chunks
+        start = 0
+        while start < len(self):
+            stop = max(np.searchsorted(self.offsets, self.offsets[start] + self.block_rows, side='right') - 1, start + 1)
+            stop = min(stop, len(self))
+            block = self._rows(self.offsets[start], self.offsets[stop])
+
+            companies = np.arange(start, stop)
+            nonempty = companies[counts[companies] > 0]
+            if len(nonempty):
+                seg_starts = self.offsets[nonempty] - self.offsets[start]
+                if method == 'mean':
+                    pooled[nonempty] = np.add.reduceat(block, seg_starts, axis=0) / counts[nonempty, None]
+                else:
+                    pooled[nonempty] = np.maximum.reduceat(block, seg_starts, axis=0)
+            start = stop
+
+        if normalize:
+            norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+            pooled /= np.where(norms > 0, norms, 1.0)
+        pooled[counts == 0] = np.nan
+        return pooled
+
+    def to_frame(self, method: str = 'mean', normalize: bool = True) -> pd.DataFrame:
+        """Pooled company vectors as a DataFrame (Index=Tickers, Cols=Dims), companies without chunks dropped."""
+        pooled = pd.DataFrame(self.pool(method, normalize), index=self.tickers)
+        return pooled[self.num_chunks > 0]
+
+    def to_index(self, method: str = 'mean', index: str = 'exact', **kwargs) -> EmbeddingIndex:
+        """
+        Peer-search index over the pooled company vectors.
+
+        Args:
+            index: 'exact' (EmbeddingIndex) or 'ivf' (IVFIndex); `kwargs` go to
+                   the index constructor (dtype, nprobe, ...)
+        """
+        if index not in ('exact', 'ivf'):
+            raise ValueError(f"Unknown index '{index}'. Use 'exact' or 'ivf'.")
+
+        pooled = self.to_frame(method)
+        index_cls = IVFIndex if index == 'ivf' else EmbeddingIndex
+        return index_cls(pooled.to_numpy(), ids=pooled.index, **kwargs)
@@ -2,7 +2,20 @@
 src/adv_hedging/nlp/text_processing.py
 Text manipulation utilities, specifically for context-aware chunking.
 """
-from typing import List, Dict
+import itertools
+import logging
+import re
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\S+")
+
+# Columns read by the corpus chunkers (see create_metadata_header)
+_CHUNK_COLUMNS = ['ticker', 'title', 'URL', 'sector', 'content']
 
 def create_metadata_header(row: Dict) -> str:
     """
@@ -20,7 +33,8 @@ def chunk_text_with_metadata(
     text: str, 
     metadata_header: str, 
     chunk_size: int = 500, 
-    overlap: int = 100
+    overlap: int = 100,
+    tokenizer=None
 ) -> List[str]:
     """
     Splits text into chunks and prepends metadata to EACH chunk.
@@ -28,55 +42,235 @@ def chunk_text_with_metadata(
     Args:
         text: The full Wikipedia content.
         metadata_header: The string to put at the start of each chunk.
-        chunk_size: Number of words per chunk.
-        overlap: Number of words to overlap between chunks.
+        chunk_size: Number of words per chunk, or of tokens (header and special
+                    tokens included) when a tokenizer is given.
+        overlap: Number of words (or tokens) to overlap between chunks.
+        tokenizer: Optional fast tokenizer of the embedding model (see load_tokenizer).
     """
     if not text or not isinstance(text, str):
         return []
 
-    words = text.split()
-    chunks = []
-    
-    # Iterate through words with a sliding window
-    stride = chunk_size - overlap
-    if stride < 1:
-        stride = 1
-        
-    for i in range(0, len(words), stride):
-        # Slice the words
-        segment_words = words[i : i + chunk_size]
-        segment_text = " ".join(segment_words)
-        
-        # Combine Header + Content
-        # This solves the "Context Loss" problem described in the notebook
-        full_chunk = f"{metadata_header}{segment_text}"
-        chunks.append(full_chunk)
-        
+    spans, budget = _document_spans([text], [metadata_header], chunk_size, tokenizer)
+    windows = _fitted_windows(metadata_header, text, spans[0], budget[0], chunk_size, overlap, tokenizer)
+
+    # Combine Header + Content
+    # This solves the "Context Loss" problem described in the notebook
+    return [f"{metadata_header}{text[start:end]}" for start, end in windows]
+
+def load_tokenizer(model_name: str):
+    """
+    Fast (Rust) tokenizer of a Hugging Face model, for token-aware chunking.
+    Returns None, so chunking falls back to words, if transformers is missing.
+    """
+    try:
+        from transformers import AutoTokenizer
+    except ImportError:
+        logger.warning("transformers not installed, chunking by words.")
+        return None
+
+    return AutoTokenizer.from_pretrained(model_name, use_fast=True, trust_remote_code=True)
+
+def _document_spans(
+    contents: List[str],
+    headers: List[str],
+    chunk_size: int,
+    tokenizer=None
+) -> Tuple[List[List[Tuple[int, int]]], List[int]]:
+    """
+    Character spans of the units (words, or tokens) of each document, and the
+    number of units that fit in a chunk next to that document's header.
+
+    With a tokenizer, all documents and headers are tokenized in one batched
+    call; the header and the model's special tokens are subtracted from the
+    budget. The budget is a first cut: `_fitted_windows` checks the final
+    chunk strings against the model's limit.
+    """
+    if tokenizer is None or not getattr(tokenizer, 'is_fast', False):
+        spans = [[m.span() for m in _WORD.finditer(text)] for text in contents]
+        return spans, [chunk_size] * len(contents)
+
+    encoded = tokenizer(contents, add_special_tokens=False, return_offsets_mapping=True)
+    header_ids = tokenizer(headers, add_special_tokens=False)['input_ids']
+    reserved = tokenizer.num_special_tokens_to_add(pair=False)
+
+    # Empty offsets mark tokens that do not map to text
+    spans = [[(s, e) for s, e in offsets if e > s] for offsets in encoded['offset_mapping']]
+    budget = [max(chunk_size - len(ids) - reserved, 1) for ids in header_ids]
+    return spans, budget
+
+def _window_offsets(
+    spans: List[Tuple[int, int]],
+    chunk_size: int,
+    overlap: int,
+    overflow: Callable[[int, int], int] = None
+) -> Iterator[Tuple[int, int]]:
+    """
+    Character (start, end) of each sliding window of `chunk_size` units.
+
+    Windows are sliced straight out of the text instead of re-joining the
+    units, so the original whitespace between words is kept. `overflow`, if
+    given, returns how many units a window is over the limit; such windows
+    lose units at the end until it returns 0, and the next window starts
+    `overlap` units before the trimmed end, so no text is skipped.
+    """
+    # Iterate through units with a sliding window
+    i = 0
+    while i < len(spans):
+        last = min(i + chunk_size, len(spans)) - 1
+        if overflow is not None:
+            excess = overflow(spans[i][0], spans[last][1])
+            while excess > 0 and last > i:
+                last = max(last - excess, i)
+                excess = overflow(spans[i][0], spans[last][1])
+        yield spans[i][0], spans[last][1]
+
         # Break if we've reached the end
-        if i + chunk_size >= len(words):
+        if last == len(spans) - 1:
             break
-            
-    return chunks
+        i = max(last + 1 - overlap, i + 1)
 
-def prepare_corpus_for_embedding(df) -> List[str]:
+def _fitted_windows(
+    header: str,
+    content: str,
+    spans: List[Tuple[int, int]],
+    budget: int,
+    chunk_size: int,
+    overlap: int,
+    tokenizer=None
+) -> List[Tuple[int, int]]:
     """
-    Takes the main DataFrame and returns a flat list of ALL chunks 
-    ready for the embedding model.
+    Windows of one document whose chunk strings fit `chunk_size` tokens.
+
+    A window sliced out of the document can re-tokenize into more tokens than
+    it spanned in context (a word cut in the middle starts with a different
+    piece). All chunk strings are re-tokenized in one batched call, and only
+    if one is over the limit are the windows rebuilt, trimming as they go.
+    """
+    windows = list(_window_offsets(spans, budget, overlap))
+    if tokenizer is None or not getattr(tokenizer, 'is_fast', False) or not windows:
+        return windows
+
+    encoded = tokenizer([f"{header}{content[start:end]}" for start, end in windows])['input_ids']
+    if max(len(ids) for ids in encoded) <= chunk_size:
+        return windows
+
+    def overflow(start, end):
+        ids = tokenizer([f"{header}{content[start:end]}"])['input_ids'][0]
+        return len(ids) - chunk_size
+
+    return list(_window_offsets(spans, budget, overlap, overflow))
+
+def _iter_rows(data) -> Iterator[Dict]:
+    """
+    Rows of a DataFrame, or of an iterable of DataFrames / pyarrow
+    RecordBatches, as dicts holding only the columns used for chunking.
+    """
+    if isinstance(data, pd.DataFrame):
+        data = [data]
+
+    for batch in data:
+        if isinstance(batch, pd.DataFrame):
+            cols = [c for c in _CHUNK_COLUMNS if c in batch.columns]
+            rows = batch[cols].itertuples(index=False, name=None)
+        else:
+            cols = [c for c in _CHUNK_COLUMNS if c in batch.schema.names]
+            rows = zip(*(batch.column(c).to_pylist() for c in cols))
+
+        for values in rows:
+            yield dict(zip(cols, values))
+
+def _iter_company_windows(
+    data,
+    chunk_size: int,
+    overlap: int,
+    tokenizer=None,
+    tokenize_batch: int = 64
+) -> Iterator[Tuple[str, str, str, List[Tuple[int, int]]]]:
+    """
+    (ticker, header, content, windows) for every company, including those
+    without content. Documents are tokenized `tokenize_batch` at a time.
+    """
+    rows = _iter_rows(data)
+    while True:
+        docs = list(itertools.islice(rows, tokenize_batch))
+        if not docs:
+            break
+
+        headers = [create_metadata_header(row) for row in docs]
+        contents = [row.get('content', '') for row in docs]
+        contents = [text if isinstance(text, str) else '' for text in contents]
+        spans, budget = _document_spans(contents, headers, chunk_size, tokenizer)
+
+        for row, header, content, doc_spans, size in zip(docs, headers, contents, spans, budget):
+            yield row.get('ticker'), header, content, _fitted_windows(
+                header, content, doc_spans, size, chunk_size, overlap, tokenizer
+            )
+
+def iter_corpus_chunks(
+    data: Union[pd.DataFrame, Iterable],
+    chunk_size: int = 500,
+    overlap: int = 50,
+    batch_size: int = 256,
+    tokenizer=None
+) -> Iterator[List[Tuple[str, int, str]]]:
+    """
+    Streams the corpus as batches of (ticker, chunk_id, text), where chunk_id
+    numbers the chunks within each company.
+
+    Only one batch of chunk strings is alive at a time, so memory does not
+    grow with the corpus. Chunks of a company are consecutive across batches,
+    the order expected by nlp.store.EmbeddingStoreWriter.
+
+    Args:
+        data: DataFrame, or an iterable of DataFrames / pyarrow RecordBatches
+              (e.g. `pq.ParquetFile(path).iter_batches(columns=...)`).
+        chunk_size: Number of words per chunk, or of tokens when a tokenizer is given.
+        overlap: Number of words (or tokens) to overlap between chunks.
+        batch_size: Number of chunks per yielded batch.
+        tokenizer: Optional fast tokenizer of the embedding model (see load_tokenizer).
+    """
+    batch = []
+    for ticker, meta, content, windows in _iter_company_windows(data, chunk_size, overlap, tokenizer):
+        for chunk_id, (start, end) in enumerate(windows):
+            batch.append((ticker, chunk_id, f"{meta}{content[start:end]}"))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+
+    if batch:
+        yield batch
+
+def prepare_corpus_with_index(
+    df,
+    chunk_size: int = 500,
+    overlap: int = 50,
+    tokenizer=None
+) -> Tuple[List[str], List[str], np.ndarray]:
+    """
+    Chunks every company in the DataFrame and records which company each
+    chunk belongs to.
+
+    Returns:
+        (chunks, tickers, offsets): company i (tickers[i]) owns
+        chunks[offsets[i]:offsets[i + 1]], the layout of nlp/store.py.
     """
     all_chunks = []
-    
+    tickers = []
+    offsets = [0]
+
     # Iterate over every company in the dataframe
-    for _, row in df.iterrows():
-        meta = create_metadata_header(row)
-        content = row.get('content', '')
-        
-        # Generate chunks for this company
-        company_chunks = chunk_text_with_metadata(
-            content, 
-            meta, 
-            chunk_size=500, # Configurable, but 500 is a good default
-            overlap=50
-        )
-        all_chunks.extend(company_chunks)
-        
-    return all_chunks
\ No newline at end of file
+    for ticker, meta, content, windows in _iter_company_windows(df, chunk_size, overlap, tokenizer):
+        all_chunks.extend(f"{meta}{content[start:end]}" for start, end in windows)
+        tickers.append(ticker)
+        offsets.append(len(all_chunks))
+
+    return all_chunks, tickers, np.asarray(offsets, dtype=np.int64)
+
+def prepare_corpus_for_embedding(df, tokenizer=None) -> List[str]:
+    """
+    Takes the main DataFrame and returns a flat list of ALL chunks 
+    ready for the embedding model.
+    """
+    # 500 words is a good default, configurable via prepare_corpus_with_index
+    all_chunks, _, _ = prepare_corpus_with_index(df, chunk_size=500, overlap=50, tokenizer=tokenizer)
+    return all_chunks
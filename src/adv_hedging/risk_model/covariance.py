@@ -0,0 +1,270 @@
+"""
+src/adv_hedging/risk_model/covariance.py
+Factor covariance and specific risk estimation from daily factor returns.
+
+Follows the usual Barra conventions: daily returns are treated as zero-mean,
+volatilities and correlations can use different EWMA half-lives, serial
+correlation is handled with a Newey-West (Bartlett) adjustment, and the
+correlation matrix can be shrunk towards the identity.
+"""
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from adv_hedging.risk_model.factor_engine import align_exposures
+
+def _decay(half_life: float) -> float:
+    """Per-day decay factor lambda such that lambda ** half_life = 0.5."""
+    return 0.5 ** (1.0 / half_life)
+
+def _newey_west(moments: np.ndarray) -> np.ndarray:
+    """
+    Combines lagged second moments [G_0, G_1, ..., G_L] into a Newey-West
+    covariance: G_0 + sum_l (1 - l / (L + 1)) * (G_l + G_l').
+    """
+    num_lags = len(moments) - 1
+    cov = moments[0].copy()
+    for lag in range(1, num_lags + 1):
+        cov += (1.0 - lag / (num_lags + 1)) * (moments[lag] + moments[lag].T)
+    return cov
+
+def _assemble_covariance(
+    vol_cov: np.ndarray,
+    corr_cov: np.ndarray,
+    shrinkage: float,
+    annualization: float
+) -> np.ndarray:
+    """
+    Builds the final covariance from the volatility-horizon and
+    correlation-horizon estimates, then shrinks and annualizes it.
+    """
+    vols = np.sqrt(np.clip(np.diag(vol_cov), 0.0, None))
+
+    corr_scale = np.sqrt(np.clip(np.diag(corr_cov), 1e-300, None))
+    corr = corr_cov / np.outer(corr_scale, corr_scale)
+
+    # Shrink correlations towards zero (identity target)
+    corr = (1.0 - shrinkage) * corr + shrinkage * np.eye(len(corr))
+
+    cov = corr * np.outer(vols, vols)
+
+    # Newey-West terms with exponential weights are not guaranteed PSD
+    eigvals, eigvecs = np.linalg.eigh((cov + cov.T) / 2)
+    cov = (eigvecs * np.clip(eigvals, 0.0, None)) @ eigvecs.T
+
+    return cov * annualization
+
+def _ewma_lagged_moments(X: np.ndarray, half_life: float, num_lags: int) -> np.ndarray:
+    """
+    EWMA-weighted lagged second moments G_l = sum_t w_t x_t x_{t-l}'
+    with weights normalized over the whole sample, shape (L+1, F, F).
+    """
+    lam = _decay(half_life)
+    num_days = len(X)
+    weights = (1 - lam) * lam ** np.arange(num_days - 1, -1, -1) / (1 - lam ** num_days)
+
+    moments = np.zeros((num_lags + 1, X.shape[1], X.shape[1]))
+    for lag in range(min(num_lags, num_days - 1) + 1):
+        moments[lag] = (weights[lag:, None] * X[lag:]).T @ X[: num_days - lag]
+    return moments
+
+def ewma_covariance(
+    factor_returns: pd.DataFrame,
+    half_life: float = 90,
+    corr_half_life: float = None,
+    newey_west_lags: int = 0,
+    shrinkage: float = 0.0,
+    annualization: float = 252
+) -> pd.DataFrame:
+    """
+    Exponentially weighted factor covariance matrix.
+
+    Args:
+        factor_returns: Output of `calculate_factor_returns` (Index=Date, Cols=Factors)
+        half_life: Half-life (in days) for factor volatilities
+        corr_half_life: Half-life for correlations (defaults to `half_life`)
+        newey_west_lags: Number of lags for the Newey-West serial correlation adjustment
+        shrinkage: Shrinkage intensity of the correlations towards zero, in [0, 1]
+        annualization: Scaling applied to the daily covariance (252 = annual)
+
+    Returns:
+        DataFrame (Factors x Factors), ready for `optimize_hedge_weights`.
+    """
+    corr_half_life = corr_half_life or half_life
+    X = factor_returns.dropna().to_numpy(dtype=float)
+
+    vol_moments = _ewma_lagged_moments(X, half_life, newey_west_lags)
+    corr_moments = (
+        vol_moments if corr_half_life == half_life
+        else _ewma_lagged_moments(X, corr_half_life, newey_west_lags)
+    )
+
+    cov = _assemble_covariance(
+        _newey_west(vol_moments), _newey_west(corr_moments), shrinkage, annualization
+    )
+    return pd.DataFrame(cov, index=factor_returns.columns, columns=factor_returns.columns)
+
+def calculate_specific_variances(
+    returns_df: pd.DataFrame,
+    exposures_df: pd.DataFrame,
+    factor_returns: pd.DataFrame,
+    half_life: float = 90,
+    min_obs: int = 20,
+    annualization: float = 252
+) -> pd.Series:
+    """
+    EWMA variance of each stock's residual (specific) return.
+
+    Residuals are R - X F, demeaned cross-sectionally each day to absorb the
+    regression intercept (which `calculate_factor_returns` does not return).
+
+    Args:
+        returns_df: DataFrame of asset returns (Index=Date, Cols=Tickers)
+        exposures_df: Static or time-varying exposures (see `align_exposures`)
+        factor_returns: Output of `calculate_factor_returns`
+        half_life: Half-life (in days) of the EWMA
+        min_obs: Minimum number of residuals needed for an estimate (else NaN)
+        annualization: Scaling applied to the daily variance (252 = annual)
+
+    Returns:
+        Series of specific variances (Index=Tickers), ready for `optimize_hedge_weights`.
+    """
+    dates = factor_returns.index.intersection(returns_df.index)
+    common_tickers, factors, snapshots, snap_idx = align_exposures(
+        exposures_df, returns_df.columns, dates
+    )
+    Y = returns_df.loc[dates, common_tickers].to_numpy(dtype=float)
+    F = factor_returns.loc[dates, factors].to_numpy(dtype=float)
+
+    # Factor-explained returns, one matrix product per exposures snapshot
+    fitted = np.full_like(Y, np.nan)
+    for snap in np.unique(snap_idx[snap_idx >= 0]):
+        days = snap_idx == snap
+        fitted[days] = F[days] @ snapshots[snap].T
+
+    resid = Y - fitted
+    resid -= np.nanmean(resid, axis=1, keepdims=True)
+    valid = ~np.isnan(resid)
+
+    lam = _decay(half_life)
+    weights = lam ** np.arange(len(dates) - 1, -1, -1)[:, None] * valid
+
+    variances = (weights * np.where(valid, resid ** 2, 0.0)).sum(axis=0) / weights.sum(axis=0)
+    variances[valid.sum(axis=0) < min_obs] = np.nan
+
+    return pd.Series(variances * annualization, index=common_tickers)
+
+class EWMACovarianceTracker:
+    """
+    Streaming version of `ewma_covariance`.
+
+    Keeps the EWMA lagged second moments as state, so each new day of factor
+    returns is absorbed in O((L+1) F^2) instead of re-estimating from the
+    whole history. After feeding the same history, `covariance()` matches
+    `ewma_covariance` exactly.
+    """
+
+    def __init__(
+        self,
+        factors,
+        half_life: float = 90,
+        corr_half_life: float = None,
+        newey_west_lags: int = 0,
+        shrinkage: float = 0.0,
+        annualization: float = 252
+    ):
+        self.factors = pd.Index(factors)
+        self.half_life = half_life
+        self.corr_half_life = corr_half_life or half_life
+        self.newey_west_lags = newey_west_lags
+        self.shrinkage = shrinkage
+        self.annualization = annualization
+
+        num_factors = len(self.factors)
+        shape = (newey_west_lags + 1, num_factors, num_factors)
+        self._vol_moments = np.zeros(shape)
+        self._corr_moments = np.zeros(shape)
+        self._recent = deque(maxlen=newey_west_lags + 1)  # x_t, x_{t-1}, ...
+        self.num_updates = 0
+        self.last_date = None
+
+    def update(self, factor_returns_row: pd.Series) -> None:
+        """Absorbs one day of factor returns (Index=Factors, name=Date)."""
+        x = factor_returns_row.reindex(self.factors).to_numpy(dtype=float)
+        if np.isnan(x).any():
+            return
+
+        self._recent.appendleft(x)
+        for moments, half_life in [(self._vol_moments, self.half_life), (self._corr_moments, self.corr_half_life)]:
+            lam = _decay(half_life)
+            moments *= lam
+            # Lags older than the available history contribute nothing
+            for lag, lagged in enumerate(self._recent):
+                moments[lag] += (1 - lam) * np.outer(x, lagged)
+
+        self.num_updates += 1
+        self.last_date = factor_returns_row.name
+
+    def update_many(self, factor_returns: pd.DataFrame) -> None:
+        """Absorbs several days of factor returns, in date order."""
+        for _, row in factor_returns.sort_index().iterrows():
+            self.update(row)
+
+    def covariance(self) -> pd.DataFrame:
+        """Current covariance matrix (Factors x Factors)."""
+        if self.num_updates == 0:
+            raise ValueError("No factor returns have been added to the tracker yet.")
+
+        # Bias-correct the zero-initialized EWMA sums
+        vol_norm = 1 - _decay(self.half_life) ** self.num_updates
+        corr_norm = 1 - _decay(self.corr_half_life) ** self.num_updates
+
+        cov = _assemble_covariance(
+            _newey_west(self._vol_moments / vol_norm),
+            _newey_west(self._corr_moments / corr_norm),
+            self.shrinkage,
+            self.annualization
+        )
+        return pd.DataFrame(cov, index=self.factors, columns=self.factors)
+
+class SpecificVarianceTracker:
+    """
+    Streaming version of `calculate_specific_variances`: O(N F) per day.
+    After feeding the same history, `variances()` matches the batch estimate.
+    """
+
+    def __init__(self, tickers, half_life: float = 90, min_obs: int = 20, annualization: float = 252):
+        self.tickers = pd.Index(tickers)
+        self.half_life = half_life
+        self.min_obs = min_obs
+        self.annualization = annualization
+
+        self._weighted_sq = np.zeros(len(self.tickers))
+        self._weights = np.zeros(len(self.tickers))
+        self._counts = np.zeros(len(self.tickers), dtype=int)
+
+    def update(self, returns_row: pd.Series, exposures_df: pd.DataFrame, factor_returns_row: pd.Series) -> None:
+        """
+        Absorbs one day: the stock returns, the exposures in force that day
+        (Index=Tickers, Cols=Factors) and that day's factor returns.
+        """
+        y = returns_row.reindex(self.tickers).to_numpy(dtype=float)
+        X = exposures_df.reindex(self.tickers).to_numpy(dtype=float)
+        f = factor_returns_row.reindex(exposures_df.columns).to_numpy(dtype=float)
+
+        resid = y - X @ f
+        resid -= np.nanmean(resid)
+        valid = ~np.isnan(resid)
+
+        lam = _decay(self.half_life)
+        self._weighted_sq = lam * self._weighted_sq + np.where(valid, resid ** 2, 0.0)
+        self._weights = lam * self._weights + valid
+        self._counts += valid
+
+    def variances(self) -> pd.Series:
+        """Current specific variances (Index=Tickers)."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variances = self._weighted_sq / self._weights
+        variances[self._counts < self.min_obs] = np.nan
+        return pd.Series(variances * self.annualization, index=self.tickers)
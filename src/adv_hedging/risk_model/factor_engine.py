@@ -2,70 +2,416 @@
 src/adv_hedging/risk_model/factor_engine.py
 Calculates factor returns using cross-sectional regression.
 """
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
-from sklearn.linear_model import HuberRegressor, LinearRegression
-from tqdm import tqdm
+from sklearn.linear_model import HuberRegressor
+from threadpoolctl import threadpool_limits
+
+from adv_hedging.telemetry import increment, progress_bar, span
+
+logger = logging.getLogger(__name__)
+
+def align_exposures(exposures_df: pd.DataFrame, tickers: pd.Index, dates: pd.Index):
+    """
+    Aligns static or time-varying factor exposures to the returns panel, once.
+
+    Accepted layouts:
+        - static: Index=Tickers, Cols=Factors (one snapshot for every date)
+        - panel: MultiIndex (date, ticker), Cols=Factors
+        - long format: 'date' and 'ticker' columns plus one column per factor
+
+    Panel exposures are forward-filled per ticker across refresh dates, and
+    each return date uses the latest snapshot dated on or before it.
+
+    Returns:
+        common_tickers: Index of tickers present in both inputs (returns order)
+        factors: Index of factor names
+        snapshots: (S, N, F) array of exposures
+        snap_idx: (T,) snapshot in force on each date (-1 = none yet)
+    """
+    if {'date', 'ticker'}.issubset(exposures_df.columns):
+        exposures_df = exposures_df.set_index(['date', 'ticker'])
+
+    if not isinstance(exposures_df.index, pd.MultiIndex):
+        common_tickers = tickers.intersection(exposures_df.index)
+        snapshots = exposures_df.loc[common_tickers].to_numpy(dtype=float)[None]
+        return common_tickers, exposures_df.columns, snapshots, np.zeros(len(dates), dtype=int)
+
+    panel = exposures_df.sort_index()
+    factors = panel.columns
+    common_tickers = tickers.intersection(panel.index.get_level_values(1).unique())
+
+    # (S, F x N) wide frame, forward-filled so stale tickers keep their last exposures
+    wide = panel.unstack(level=1)
+    wide = wide.reindex(columns=pd.MultiIndex.from_product([factors, common_tickers])).ffill()
+    snapshots = (
+        wide.to_numpy(dtype=float)
+        .reshape(len(wide), len(factors), len(common_tickers))
+        .transpose(0, 2, 1)
+    )
+    snap_idx = wide.index.searchsorted(dates, side='right') - 1
+    return common_tickers, factors, np.ascontiguousarray(snapshots), snap_idx
+
+def _ols_batched(
+    Y: np.ndarray,
+    snapshots: np.ndarray,
+    snap_idx: np.ndarray,
+    valid: np.ndarray,
+    min_obs: int
+):
+    """
+    Solves the daily cross-sectional OLS regressions for every date at once.
+
+    Days are grouped by their exposures snapshot and missing-data mask, so the
+    design matrix of each distinct group is factorized only once and solved
+    against all the days that share it (one least-squares call with many
+    right-hand sides).
+
+    Args:
+        Y: (T, N) array of asset returns
+        snapshots: (S, N, F) array of factor exposures
+        snap_idx: (T,) snapshot used on each date
+        valid: (T, N) boolean mask of usable observations
+        min_obs: Minimum number of valid assets needed to regress a day
+
+    Returns:
+        coefs: (T, F) array of factor returns (NaN on skipped days)
+        solved: (T,) boolean mask of the days that were regressed
+    """
+    num_days, num_factors = Y.shape[0], snapshots.shape[2]
+    coefs = np.full((num_days, num_factors), np.nan)
+
+    solved = valid.sum(axis=1) >= min_obs
+    day_idx = np.flatnonzero(solved)
+    if len(day_idx) == 0:
+        return coefs, solved
+
+    # Group days by (snapshot, missing-data mask). Each key is packed into a
+    # single opaque byte string so np.unique compares whole rows at once.
+    keys = np.concatenate([
+        snap_idx[day_idx].astype('<i8')[:, None].view(np.uint8),
+        np.packbits(valid[day_idx], axis=1)
+    ], axis=1)
+    keys = np.ascontiguousarray(keys).view(np.dtype((np.void, keys.shape[1]))).ravel()
+    _, first, group = np.unique(keys, return_index=True, return_inverse=True)
+    order = np.argsort(group, kind='stable')
+    boundaries = np.cumsum(np.bincount(group))[:-1]
+
+    for leader, members in zip(day_idx[first], np.split(day_idx[order], boundaries)):
+        mask = valid[leader]
+
+        # Intercept column, matching LinearRegression(fit_intercept=True)
+        X = snapshots[snap_idx[leader]][mask]
+        design = np.column_stack([np.ones(len(X)), X])
+
+        # (N_valid, F+1) x (F+1, D) = (N_valid, D)
+        sol, *_ = np.linalg.lstsq(design, Y[np.ix_(members, mask)].T, rcond=None)
+        coefs[members] = sol[1:].T  # Drop the intercept
+
+    return coefs, solved
+
+def huber_irls_batched(
+    Y: np.ndarray,
+    X: np.ndarray,
+    valid: np.ndarray,
+    epsilon: float = 1.35,
+    alpha: float = 0.0001,
+    max_iter: int = 100,
+    tol: float = 1e-6,
+    coef0: np.ndarray = None
+):
+    """
+    Huber robust regression for a batch of dates via iteratively reweighted
+    least squares (IRLS).
+
+    Minimizes the same objective as sklearn's HuberRegressor (joint estimate
+    of coefficients, intercept and scale, with an L2 penalty `alpha` on the
+    coefficients), but all days iterate together as stacked (T, N, F) arrays
+    and each day stops updating once it has converged.
+
+    Args:
+        Y: (T, N) array of asset returns
+        X: (N, F) exposures shared by every day, or (T, N, F) per-day exposures
+        valid: (T, N) boolean mask of usable observations
+        epsilon: Huber threshold (in units of the scale)
+        alpha: L2 penalty on the factor returns (not the intercept)
+        max_iter: Maximum number of IRLS iterations
+        tol: Convergence tolerance on the change in fitted values and scale,
+             relative to the scale
+        coef0: Optional (T, F+1) or (F+1,) warm start [intercept, factors...],
+               e.g. the previous day's solution. Defaults to each day's OLS fit.
+
+    Returns:
+        coefs: (T, F) array of factor returns
+        scale: (T,) array of the estimated residual scale
+        n_iter: (T,) array of iterations used per day
+        converged: (T,) boolean array of per-day convergence
+    """
+    beta, scale, n_iter, converged = _huber_irls(Y, X, valid, epsilon, alpha, max_iter, tol, coef0)
+    return beta[:, 1:], scale, n_iter, converged
+
+def _huber_irls(Y, X, valid, epsilon=1.35, alpha=0.0001, max_iter=100, tol=1e-6, coef0=None):
+    """Body of `huber_irls_batched`, returning (T, F+1) [intercept, factors...] coefficients."""
+    num_days = Y.shape[0]
+
+    # Prepend the intercept column, (N, F+1) or (T, N, F+1)
+    # (Missing exposures are zeroed; those rows are excluded through `valid`)
+    design = np.concatenate([np.ones(X.shape[:-1] + (1,)), np.nan_to_num(X)], axis=-1)
+    penalty = alpha * np.eye(design.shape[-1])
+    penalty[0, 0] = 0.0  # Intercept is not penalized
+
+    Y = np.where(valid, Y, 0.0)
+    weights = valid.astype(float)
+    n_obs = weights.sum(axis=1)
+
+    def rows(arr, idx):
+        # Shared exposures broadcast against every day
+        return arr if arr.ndim == 2 else arr[idx]
+
+    def weighted_solve(w, des, y):
+        # Batched normal equations: (X' W X + P) b = X' W y
+        wx = w[:, :, None] * des
+        gram = np.swapaxes(wx, 1, 2) @ des + penalty
+        rhs = np.einsum('tnk,tn->tk', wx, y)
+        return np.linalg.solve(gram, rhs[:, :, None])[:, :, 0]
+
+    if coef0 is None:
+        beta = weighted_solve(weights, design, Y)
+    else:
+        beta = np.array(np.broadcast_to(coef0, (num_days, design.shape[-1])), dtype=float)
+
+    # Robust starting scale from the seed's residuals (MAD)
+    resid = np.where(valid, Y - (design @ beta[:, :, None])[:, :, 0], np.nan)
+    scale = np.maximum(1.4826 * np.nanmedian(np.abs(resid), axis=1), 1e-12)
+
+    n_iter = np.zeros(num_days, dtype=int)
+    converged = np.zeros(num_days, dtype=bool)
+    active = np.arange(num_days)
+
+    for it in range(max_iter):
+        des = rows(design, active)
+        y, w, b, s = Y[active], weights[active], beta[active], scale[active]
+
+        resid = (y - (des @ b[:, :, None])[:, :, 0]) * w
+        abs_resid = np.abs(resid)
+
+        # Scale step: sigma^2 = sum(inlier r^2) / (n - n_outliers * epsilon^2)
+        inlier = abs_resid <= epsilon * s[:, None]
+        n_out = ((~inlier) * w).sum(axis=1)
+        denom = np.maximum(n_obs[active] - n_out * epsilon ** 2, 1e-12)
+        s_new = np.maximum(np.sqrt((resid ** 2 * inlier).sum(axis=1) / denom), 1e-12)
+
+        # Coefficient step: inliers weighted 1/sigma, outliers epsilon/|r|
+        inlier = abs_resid <= epsilon * s_new[:, None]
+        irls_w = np.where(inlier, 1.0 / s_new[:, None], epsilon / np.maximum(abs_resid, 1e-300)) * w
+        b_new = weighted_solve(irls_w, des, y)
+
+        fitted_step = np.abs((des @ (b_new - b)[:, :, None])[:, :, 0] * w).max(axis=1)
+        done = (fitted_step <= tol * s_new) & (np.abs(s_new - s) <= tol * s_new)
+
+        beta[active] = b_new
+        scale[active] = s_new
+        n_iter[active] = it + 1
+        converged[active[done]] = True
+
+        active = active[~done]
+        if len(active) == 0:
+            break
+
+    return beta, scale, n_iter, converged
+
+def _estimate(
+    Y: np.ndarray,
+    snapshots: np.ndarray,
+    snap_idx: np.ndarray,
+    dates: pd.Index,
+    min_obs: int,
+    method: str,
+    batch_size: int,
+    progress: bool = True,
+    coef0: np.ndarray = None
+):
+    """
+    Runs the regressions for a block of dates on plain arrays.
+
+    Huber batches are warm-started from the previous solved day: every day of
+    a batch is seeded with the [intercept, factors...] solution of the last
+    day solved before the batch, and `coef0` seeds the first batch (e.g. the
+    day before a shard). Without a seed, days start from their OLS fit.
+
+    Returns:
+        coefs: (T, F) array of factor returns (NaN on skipped days)
+        solved: (T,) boolean mask of the days that were regressed
+    """
+    # Filter out missing returns (e.g., halted stocks), missing exposures
+    # and dates before the first exposures snapshot
+    finite = np.isfinite(snapshots).all(axis=2)
+    valid = ~np.isnan(Y) & finite[np.maximum(snap_idx, 0)] & (snap_idx >= 0)[:, None]
+
+    if method != 'huber':
+        # OLS has a closed form, so every day is solved in one batched pass
+        return _ols_batched(Y, snapshots, snap_idx, valid, min_obs)
+
+    coefs = np.full((len(Y), snapshots.shape[2]), np.nan)
+    solved = valid.sum(axis=1) >= min_obs
+
+    # Batches never straddle two exposures snapshots, so every batch shares
+    # one (N, F) design matrix, exactly like the static case
+    batches = [
+        day_idx[start : start + batch_size]
+        for snap in np.unique(snap_idx[solved])
+        for day_idx in [np.flatnonzero(solved & (snap_idx == snap))]
+        for start in range(0, len(day_idx), batch_size)
+    ]
+
+    # Solve the robust regressions a batch of dates at a time
+    seed = coef0
+    for batch in progress_bar(batches, enabled=progress, desc="Huber IRLS"):
+        X = snapshots[snap_idx[batch[0]]]
+        beta, _, n_iter, converged = _huber_irls(Y[batch], X, valid[batch], coef0=seed)
+        coefs[batch] = beta[:, 1:]
+        increment('factor_engine.irls_iterations', int(n_iter.sum()))
+        if seed is not None:
+            increment('factor_engine.warm_starts', len(batch))
+
+        # Fall back to sklearn for the (rare) days IRLS did not converge on
+        for t in batch[~converged]:
+            logger.warning("IRLS did not converge for %s, refitting with HuberRegressor", dates[t])
+            increment('factor_engine.irls_nonconverged')
+            try:
+                # epsilon=1.35 is standard for 95% efficiency
+                X_day = snapshots[snap_idx[t]]
+                model = HuberRegressor(epsilon=1.35).fit(X_day[valid[t]], Y[t, valid[t]])
+                coefs[t] = model.coef_
+            except Exception as e:
+                logger.warning("Regression failed for %s: %s", dates[t], e)
+                increment('factor_engine.regression_failed')
+                solved[t] = False
+
+        # The next batch starts from the last converged day of this one
+        if converged.any():
+            seed = beta[np.flatnonzero(converged)[-1]]
+
+    return coefs, solved
+
+def _previous_day_seed(Y, snapshots, snap_idx, min_obs, start):
+    """
+    Huber [intercept, factors...] solution of the day before `start`, used to
+    warm-start a shard like the serial path would. None if that day is skipped
+    or does not converge.
+    """
+    t = start - 1
+    if t < 0 or snap_idx[t] < 0:
+        return None
+    X = snapshots[snap_idx[t]]
+    valid = ~np.isnan(Y[t]) & np.isfinite(X).all(axis=1)
+    if valid.sum() < min_obs:
+        return None
+    beta, _, _, converged = _huber_irls(Y[t : t + 1], X, valid[None, :])
+    return beta[0] if converged[0] else None
+
+def _estimate_shard(returns_path, exposures_path, start, stop, snap_idx, dates, min_obs, method, batch_size, coef0=None):
+    """
+    Worker entry point: regresses dates [start, stop) of the memory-mapped
+    inputs. Only file paths and the shard bounds are pickled per task.
+    """
+    Y = np.load(returns_path, mmap_mode='r')[start:stop]
+    snapshots = np.load(exposures_path, mmap_mode='r')
+
+    # One BLAS thread per worker, the pool provides the parallelism
+    with threadpool_limits(limits=1):
+        return _estimate(Y, snapshots, snap_idx, dates, min_obs, method, batch_size, progress=False, coef0=coef0)
+
+def _estimate_parallel(Y, snapshots, snap_idx, dates, min_obs, method, batch_size, n_jobs):
+    """
+    Splits the date range into contiguous shards and regresses each one in a
+    worker process. The returns matrix and exposures snapshots are written
+    once to .npy files and memory-mapped by the workers (zero-copy, shared
+    page cache). Shards are reassembled in date order, so the output is
+    deterministic. For Huber, each shard is warm-started from a solve of the
+    day before it, so the previous-day seed carries across shard boundaries.
+    """
+    # A few shards per worker to balance uneven Huber convergence
+    num_shards = min(len(Y), n_jobs * 4)
+    bounds = np.linspace(0, len(Y), num_shards + 1).astype(int)
+
+    coefs = np.full((len(Y), snapshots.shape[2]), np.nan)
+    solved = np.zeros(len(Y), dtype=bool)
+
+    with tempfile.TemporaryDirectory(prefix="factor_engine_") as tmp_dir:
+        returns_path = os.path.join(tmp_dir, "returns.npy")
+        exposures_path = os.path.join(tmp_dir, "exposures.npy")
+        np.save(returns_path, Y)
+        np.save(exposures_path, snapshots)
+
+        shards = list(zip(bounds[:-1], bounds[1:]))
+        seeds = [
+            _previous_day_seed(Y, snapshots, snap_idx, min_obs, start) if method == 'huber' else None
+            for start, _ in shards
+        ]
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            futures = [
+                executor.submit(
+                    _estimate_shard, returns_path, exposures_path, start, stop,
+                    snap_idx[start:stop], dates[start:stop], min_obs, method, batch_size, seed
+                )
+                for (start, stop), seed in zip(shards, seeds)
+            ]
+            for (start, stop), future in progress_bar(zip(shards, futures), total=len(shards), desc="Shards"):
+                coefs[start:stop], solved[start:stop] = future.result()
+
+    return coefs, solved
 
 def calculate_factor_returns(
-    returns_df: pd.DataFrame, 
-    exposures_df: pd.DataFrame, 
-    method: str = 'huber'
+    returns_df: pd.DataFrame,
+    exposures_df: pd.DataFrame,
+    method: str = 'huber',
+    batch_size: int = 256,
+    n_jobs: int = 1
 ) -> pd.DataFrame:
     """
     Performs cross-sectional regression for each day to estimate factor returns.
-    
+
     Equation: R_i = Beta * F + epsilon
     We solve for F (Factor Returns).
-    
+
     Args:
         returns_df: DataFrame of asset returns (Index=Date, Cols=Tickers)
-        exposures_df: DataFrame of factor exposures (Index=Tickers, Cols=Factors)
-                      (Must be aligned with returns columns)
+        exposures_df: DataFrame of factor exposures, either static
+                      (Index=Tickers, Cols=Factors) or time-varying
+                      (MultiIndex (date, ticker) or long format with 'date'
+                      and 'ticker' columns), see `align_exposures`
         method: 'ols' or 'huber' (robust)
+        batch_size: Number of dates solved together by the Huber IRLS solver
+        n_jobs: Number of worker processes (-1 = all cores). Dates are split
+                into contiguous shards regressed in parallel.
     """
-    # Align tickers
-    common_tickers = returns_df.columns.intersection(exposures_df.index)
-    returns_aligned = returns_df[common_tickers]
-    exposures_aligned = exposures_df.loc[common_tickers]
-    
-    factor_returns = []
-    dates = returns_aligned.index
-    
-    # Pre-initialize the regressor
-    if method == 'huber':
-        # epsilon=1.35 is standard for 95% efficiency
-        model = HuberRegressor(epsilon=1.35) 
-    else:
-        model = LinearRegression()
-        
-    print(f"Estimating factor returns using {method.upper()} regression...")
-    
-    for date in tqdm(dates):
-        # Get returns for this day
-        day_ret = returns_aligned.loc[date]
-        
-        # Filter out missing returns for this specific day (e.g., halted stocks)
-        valid_mask = ~day_ret.isna()
-        
-        if valid_mask.sum() < exposures_aligned.shape[1] + 10:
-            # Skip if not enough data points to regress
-            continue
-            
-        X = exposures_aligned.loc[valid_mask]
-        y = day_ret.loc[valid_mask]
-        
-        try:
-            model.fit(X, y)
-            
-            # Store coefficients (Factor Returns)
-            # Create a Series indexed by factor names
-            f_ret = pd.Series(model.coef_, index=exposures_aligned.columns)
-            f_ret.name = date
-            factor_returns.append(f_ret)
-            
-        except Exception as e:
-            # In case Huber fails to converge
-            print(f"Regression failed for {date}: {e}")
-            
-    return pd.DataFrame(factor_returns)
\ No newline at end of file
+    # Align tickers (and exposure dates) once, up front
+    dates = returns_df.index
+    common_tickers, factors, snapshots, snap_idx = align_exposures(
+        exposures_df, returns_df.columns, dates
+    )
+    Y = returns_df[common_tickers].to_numpy(dtype=float)
+
+    # Skip days without enough data points to regress
+    min_obs = len(factors) + 10
+
+    logger.info("Estimating factor returns using %s regression on %d dates...", method.upper(), len(dates))
+
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+
+    with span(f'factor_engine.{method}', logger):
+        if n_jobs > 1 and len(dates) > 1:
+            coefs, solved = _estimate_parallel(Y, snapshots, snap_idx, dates, min_obs, method, batch_size, n_jobs)
+        else:
+            coefs, solved = _estimate(Y, snapshots, snap_idx, dates, min_obs, method, batch_size)
+
+    increment('factor_engine.dates_solved', int(solved.sum()))
+    increment('factor_engine.dates_skipped', int((~solved).sum()))
+    return pd.DataFrame(coefs[solved], index=dates[solved], columns=factors)
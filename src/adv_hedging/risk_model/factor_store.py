@@ -0,0 +1,135 @@
+"""
+src/adv_hedging/risk_model/factor_store.py
+Incremental (append-mode) factor return estimation backed by a Parquet store.
+"""
+import logging
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from adv_hedging.risk_model import factor_engine
+from adv_hedging.telemetry import increment
+from adv_hedging.utils import content_hash
+
+logger = logging.getLogger(__name__)
+
+HASH_COLUMN = 'input_hash'
+
+def _digest(*parts) -> np.uint64:
+    """64-bit `content_hash` of the parts."""
+    return np.uint64(int(content_hash(*parts, digest_size=8), 16))
+
+def _input_hashes(returns_df, common_tickers, factors, snapshots, snap_idx, method) -> np.ndarray:
+    """Per-date hashes from already aligned inputs (see `align_exposures`)."""
+    # Shared by every date: tickers, factor names and the method
+    context = _digest(method, list(factors), list(common_tickers))
+
+    # One hash per exposures snapshot; the trailing 0 covers snap_idx == -1
+    snapshot_hashes = np.array([_digest(snap) for snap in snapshots] + [0], dtype=np.uint64)
+
+    # Vectorized row hashes (one uint64 per date)
+    row_hashes = pd.util.hash_pandas_object(returns_df[common_tickers], index=True).values
+    return row_hashes ^ context ^ snapshot_hashes[snap_idx]
+
+def compute_input_hashes(
+    returns_df: pd.DataFrame,
+    exposures_df: pd.DataFrame,
+    method: str = 'huber'
+) -> pd.Series:
+    """
+    Returns one 64-bit hash per date identifying the inputs of that day's
+    regression: the returns row (aligned to the common tickers) combined with
+    the exposures in force on that date and the method. Any change to either
+    invalidates the date.
+    """
+    aligned = factor_engine.align_exposures(exposures_df, returns_df.columns, returns_df.index)
+    return pd.Series(
+        _input_hashes(returns_df, *aligned, method),
+        index=returns_df.index,
+        name=HASH_COLUMN
+    )
+
+def load_factor_store(store_path) -> pd.DataFrame:
+    """Loads the persisted factor returns (plus input hashes), if any."""
+    store_path = Path(store_path)
+    if not store_path.exists():
+        return pd.DataFrame()
+    return pd.read_parquet(store_path)
+
+def update_factor_returns(
+    returns_df: pd.DataFrame,
+    exposures_df: pd.DataFrame,
+    store_path,
+    method: str = 'huber'
+) -> pd.DataFrame:
+    """
+    Incrementally estimates factor returns, re-using a local Parquet store.
+
+    Only dates that are missing from the store, or whose inputs changed since
+    they were stored (detected via `compute_input_hashes`), are regressed.
+    The store is then rewritten with the merged results, so a daily update
+    costs O(new days) rather than O(history).
+
+    Args:
+        returns_df: DataFrame of asset returns (Index=Date, Cols=Tickers)
+        exposures_df: Static or time-varying factor exposures
+                      (see `factor_engine.align_exposures`)
+        store_path: Parquet file holding previously computed factor returns
+        method: 'ols' or 'huber' (robust)
+
+    Returns:
+        DataFrame of factor returns for the dates in `returns_df`, equal to
+        `calculate_factor_returns(returns_df, exposures_df, method)` within the
+        solver tolerance.
+    """
+    store_path = Path(store_path)
+    aligned = factor_engine.align_exposures(exposures_df, returns_df.columns, returns_df.index)
+    factors = aligned[1]
+    hashes = pd.Series(_input_hashes(returns_df, *aligned, method), index=returns_df.index)
+
+    stored = load_factor_store(store_path)
+    if not stored.empty and list(stored.columns.drop(HASH_COLUMN)) != list(factors):
+        # Different factor set, nothing in the store can be re-used
+        logger.warning("Factor set changed, discarding stored factor returns.")
+        stored = pd.DataFrame()
+
+    # A date is stale if it is not stored yet or its input hash changed
+    stale = np.ones(len(returns_df), dtype=bool)
+    if not stored.empty:
+        known = returns_df.index.isin(stored.index)
+        stored_hashes = stored.loc[returns_df.index[known], HASH_COLUMN].to_numpy(dtype=np.uint64)
+        stale[known] = stored_hashes != hashes.values[known]
+
+    dates_to_run = returns_df.index[stale]
+    logger.info("Factor store: %d dates up to date, %d to estimate.", (~stale).sum(), len(dates_to_run))
+    increment('factor_store.hits', int((~stale).sum()))
+    increment('factor_store.misses', len(dates_to_run))
+
+    if len(dates_to_run) > 0:
+        fresh = factor_engine.calculate_factor_returns(
+            returns_df.loc[dates_to_run], exposures_df, method=method
+        )
+
+        # Skipped dates (too few observations) are stored as NaN rows so
+        # they are not retried on every run
+        fresh = fresh.reindex(dates_to_run)
+        fresh[HASH_COLUMN] = hashes.loc[dates_to_run].values
+
+        if stored.empty:
+            merged = fresh
+        else:
+            merged = pd.concat([stored.drop(index=dates_to_run, errors='ignore'), fresh])
+        merged = merged.sort_index()
+
+        # Write atomically so a crash never leaves a truncated store behind
+        store_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = store_path.with_name(store_path.name + ".tmp")
+        merged.to_parquet(tmp_path)
+        os.replace(tmp_path, store_path)
+    else:
+        merged = stored
+
+    result = merged.reindex(returns_df.index)[list(factors)]
+    return result.dropna(how='all')
@@ -0,0 +1,167 @@
+"""
+src/adv_hedging/telemetry.py
+Timing spans, counters and progress reporting for the hot paths.
+
+Messages go through the `logging` module (one logger per module, e.g.
+'adv_hedging.risk_model.factor_engine'), so batch jobs choose what they see
+with the usual logging configuration. Numbers go to an in-process
+MetricsRegistry, off by default:
+
+    from adv_hedging import telemetry
+    telemetry.enable_metrics()
+    calculate_factor_returns(returns_df, exposures_df)
+    telemetry.dump_metrics("metrics.json")
+
+While the registry is disabled, `increment` is one attribute check and
+`span` returns a shared no-op context unless its logger is enabled for
+DEBUG. Counters and spans recorded in worker processes (n_jobs > 1) stay
+in the workers and are not merged into the parent's registry.
+"""
+import functools
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+
+from tqdm import tqdm
+
+logger = logging.getLogger(__name__)
+
+class MetricsRegistry:
+    """
+    Thread-safe named counters and timers.
+
+    Counters are running sums (e.g. solver iterations, cache hits). Timers
+    keep the count, total, min and max of the durations observed under a name.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._timers = {}
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._timers.clear()
+
+    def increment(self, name: str, value=1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            timer = self._timers.get(name)
+            if timer is None:
+                self._timers[name] = {'count': 1, 'total': seconds, 'min': seconds, 'max': seconds}
+            else:
+                timer['count'] += 1
+                timer['total'] += seconds
+                timer['min'] = min(timer['min'], seconds)
+                timer['max'] = max(timer['max'], seconds)
+
+    def snapshot(self) -> dict:
+        """{'counters': {name: value}, 'timers': {name: {count, total, mean, min, max}}}."""
+        with self._lock:
+            counters = dict(self._counters)
+            timers = {
+                name: {**timer, 'mean': timer['total'] / timer['count']}
+                for name, timer in self._timers.items()
+            }
+        return {'counters': counters, 'timers': timers}
+
+    def to_json(self, path=None) -> str:
+        """The snapshot as JSON, also written to `path` if given."""
+        text = json.dumps(self.snapshot(), indent=2, sort_keys=True)
+        if path is not None:
+            Path(path).write_text(text)
+        return text
+
+# Process-wide registry used by the library
+REGISTRY = MetricsRegistry()
+
+def enable_metrics(reset: bool = True) -> MetricsRegistry:
+    if reset:
+        REGISTRY.reset()
+    REGISTRY.enable()
+    return REGISTRY
+
+def disable_metrics() -> None:
+    REGISTRY.disable()
+
+def get_metrics() -> dict:
+    return REGISTRY.snapshot()
+
+def dump_metrics(path) -> None:
+    REGISTRY.to_json(path)
+    logger.info("Metrics written to %s", path)
+
+def increment(name: str, value=1) -> None:
+    """Adds `value` to a counter (no-op while the registry is disabled)."""
+    if REGISTRY.enabled:
+        REGISTRY.increment(name, value)
+
+class _Span:
+    __slots__ = ('name', 'logger', 'start')
+
+    def __init__(self, name, log):
+        self.name = name
+        self.logger = log
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        if REGISTRY.enabled:
+            REGISTRY.observe(self.name, seconds)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            status = "failed after" if exc_type is not None else "took"
+            self.logger.debug("%s %s %.4fs", self.name, status, seconds)
+        return False
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+def span(name: str, log: logging.Logger = logger):
+    """
+    Context manager timing a block under `name`: the duration is recorded in
+    the registry and logged at DEBUG on `log`. Free when neither is enabled.
+    """
+    if REGISTRY.enabled or log.isEnabledFor(logging.DEBUG):
+        return _Span(name, log)
+    return _NULL_SPAN
+
+def timed(name: str, log: logging.Logger = logger):
+    """Decorator running every call of the function inside `span(name, log)`."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, log):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def progress_bar(iterable, enabled: bool = True, **kwargs):
+    """
+    tqdm progress bar that only draws on an interactive terminal, so batch
+    jobs with redirected output do not fill their logs with bar updates.
+    """
+    return tqdm(iterable, disable=None if enabled else True, **kwargs)
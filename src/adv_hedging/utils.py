@@ -1,25 +1,301 @@
 """
 src/adv_hedging/utils.py
 Utilities for caching and logging.
+
+ArtifactCache stores expensive intermediate results (factor returns,
+covariance matrices, embeddings, hedge weights) under DATA_DIR/cache:
+
+    cache = ArtifactCache()
+
+    @cache.memoize('factor_returns', version='2')
+    def estimate(returns_df, exposures_df): ...
+
+Keys are content hashes of the inputs plus a version tag, so results are
+recomputed whenever the data or the code version changes.
 """
+import datetime
+import errno
+import functools
+import hashlib
 import os
-from joblib import Memory
+import pickle
+import shutil
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
 from adv_hedging.config import DATA_DIR
+from adv_hedging.telemetry import increment
 
-# Create a cache directory inside data/
+# Cache directory inside data/ (created on first write, not at import)
 CACHE_DIR = DATA_DIR / "cache"
-CACHE_DIR.mkdir(exist_ok=True)
 
-# Initialize joblib memory
-# verbose=0 means it won't print every time it reads from cache
-memory = Memory(location=CACHE_DIR, verbose=0)
+VALUES_FILE = "values.npy"
+META_FILE = "meta.pkl"
+OBJECT_FILE = "object.pkl"
+
+# Distinguishes a miss from a cached None
+_MISSING = object()
+
+# Scalars whose repr depends only on their value
+_SCALAR_TYPES = (
+    str, int, float, complex, bool, type(None), np.generic, np.dtype,
+    datetime.date, datetime.time, datetime.timedelta, pd.Timestamp, pd.Timedelta,
+)
+
+# Temporary entries older than this are left over from crashed writes
+_STALE_SECONDS = 3600
+
+def _update_hash(h, obj) -> None:
+    if isinstance(obj, pd.DataFrame):
+        h.update(b"frame")
+        _update_hash(h, obj.index)
+        _update_hash(h, obj.columns)
+        for _, col in obj.items():
+            _update_hash(h, col.to_numpy())
+    elif isinstance(obj, pd.Series):
+        h.update(b"series")
+        _update_hash(h, obj.index)
+        _update_hash(h, obj.to_numpy())
+    elif isinstance(obj, pd.Index):
+        h.update(b"index")
+        _update_hash(h, obj.to_numpy())
+    elif isinstance(obj, np.ndarray):
+        h.update(f"{obj.dtype.str}{obj.shape}".encode())
+        if obj.dtype == object:
+            h.update(pickle.dumps(obj.tolist()))
+        else:
+            h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, (list, tuple)):
+        h.update(f"seq{len(obj)}".encode())
+        for item in obj:
+            _update_hash(h, item)
+    elif isinstance(obj, (set, frozenset)):
+        h.update(f"set{len(obj)}".encode())
+        for item in sorted(obj, key=repr):
+            _update_hash(h, item)
+    elif isinstance(obj, dict):
+        h.update(f"dict{len(obj)}".encode())
+        for k in sorted(obj, key=repr):
+            _update_hash(h, k)
+            _update_hash(h, obj[k])
+    elif isinstance(obj, bytes):
+        h.update(obj)
+    elif isinstance(obj, os.PathLike):
+        h.update(f"path{os.fspath(obj)}".encode())
+    elif isinstance(obj, _SCALAR_TYPES):
+        h.update(repr(obj).encode())
+    else:
+        # A default repr holds the memory address, so the key would change every run
+        raise TypeError(f"Cannot content-hash objects of type {type(obj).__name__}")
 
-def get_cache_decorator():
+def content_hash(*parts, digest_size: int = 16) -> str:
     """
-    Returns the @memory.cache decorator to wrap expensive functions.
-    Usage:
-        from adv_hedging.utils import memory
-        @memory.cache
-        def expensive_func(x): ...
+    Hex digest of arrays, pandas objects, containers and scalars, by content.
+    Raises TypeError for other objects, which have no stable content hash.
     """
-    return memory.cache
\ No newline at end of file
+    h = hashlib.blake2b(digest_size=digest_size)
+    for part in parts:
+        _update_hash(h, part)
+    return h.hexdigest()
+
+def _dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.iterdir() if f.is_file())
+
+class ArtifactCache:
+    """
+    Disk cache of computed artifacts with a byte budget.
+
+    Numeric arrays, DataFrames and Series of a single dtype are written as
+    .npy and read back memory-mapped (zero-copy, read-only); anything else is
+    pickled. Every entry lives in its own directory, written atomically. Reads
+    refresh the entry's mtime, and the least recently used entries are
+    evicted once the cache exceeds `max_bytes`.
+
+    Args:
+        cache_dir: Root directory of the cache
+        max_bytes: Budget for all entries together
+        version: Tag mixed into every key; bump it to invalidate everything
+                 written by older code
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR / "artifacts", max_bytes: int = 10 * 1024**3, version: str = '1'):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, name: str, *inputs, version: str = '', **params) -> str:
+        """`name` plus a content hash of the inputs, parameters and version tags."""
+        return f"{name}-{content_hash(self.version, version, inputs, params)}"
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key
+
+    def __contains__(self, key: str) -> bool:
+        return self._path(key).is_dir()
+
+    def get(self, key: str, mmap: bool = True, default=None):
+        """Stored artifact for `key`, or `default`."""
+        path = self._path(key)
+        try:
+            value = self._read(path, mmap)
+        except FileNotFoundError:
+            self.misses += 1
+            increment('artifact_cache.misses')
+            return default
+
+        os.utime(path)
+        self.hits += 1
+        increment('artifact_cache.hits')
+        return value
+
+    def _read(self, path: Path, mmap: bool):
+        if (path / OBJECT_FILE).exists():
+            with open(path / OBJECT_FILE, "rb") as f:
+                return pickle.load(f)
+
+        values = np.load(path / VALUES_FILE, mmap_mode='r' if mmap else None)
+        meta = pd.read_pickle(path / META_FILE)
+        if meta['kind'] == 'frame':
+            return pd.DataFrame(values, index=meta['index'], columns=meta['columns'], copy=False)
+        if meta['kind'] == 'series':
+            return pd.Series(values, index=meta['index'], name=meta['name'], copy=False)
+        return values
+
+    def put(self, key: str, value):
+        """Stores `value` under `key` and returns it."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_dir / f".{key}.{os.getpid()}.tmp"
+        tmp_path.mkdir(exist_ok=True)
+        self._write(tmp_path, value)
+
+        # Atomic: readers see either no entry or a complete one
+        path = self._path(key)
+        if not self._move_into_place(tmp_path, path):
+            # An existing entry is moved aside first, as a directory cannot be replaced
+            old_path = self.cache_dir / f".{key}.{os.getpid()}.old"
+            try:
+                os.replace(path, old_path)
+            except FileNotFoundError:
+                pass
+            if not self._move_into_place(tmp_path, path):
+                shutil.rmtree(tmp_path, ignore_errors=True)  # Written concurrently by someone else
+            shutil.rmtree(old_path, ignore_errors=True)
+
+        self._remove_stale()
+        self._evict()
+        return value
+
+    @staticmethod
+    def _move_into_place(tmp_path: Path, path: Path) -> bool:
+        """Renames `tmp_path` to `path`; False if `path` already holds an entry."""
+        try:
+            os.replace(tmp_path, path)
+        except OSError as e:
+            if e.errno in (errno.ENOTEMPTY, errno.EEXIST):
+                return False
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+        return True
+
+    def _remove_stale(self) -> None:
+        """Deletes temporary directories left behind by crashed writes."""
+        cutoff = time.time() - _STALE_SECONDS
+        for path in self.cache_dir.glob(".*"):
+            if not path.name.endswith((".tmp", ".old")):
+                continue
+            try:
+                stale = path.stat().st_mtime < cutoff
+            except FileNotFoundError:
+                continue  # Finished or cleaned up by another writer meanwhile
+            if stale:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def _write(self, path: Path, value) -> None:
+        if isinstance(value, pd.DataFrame) and len(set(value.dtypes)) == 1 and value.dtypes.iloc[0] != object:
+            meta = {'kind': 'frame', 'index': value.index, 'columns': value.columns}
+            values = value.to_numpy()
+        elif isinstance(value, pd.Series) and value.dtype != object:
+            meta = {'kind': 'series', 'index': value.index, 'name': value.name}
+            values = value.to_numpy()
+        elif isinstance(value, np.ndarray) and value.dtype != object:
+            meta = {'kind': 'array'}
+            values = value
+        else:
+            with open(path / OBJECT_FILE, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            return
+
+        np.save(path / VALUES_FILE, values)
+        pd.to_pickle(meta, path / META_FILE)
+
+    def _entries(self):
+        """(mtime, size, path) of every entry, oldest first."""
+        if not self.cache_dir.exists():
+            return []
+        entries = [
+            (p.stat().st_mtime, _dir_size(p), p)
+            for p in self.cache_dir.iterdir() if p.is_dir() and not p.name.startswith(".")
+        ]
+        return sorted(entries)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self) -> None:
+        entries = self._entries()
+        excess = sum(size for _, size, _ in entries) - self.max_bytes
+        for _, size, path in entries:
+            if excess <= 0:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            excess -= size
+            self.evictions += 1
+
+    def invalidate(self, key: Optional[str] = None, name: Optional[str] = None) -> int:
+        """
+        Deletes one entry (`key`), every entry of an artifact (`name`), or the
+        whole cache when neither is given. Returns the number of entries removed.
+        """
+        if key is not None:
+            paths = [self._path(key)] if key in self else []
+        else:
+            paths = [p for _, _, p in self._entries() if name is None or p.name.startswith(f"{name}-")]
+
+        for path in paths:
+            shutil.rmtree(path, ignore_errors=True)
+        return len(paths)
+
+    def stats(self) -> dict:
+        entries = self._entries()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+        }
+
+    def memoize(self, name: str, version: str = '') -> Callable:
+        """
+        Decorator caching a function's result on the content of its arguments.
+        Bump `version` when the function's logic changes.
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                key = self.key(name, *args, version=version, **kwargs)
+                value = self.get(key, default=_MISSING)
+                if value is _MISSING:
+                    value = self.put(key, func(*args, **kwargs))
+                return value
+            wrapper.cache = self
+            return wrapper
+        return decorator
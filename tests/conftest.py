@@ -23,4 +23,21 @@ def mock_wiki_row():
         'URL': 'http://wiki.test/Test_Company',
         'sector': 'Technology',
         'content': 'Word ' * 1000  # 1000 words of dummy text
-    }
\ No newline at end of file
+    }
+
+@pytest.fixture
+def mock_risk_model():
+    """
+    Factory of (exposures, factor_cov, specific_variances) for `num_assets`
+    random assets on three factors, with an annualized risk model.
+    """
+    def make(num_assets=40, seed=0):
+        rng = np.random.default_rng(seed)
+        factors = ['Size', 'Value', 'Mom']
+        assets = [f"S_{i}" for i in range(num_assets)]
+        exposures = pd.DataFrame(rng.standard_normal((num_assets, 3)), index=assets, columns=factors)
+        mixing = rng.standard_normal((3, 3))
+        cov = pd.DataFrame(mixing @ mixing.T * 0.01, index=factors, columns=factors)
+        spec = pd.Series(rng.uniform(0.02, 0.1, num_assets), index=assets)
+        return exposures, cov, spec
+    return make
@@ -0,0 +1,106 @@
+"""
+tests/test_backtest.py
+Tests for the walk-forward backtest.
+"""
+import numpy as np
+import pandas as pd
+
+from adv_hedging.backtest import runner
+from adv_hedging.backtest.data import PointInTimeData
+from adv_hedging.backtest.schedule import holding_periods, rebalance_dates
+from adv_hedging.utils import ArtifactCache
+
+def _mock_market(exposures, num_days=260, seed=0):
+    """Daily returns and embeddings driven by the exposures of a `mock_risk_model` universe."""
+    rng = np.random.default_rng(seed)
+    num_assets = len(exposures)
+    dates = pd.bdate_range('2024-01-01', periods=num_days)
+    factor_rets = rng.standard_normal((num_days, exposures.shape[1])) * 0.01
+    returns = pd.DataFrame(
+        factor_rets @ exposures.values.T + rng.standard_normal((num_days, num_assets)) * 0.01,
+        index=dates, columns=exposures.index
+    )
+    embeddings = pd.DataFrame(np.hstack([exposures.values, rng.standard_normal((num_assets, 5))]), index=exposures.index)
+    return returns, embeddings
+
+def test_schedule_and_point_in_time_slices(mock_risk_model):
+    dates = pd.bdate_range('2024-01-01', periods=100)
+
+    monthly = rebalance_dates(dates, 'M', min_history=30)
+    assert all(d.month != (d + pd.offsets.BDay()).month for d in monthly[:-1])
+    assert dates.get_loc(monthly[0]) >= 29
+    assert list(rebalance_dates(dates, 20, min_history=30)) == list(dates[29::20])
+
+    held = holding_periods(dates, monthly)
+    assert held.loc[:monthly[0]].isna().all()
+    assert (held.loc[monthly[0]:].dropna().index > held.dropna()).all()
+
+    exposures = mock_risk_model(num_assets=30)[0]
+    returns, _ = _mock_market(exposures)
+    panel = pd.concat({returns.index[0]: exposures, returns.index[100]: exposures * 2})
+    pit = PointInTimeData(returns, panel)
+
+    assert pit.returns(returns.index[50], lookback=20).index[-1] == returns.index[50]
+    assert len(pit.returns(returns.index[50], lookback=20)) == 20
+    pd.testing.assert_frame_equal(pit.exposures(returns.index[99]), exposures)
+    pd.testing.assert_frame_equal(pit.exposures(returns.index[100]), exposures * 2)
+
+def test_risk_model_cache(tmp_path, mock_risk_model):
+    exposures = mock_risk_model(num_assets=30)[0]
+    returns, _ = _mock_market(exposures)
+    pit = PointInTimeData(returns, exposures)
+    factor_returns = pd.DataFrame(
+        np.random.default_rng(1).standard_normal((len(returns), 3)) * 0.01, index=returns.index, columns=exposures.columns
+    )
+    cache = ArtifactCache(tmp_path / "artifacts")
+    date = returns.index[150]
+
+    fresh = pit.risk_model(factor_returns, date, lookback=100)
+    cached = [pit.risk_model(factor_returns, date, lookback=100, cache=cache) for _ in range(2)]
+    assert (cache.hits, cache.misses) == (1, 1)
+    for universe, factor_cov, specific_variances in cached:
+        pd.testing.assert_frame_equal(universe, fresh[0])
+        pd.testing.assert_frame_equal(factor_cov, fresh[1])
+        pd.testing.assert_series_equal(specific_variances, fresh[2])
+
+    # Other inputs are another entry
+    pit.risk_model(factor_returns, date, lookback=100, half_life=30, cache=cache)
+    assert cache.misses == 2
+
+def test_backtest_resumes_from_checkpoints(tmp_path, monkeypatch, mock_risk_model):
+    exposures = mock_risk_model(num_assets=30)[0]
+    returns, embeddings = _mock_market(exposures)
+    kwargs = dict(embeddings=embeddings, targets=returns.columns[:5], frequency=40, lookback=100, method='ols')
+
+    summary = runner.run_backtest(returns, exposures, tmp_path, **kwargs)
+    assert list(summary.index) == list(returns.columns[:5])
+    assert (summary['Factor_Vol'] < summary['Unhedged_Vol']).all()
+    assert set(summary['Winner']) <= {'Factor', 'NLP'}
+
+    hedge_returns = pd.read_parquet(tmp_path / "hedge_returns.parquet")
+    first_rebalance = rebalance_dates(returns.index, 40, min_history=100)[0]
+    assert hedge_returns.index.get_level_values('Date').min() > first_rebalance
+
+    # A re-run with the same settings re-uses every checkpoint
+    def fail(*args, **kwargs):
+        raise AssertionError("hedges should have been loaded from checkpoints")
+    with monkeypatch.context() as patch:
+        patch.setattr(runner.FactorHedgeEngine, 'calculate_hedges', fail)
+        resumed = runner.run_backtest(returns, exposures, tmp_path, **kwargs)
+    pd.testing.assert_frame_equal(resumed, summary)
+
+    # Losing one checkpoint only recomputes that rebalance
+    checkpoints = sorted((tmp_path / "checkpoints").glob("Factor_*.parquet"))
+    checkpoints[-1].unlink()
+    pd.testing.assert_frame_equal(runner.run_backtest(returns, exposures, tmp_path, **kwargs), summary)
+
+    # Changed input data discards the checkpoints
+    calls = []
+    calculate_hedges = runner.FactorHedgeEngine.calculate_hedges
+    with monkeypatch.context() as patch:
+        patch.setattr(
+            runner.FactorHedgeEngine, 'calculate_hedges',
+            lambda self, *args, **kw: calls.append(1) or calculate_hedges(self, *args, **kw)
+        )
+        runner.run_backtest(returns, exposures * 1.1, tmp_path, **kwargs)
+    assert len(calls) == len(checkpoints)
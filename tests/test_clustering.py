@@ -0,0 +1,49 @@
+"""
+tests/test_clustering.py
+Tests for the shared kNN graph and scoring of the clustering sweep.
+"""
+import numpy as np
+import pytest
+
+from adv_hedging.nlp.clustering import knn_graph, score_clustering, sweep_clustering
+from adv_hedging.utils import ArtifactCache
+
+def _clustered(num=60, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    labels = rng.integers(3, size=num)
+    centers = 5 * rng.standard_normal((3, dim))
+    return centers[labels] + rng.standard_normal((num, dim)), labels
+
+def test_knn_graph_is_sliceable():
+    embeddings, _ = _clustered()
+    indices, distances = knn_graph(embeddings, 15)
+    assert indices.shape == distances.shape == (60, 15)
+    np.testing.assert_array_equal(indices[:, 0], np.arange(60))
+    assert (distances[:, 0] == 0).all() and (np.diff(distances, axis=1) >= -1e-6).all()
+
+    # The first n columns are the n-neighbour graph
+    small_idx, small_dist = knn_graph(embeddings, 5)
+    np.testing.assert_array_equal(indices[:, :5], small_idx)
+    np.testing.assert_allclose(distances[:, :5], small_dist, atol=1e-6)
+
+    unit = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    np.testing.assert_allclose(distances[:, 1], 1 - np.sort(unit @ unit.T, axis=1)[:, -2], atol=1e-5)
+
+def test_score_clustering_ignores_noise():
+    truth = np.array(['Maker'] * 5 + ['User'] * 5)
+    labels = np.array([0, 0, 0, 0, -1, 1, 1, 1, 1, 1])
+    scores = score_clustering(truth, labels)
+    assert scores['ARI'] == pytest.approx(1.0) and scores['AMI'] == pytest.approx(1.0)
+    assert scores['Clusters'] == 2 and scores['Noise_Share'] == pytest.approx(0.1)
+    assert np.isnan(score_clustering(truth, np.full(10, -1))['ARI'])
+
+def test_sweep_uses_cache(tmp_path):
+    pytest.importorskip("umap")
+    pytest.importorskip("hdbscan")
+    embeddings, labels = _clustered()
+    cache = ArtifactCache(tmp_path / "artifacts")
+
+    first = sweep_clustering(embeddings, labels, (5, 10), (0.0,), cache=cache)
+    second = sweep_clustering(embeddings, labels, (5, 10), (0.0,), cache=cache)
+    assert len(first) == 2 and (second['Seconds'] == 0).all()
+    assert first['ARI'].iloc[0] > 0.9
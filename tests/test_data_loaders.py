@@ -0,0 +1,90 @@
+"""
+tests/test_data_loaders.py
+Tests for the Parquet-backed Wikipedia and risk-factor loaders.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from adv_hedging.data.loaders import (
+    load_embedding_matrix,
+    load_returns,
+    load_risk_factors,
+    load_wiki_data,
+    risk_factor_snapshots,
+    write_risk_factor_snapshot,
+)
+
+def test_wiki_projection_and_embeddings(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((4, 6)).astype(np.float32)
+    df = pd.DataFrame({
+        'ticker': ['ZTS', 'VLTO', 'AAPL', 'AAPL'],
+        'URL': ['u1', 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies', 'u3', 'u4'],
+        'title': ['Zoetis', 'List of S&P 500 companies', 'Apple', 'Apple'],
+        'embedding_mpnet': [v.tolist() for v in vectors[:3]] + [None],
+    })
+    path = tmp_path / "wiki.parquet"
+    df.to_parquet(path)
+
+    wiki = load_wiki_data(columns=['URL', 'title'], tickers=['VLTO', 'ZTS'], path=path)
+    assert list(wiki.columns) == ['URL', 'title']
+    assert len(wiki) == 2
+    assert wiki['URL'].tolist()[1] == "https://en.wikipedia.org/wiki/Veralto"
+    assert wiki['title'].tolist()[1] == "Veralto"
+
+    embeddings = load_embedding_matrix('embedding_mpnet', path=path)
+    assert list(embeddings.index) == ['ZTS', 'VLTO', 'AAPL']
+    assert embeddings.dtypes.unique().tolist() == [np.float32]
+    np.testing.assert_array_equal(embeddings.to_numpy(), vectors[:3])
+
+def test_risk_factor_snapshots(tmp_path):
+    def export(size_shift):
+        return pd.DataFrame({
+            'Ticker': ['ZTS US Equity', 'ZS US Equity', 'ZM US Equity'],
+            'Ticker.1': ['ZTS US', 'ZS US', 'ZM US'],
+            'BICS L1 Sect Nm': ['Health Care', 'Technology', 1.5],  # mixed types, as Excel gives them
+            'PORT US Sz Fact Exp:D-1': np.array([-1.5, -2.2, -2.1]) + size_shift,
+        })
+
+    dataset_dir = tmp_path / "risk_factors"
+    missing_excel = tmp_path / "none.xlsx"
+    with pytest.raises(FileNotFoundError, match="risk_factors"):
+        load_risk_factors(excel_path=missing_excel, dataset_dir=dataset_dir)
+
+    write_risk_factor_snapshot(export(0.0), "2025-08-29", dataset_dir)
+    write_risk_factor_snapshot(export(1.0), "2025-09-28", dataset_dir)
+    write_risk_factor_snapshot(export(2.0), "2025-09-28", dataset_dir)  # replaces the partition
+    assert [str(d) for d in risk_factor_snapshots(dataset_dir)] == ['2025-08-29', '2025-09-28']
+
+    latest = load_risk_factors(excel_path=missing_excel, dataset_dir=dataset_dir)
+    assert list(latest.columns) == ['Ticker', 'Ticker.1', 'BICS L1 Sect Nm', 'PORT US Sz Fact Exp:D-1']
+    np.testing.assert_allclose(latest['PORT US Sz Fact Exp:D-1'], [0.5, -0.2, -0.1])
+
+    history = load_risk_factors(
+        columns=['Ticker.1', 'PORT US Sz Fact Exp:D-1'], tickers=['ZS US'], start="2025-01-01",
+        excel_path=missing_excel, dataset_dir=dataset_dir
+    )
+    assert list(history.columns) == ['Ticker.1', 'PORT US Sz Fact Exp:D-1', 'as_of']
+    np.testing.assert_allclose(history.sort_values('as_of')['PORT US Sz Fact Exp:D-1'], [-2.2, -0.2])
+
+    old = load_risk_factors(end="2025-09-01", excel_path=missing_excel, dataset_dir=dataset_dir)
+    assert old['as_of'].unique().tolist() == [pd.Timestamp("2025-08-29")]
+
+def test_load_returns(tmp_path):
+    path = tmp_path / "returns.parquet"
+    with pytest.raises(FileNotFoundError, match="returns.parquet"):
+        load_returns(path=path)
+
+    dates = pd.bdate_range("2024-01-01", periods=10)
+    returns_df = pd.DataFrame(np.random.default_rng(0).normal(0, 0.01, (10, 3)), index=dates, columns=['A', 'B', 'C'])
+    returns_df.to_parquet(path)
+
+    pd.testing.assert_frame_equal(load_returns(path=path), returns_df, check_freq=False)
+    subset = load_returns(tickers=['C', 'A', 'MISSING'], start=dates[2], end=dates[5], path=path)
+    pd.testing.assert_frame_equal(subset, returns_df.loc[dates[2]:dates[5], ['C', 'A']], check_freq=False)
+
+    # Named index, several row groups
+    returns_df.rename_axis('Date').to_parquet(path, row_group_size=3)
+    subset = load_returns(start=str(dates[4].date()), path=path)
+    pd.testing.assert_frame_equal(subset, returns_df.loc[dates[4]:].rename_axis('Date'), check_freq=False)
@@ -0,0 +1,79 @@
+"""
+tests/test_embedding_cache.py
+Tests for the content-addressed embedding cache.
+"""
+import numpy as np
+
+from adv_hedging.nlp.cache import EmbeddingCache
+
+class _CountingEncoder:
+    """Deterministic fake model that records every text it is asked to encode."""
+
+    def __init__(self):
+        self.seen = []
+
+    def __call__(self, texts):
+        self.seen.extend(texts)
+        return np.array([[len(t), sum(map(ord, t)) % 97, 1.0] for t in texts], dtype=np.float32)
+
+def test_only_new_chunks_are_encoded(tmp_path):
+    encoder = _CountingEncoder()
+    chunks = [f"chunk {i}" for i in range(50)]
+
+    with EmbeddingCache(tmp_path / "emb.sqlite") as cache:
+        first = cache.encode("model-a", chunks + chunks[:5], encoder)
+        assert len(encoder.seen) == 50  # duplicates are encoded once
+        np.testing.assert_array_equal(first[:50], encoder(chunks))
+
+    # A refreshed corpus reopened from disk: two chunks edited, one added
+    refreshed = chunks[:48] + ["chunk 48 edited", "chunk 49 edited", "chunk 50"]
+    encoder.seen = []
+    with EmbeddingCache(tmp_path / "emb.sqlite") as cache:
+        second = cache.encode("model-a", refreshed, encoder)
+        assert encoder.seen == refreshed[48:]
+        assert (cache.hits, cache.misses) == (48, 3)
+        np.testing.assert_array_equal(second, encoder(refreshed))
+
+        # Another model never reuses these vectors
+        encoder.seen = []
+        cache.encode("model-b", chunks[:3], encoder)
+        assert encoder.seen == chunks[:3]
+
+def test_eviction_keeps_recent_entries(tmp_path):
+    encoder = _CountingEncoder()
+    # Each vector is 3 float32 = 12 bytes, so the budget holds 10 of them
+    with EmbeddingCache(tmp_path / "emb.sqlite", max_bytes=120) as cache:
+        cache.encode("m", [f"old {i}" for i in range(10)], encoder)
+        cache.get_many("m", ["old 0"])  # refreshes its last use
+        cache.encode("m", ["new 0", "new 1"], encoder)
+
+        assert len(cache) == 10
+        assert cache.nbytes <= 120
+        hits = cache.get_many("m", ["old 0", "old 1", "old 2", "new 1"])
+        assert [v is not None for v in hits] == [True, False, False, True]
+
+def test_running_byte_total_tracks_the_table(tmp_path):
+    path = tmp_path / "emb.sqlite"
+
+    def table_sum(cache):
+        return cache._conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM embeddings").fetchone()[0]
+
+    with EmbeddingCache(path, max_bytes=100) as cache:
+        cache.put_many("m", ["a", "b"], np.ones((2, 3), dtype=np.float32))
+        assert cache.nbytes == table_sum(cache) == 24
+        # Overwriting a key with a wider vector replaces its size rather than adding to it
+        cache.put_many("m", ["a"], np.ones((1, 6), dtype=np.float64))
+        assert cache.nbytes == table_sum(cache) == 60
+        cache.put_many("m", ["c", "d", "e"], np.ones((3, 3), dtype=np.float32))
+        assert cache.nbytes == table_sum(cache) <= 100
+
+    with EmbeddingCache(path, max_bytes=100) as cache:
+        assert cache.nbytes == table_sum(cache)
+        # Under budget, a put must not scan the table
+        statements = []
+        cache._conn.set_trace_callback(statements.append)
+        cache.put_many("m", ["a"], np.ones((1, 3), dtype=np.float32))
+        cache._conn.set_trace_callback(None)
+        assert not any("SUM" in s or "ORDER BY" in s for s in statements)
+        cache.clear()
+        assert cache.nbytes == 0
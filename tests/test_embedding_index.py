@@ -0,0 +1,61 @@
+"""
+tests/test_embedding_index.py
+Tests for the exact and IVF embedding indexes.
+"""
+import numpy as np
+
+from adv_hedging.nlp.index import EmbeddingIndex, IVFIndex
+
+def _mock_embeddings(num=300, dim=32, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((10, dim))
+    return centers[rng.integers(10, size=num)] + 0.5 * rng.standard_normal((num, dim))
+
+def _brute_force(embeddings, k):
+    unit = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    sims = unit @ unit.T
+    np.fill_diagonal(sims, -np.inf)
+    return np.argsort(-sims, axis=1)[:, :k]
+
+def test_exact_blocked_search_matches_brute_force():
+    embeddings = _mock_embeddings()
+    tickers = [f"STOCK_{i}" for i in range(len(embeddings))]
+    expected = _brute_force(embeddings, 5)
+
+    # A small block size forces several merges of the running top-k
+    index = EmbeddingIndex(embeddings, ids=tickers, block_size=64)
+    scores, found = index.search_ids(tickers, k=5)
+    np.testing.assert_array_equal(found, expected)
+    assert (np.diff(scores, axis=1) <= 0).all()
+
+    # float16 storage keeps the same neighbours up to near-ties
+    half = EmbeddingIndex(embeddings, ids=tickers, dtype=np.float16, block_size=64)
+    _, found_half = half.search_ids(tickers, k=5)
+    overlap = np.mean([len(np.intersect1d(a, b)) for a, b in zip(found_half, expected)]) / 5
+    assert overlap > 0.98
+
+    # Restricting the candidates
+    allowed = np.zeros(len(embeddings), dtype=bool)
+    allowed[:3] = True
+    _, found = index.search_ids(tickers[:2], k=5, allowed=allowed)
+    assert set(found[0][found[0] >= 0]) == {1, 2}
+    assert (found[:, 2:] == -1).all()
+
+def test_ivf_recall_and_round_trip(tmp_path):
+    embeddings = _mock_embeddings()
+    expected = _brute_force(embeddings, 10)
+    queries = np.arange(len(embeddings))
+
+    ivf = IVFIndex(embeddings, num_lists=10, nprobe=3)
+    _, found = ivf.search(ivf.vectors, k=10, exclude=queries)
+    recall = np.mean([len(np.intersect1d(a, e)) for a, e in zip(found, expected)]) / 10
+    assert recall > 0.9
+
+    # Probing every list is exact
+    _, found_all = ivf.search(ivf.vectors, k=10, exclude=queries, nprobe=10)
+    np.testing.assert_array_equal(found_all, expected)
+
+    ivf.save(tmp_path / "ivf.npz")
+    loaded = EmbeddingIndex.load(tmp_path / "ivf.npz")
+    assert isinstance(loaded, IVFIndex)
+    np.testing.assert_array_equal(loaded.search(loaded.vectors, k=10, exclude=queries)[1], found)
@@ -0,0 +1,87 @@
+"""
+tests/test_embedding_pipeline.py
+Tests for the batched embedding pipeline, with a fake sentence-transformers model.
+"""
+import numpy as np
+import pandas as pd
+
+from adv_hedging.nlp.cache import EmbeddingCache
+from adv_hedging.nlp.embedding import (
+    EmbeddingPipeline,
+    dequantize_embeddings,
+    length_buckets,
+    quantize_embeddings,
+)
+
+class _FakeModel:
+    """Hashes words into a 16-dim bag-of-words vector; records batch lengths."""
+
+    def __init__(self):
+        self.batches = []
+
+    def get_sentence_embedding_dimension(self):
+        return 16
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, show_progress_bar=False):
+        self.batches.append([len(t) for t in texts])
+        out = np.zeros((len(texts), 16), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in text.split():
+                out[i, sum(map(ord, word)) % 16] += 1.0
+        return out
+
+def test_bucketed_encoding_keeps_order():
+    rng = np.random.default_rng(0)
+    texts = [" ".join(f"w{j}" for j in range(n)) for n in rng.integers(1, 50, size=40)]
+
+    model = _FakeModel()
+    bucketed = EmbeddingPipeline(model, prefix="", batch_size=8, num_workers=3).encode(texts)
+    np.testing.assert_array_equal(bucketed, _FakeModel().encode(texts))
+
+    # Each batch holds consecutive lengths of the sorted corpus
+    lengths = sorted((len(t) for t in texts), reverse=True)
+    expected = [sorted(lengths[i : i + 8]) for i in range(0, len(lengths), 8)]
+    assert sorted(sorted(b) for b in model.batches) == sorted(expected)
+    assert [len(idx) for idx in length_buckets(texts, 8)] == [8] * 5
+
+def test_quantization_round_trip():
+    vectors = np.random.default_rng(1).standard_normal((50, 16)).astype(np.float32)
+    vectors[3] = 0.0
+
+    q, scales = quantize_embeddings(vectors, np.int8)
+    assert q.dtype == np.int8 and scales.shape == (50,)
+    restored = dequantize_embeddings(q, scales)
+    assert np.abs(restored - vectors).max() <= scales.max() / 2 + 1e-6
+
+    half, no_scales = quantize_embeddings(vectors, np.float16)
+    assert half.dtype == np.float16 and no_scales is None
+
+def test_embed_corpus_to_store_and_index(tmp_path):
+    df = pd.DataFrame({
+        'ticker': ['AAA', 'BBB', 'CCC', 'DDD'],
+        'title': ['A', 'B', 'C', 'D'],
+        'content': [
+            "chips chips gpu gpu " * 30,
+            "chips gpu chips gpu " * 20,
+            "banks loans deposits " * 40,
+            "",
+        ],
+    })
+
+    pipeline = EmbeddingPipeline(_FakeModel(), prefix="", batch_size=4, cache=EmbeddingCache(tmp_path / "c.sqlite"))
+    full = pipeline.embed_corpus(df, tmp_path / "f32", chunk_size=20, overlap=5, corpus_batch=7)
+    assert list(full.tickers) == ['AAA', 'BBB', 'CCC']
+    assert pipeline.stats['chunks'] == full.num_chunks.sum()
+    assert pipeline.chunks_per_sec > 0
+
+    # Re-embedding with int8 storage reuses every cached vector
+    pipeline.quantize = np.dtype(np.int8)
+    encoded = pipeline.stats['encoded']
+    int8 = pipeline.embed_corpus(df, tmp_path / "i8", chunk_size=20, overlap=5, corpus_batch=7)
+    assert pipeline.stats['encoded'] == encoded
+    assert int8.embeddings.dtype == np.int8
+    np.testing.assert_allclose(int8.pool('mean'), full.pool('mean'), atol=0.02)
+
+    index = int8.to_index()
+    _, found = index.search_ids(['AAA'], k=1)
+    assert index.ids[found[0, 0]] == 'BBB'
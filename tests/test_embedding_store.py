@@ -0,0 +1,87 @@
+"""
+tests/test_embedding_store.py
+Tests for the memory-mapped chunk embedding store.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from adv_hedging.nlp.store import EmbeddingStore, EmbeddingStoreWriter, write_embedding_store
+from adv_hedging.nlp.text_processing import prepare_corpus_with_index
+
+def test_store_round_trip_and_pooling(tmp_path):
+    rng = np.random.default_rng(0)
+    counts = [3, 1, 0, 5, 2]
+    tickers = ['AAA', 'BBB', 'CCC', 'DDD', 'EEE']
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    embeddings = rng.standard_normal((offsets[-1], 8)).astype(np.float32)
+
+    write_embedding_store(tmp_path / "batch", embeddings, tickers, offsets)
+
+    # Streaming the same rows, one company split over two appends
+    with EmbeddingStoreWriter(tmp_path / "stream", dim=8) as writer:
+        writer.append('AAA', embeddings[:2])
+        writer.append('AAA', embeddings[2:3])
+        writer.append('BBB', embeddings[3:4])
+        writer.append('DDD', embeddings[4:9])
+        writer.append('EEE', embeddings[9:])
+        with pytest.raises(ValueError):
+            writer.append('AAA', embeddings[:1])
+
+    batch = EmbeddingStore(tmp_path / "batch")
+    stream = EmbeddingStore(tmp_path / "stream")
+    assert isinstance(batch.embeddings, np.memmap)
+    np.testing.assert_array_equal(batch.embeddings, embeddings)
+    np.testing.assert_array_equal(stream.embeddings, embeddings)
+    np.testing.assert_array_equal(stream.offsets, [0, 3, 4, 9, 11])
+    np.testing.assert_array_equal(batch.chunks('DDD'), embeddings[4:9])
+
+    # A small block forces pooling over several blocks
+    store = EmbeddingStore(tmp_path / "batch", block_rows=4)
+    for method, reduce in [('mean', np.mean), ('max', np.max)]:
+        expected = np.full((len(tickers), 8), np.nan, dtype=np.float32)
+        for i, (start, stop) in enumerate(zip(offsets[:-1], offsets[1:])):
+            if stop > start:
+                expected[i] = reduce(embeddings[start:stop], axis=0)
+
+        np.testing.assert_allclose(store.pool(method, normalize=False), expected, rtol=1e-5)
+
+        frame = store.to_frame(method)
+        assert list(frame.index) == ['AAA', 'BBB', 'DDD', 'EEE']
+        np.testing.assert_allclose(np.linalg.norm(frame.values, axis=1), 1.0, rtol=1e-5)
+
+def test_store_rewrite_replaces_every_file(tmp_path):
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((6, 4)).astype(np.float32)
+    path = tmp_path / "store"
+
+    with EmbeddingStoreWriter(path, dim=4, dtype=np.int8) as writer:
+        writer.append('AAA', np.ones((6, 4)), scales=np.full(6, 0.5))
+    np.testing.assert_allclose(EmbeddingStore(path).chunks('AAA'), 0.5)
+
+    # A float store written over the int8 one drops its scales
+    write_embedding_store(path, embeddings, ['AAA', 'BBB'], [0, 2, 6])
+    store = EmbeddingStore(path)
+    assert store.scales is None
+    np.testing.assert_array_equal(store.chunks('BBB'), embeddings[2:])
+
+    # A failed rewrite leaves the previous store and no temporary files
+    with pytest.raises(RuntimeError):
+        with EmbeddingStoreWriter(path, dim=4) as writer:
+            writer.append('CCC', embeddings)
+            raise RuntimeError
+    assert list(EmbeddingStore(path).tickers) == ['AAA', 'BBB']
+    assert not list(path.glob("*.tmp"))
+
+def test_prepare_corpus_with_index():
+    df = pd.DataFrame({
+        'ticker': ['AAA', 'BBB', 'CCC'],
+        'title': ['A', 'B', 'C'],
+        'content': [" ".join(["word"] * 25), "", "short text"],
+    })
+    chunks, tickers, offsets = prepare_corpus_with_index(df, chunk_size=10, overlap=2)
+
+    assert tickers == ['AAA', 'BBB', 'CCC']
+    np.testing.assert_array_equal(offsets, [0, 3, 3, 4])
+    assert len(chunks) == offsets[-1]
+    assert chunks[-1].endswith("short text")
@@ -118,4 +118,163 @@ def test_ticker_alignment():
     
     # Should run without error and produce results
     assert not f_ret.empty
-    assert len(f_ret) == 5
\ No newline at end of file
+    assert len(f_ret) == 5
+
+def test_batched_ols_matches_per_day_fit(mock_returns_df):
+    """
+    The vectorized OLS path must reproduce a per-day LinearRegression fit,
+    including days with missing returns and days below the min_obs rule.
+    """
+    from sklearn.linear_model import LinearRegression
+
+    tickers = mock_returns_df.columns
+    factors = ['Size', 'Value']
+    exposures_df = pd.DataFrame(
+        np.random.randn(len(tickers), len(factors)),
+        index=tickers,
+        columns=factors
+    )
+
+    # Halt a few stocks on some days, and wipe out most of day 3
+    returns_df = mock_returns_df.copy()
+    returns_df.iloc[1, [2, 7]] = np.nan
+    returns_df.iloc[2, 4] = np.nan
+    returns_df.iloc[3, :10] = np.nan
+
+    f_ret = calculate_factor_returns(returns_df, exposures_df, method='ols')
+
+    # Day 3 only has 10 valid stocks (< 2 factors + 10)
+    assert returns_df.index[3] not in f_ret.index
+    assert len(f_ret) == len(returns_df) - 1
+
+    for date in [returns_df.index[0], returns_df.index[1], returns_df.index[2]]:
+        day_ret = returns_df.loc[date].dropna()
+        expected = LinearRegression().fit(exposures_df.loc[day_ret.index], day_ret).coef_
+        np.testing.assert_allclose(f_ret.loc[date].values, expected, atol=1e-10)
+
+def test_huber_irls_matches_sklearn(mock_returns_df):
+    """
+    The batched IRLS solver must agree with a per-day sklearn HuberRegressor
+    fit, including on a day with a massive outlier.
+    """
+    from sklearn.linear_model import HuberRegressor
+
+    tickers = mock_returns_df.columns
+    factors = ['Size', 'Value', 'Momentum']
+    exposures_df = pd.DataFrame(
+        np.random.randn(len(tickers), len(factors)),
+        index=tickers,
+        columns=factors
+    )
+    returns_df = mock_returns_df.copy()
+    returns_df.iloc[0, 0] = 1000.0
+    returns_df.iloc[5, 3] = np.nan
+
+    f_ret = calculate_factor_returns(returns_df, exposures_df, method='huber')
+    assert len(f_ret) == len(returns_df)
+
+    for date in returns_df.index[:10]:
+        day_ret = returns_df.loc[date].dropna()
+        expected = HuberRegressor(epsilon=1.35).fit(exposures_df.loc[day_ret.index], day_ret).coef_
+        np.testing.assert_allclose(f_ret.loc[date].values, expected, atol=2e-5)
+
+def test_huber_irls_warm_start_and_convergence():
+    """A warm start from the previous day's solution reaches the same fit."""
+    from adv_hedging.risk_model.factor_engine import huber_irls_batched
+
+    rng = np.random.default_rng(0)
+    X = rng.standard_normal((50, 3))
+    Y = rng.normal(0, 0.01, size=(30, 50))
+    valid = np.ones_like(Y, dtype=bool)
+
+    coefs, scale, n_iter, converged = huber_irls_batched(Y, X, valid)
+    assert converged.all()
+    assert (scale > 0).all()
+
+    # Seed every day from the previous day's [intercept, coefs...]
+    seed = np.column_stack([np.zeros(30), np.vstack([coefs[:1], coefs[:-1]])])
+    warm_coefs, _, _, warm_converged = huber_irls_batched(Y, X, valid, coef0=seed)
+    assert warm_converged.all()
+    np.testing.assert_allclose(warm_coefs, coefs, atol=1e-6)
+
+def test_huber_batches_warm_start_from_previous_day(mock_returns_df, monkeypatch):
+    """
+    calculate_factor_returns seeds every Huber batch with the last solved
+    day before it, and the seeded fits still match sklearn.
+    """
+    from sklearn.linear_model import HuberRegressor
+    from adv_hedging.risk_model import factor_engine
+
+    tickers = mock_returns_df.columns
+    exposures_df = pd.DataFrame(np.random.randn(len(tickers), 2), index=tickers, columns=['Size', 'Value'])
+
+    calls = []
+    irls = factor_engine._huber_irls
+
+    def spy(Y, X, valid, *args, coef0=None, **kwargs):
+        result = irls(Y, X, valid, *args, coef0=coef0, **kwargs)
+        calls.append((coef0, result[0]))
+        return result
+
+    monkeypatch.setattr(factor_engine, '_huber_irls', spy)
+    f_ret = calculate_factor_returns(mock_returns_df, exposures_df, method='huber', batch_size=10)
+
+    assert len(calls) == 10
+    assert calls[0][0] is None  # First batch starts from OLS
+    for (seed, _), (_, previous_beta) in zip(calls[1:], calls[:-1]):
+        np.testing.assert_array_equal(seed, previous_beta[-1])
+
+    for date in mock_returns_df.index[::10]:
+        expected = HuberRegressor(epsilon=1.35).fit(exposures_df, mock_returns_df.loc[date]).coef_
+        np.testing.assert_allclose(f_ret.loc[date].values, expected, atol=2e-5)
+
+def test_parallel_matches_serial(mock_returns_df):
+    """Sharding the dates across worker processes must not change the output."""
+    tickers = mock_returns_df.columns
+    exposures_df = pd.DataFrame(
+        np.random.randn(len(tickers), 2),
+        index=tickers,
+        columns=['Size', 'Value']
+    )
+
+    serial = calculate_factor_returns(mock_returns_df, exposures_df, method='huber')
+    parallel = calculate_factor_returns(mock_returns_df, exposures_df, method='huber', n_jobs=2)
+
+    # Shards are warm-started from a separate solve of the day before them,
+    # so the two paths agree up to the IRLS tolerance
+    pd.testing.assert_frame_equal(parallel, serial, rtol=0, atol=1e-7)
+
+def test_time_varying_exposures_panel(mock_returns_df):
+    """
+    A (date, ticker) exposures panel must give the same factor returns as
+    regressing each period separately on the snapshot in force, and dates
+    before the first snapshot are skipped.
+    """
+    tickers = mock_returns_df.columns
+    factors = ['Size', 'Value']
+    dates = mock_returns_df.index
+    snap_a = pd.DataFrame(np.random.randn(len(tickers), 2), index=tickers, columns=factors)
+    snap_b = pd.DataFrame(np.random.randn(len(tickers), 2), index=tickers, columns=factors)
+
+    # Snapshots dated on day 10 and day 60 (monthly-style refresh)
+    panel = pd.concat({dates[10]: snap_a, dates[60]: snap_b.drop(tickers[0])})
+    panel.index.names = ['date', 'ticker']
+
+    for method in ['ols', 'huber']:
+        f_ret = calculate_factor_returns(mock_returns_df, panel, method=method)
+
+        # Same result from the long format
+        long_df = panel.reset_index()
+        pd.testing.assert_frame_equal(calculate_factor_returns(mock_returns_df, long_df, method=method), f_ret)
+
+        # Nothing before the first snapshot
+        assert f_ret.index[0] == dates[10]
+        assert len(f_ret) == len(dates) - 10
+
+        # Snapshot B forward-fills the exposures of the ticker it is missing
+        snap_b_filled = snap_b.copy()
+        snap_b_filled.loc[tickers[0]] = snap_a.loc[tickers[0]]
+        expected_a = calculate_factor_returns(mock_returns_df.iloc[10:60], snap_a, method=method)
+        expected_b = calculate_factor_returns(mock_returns_df.iloc[60:], snap_b_filled, method=method)
+        # (Huber warm starts differ across the split, up to the IRLS tolerance)
+        pd.testing.assert_frame_equal(f_ret, pd.concat([expected_a, expected_b]), check_freq=False, rtol=0, atol=1e-7)
@@ -0,0 +1,46 @@
+"""
+tests/test_factor_store.py
+Tests for incremental factor return estimation.
+"""
+import pandas as pd
+import numpy as np
+from adv_hedging.risk_model import factor_engine
+from adv_hedging.risk_model.factor_store import update_factor_returns
+
+def test_incremental_update_only_estimates_new_and_changed_dates(mock_returns_df, tmp_path, monkeypatch):
+    tickers = mock_returns_df.columns
+    exposures_df = pd.DataFrame(
+        np.random.randn(len(tickers), 2),
+        index=tickers,
+        columns=['Size', 'Value']
+    )
+    store_path = tmp_path / "factor_returns.parquet"
+
+    # Record how many dates each underlying estimation call receives
+    calls = []
+    original = factor_engine.calculate_factor_returns
+
+    def spy(returns_df, *args, **kwargs):
+        calls.append(len(returns_df))
+        return original(returns_df, *args, **kwargs)
+
+    monkeypatch.setattr(factor_engine, 'calculate_factor_returns', spy)
+
+    # 1. Initial build over the first 90 days
+    first = update_factor_returns(mock_returns_df.iloc[:90], exposures_df, store_path, method='ols')
+    assert calls == [90]
+    assert len(first) == 90
+
+    # 2. Append 10 new days and revise one historical row
+    revised = mock_returns_df.copy()
+    revised.iloc[5, 0] += 0.05
+    second = update_factor_returns(revised, exposures_df, store_path, method='ols')
+    assert calls == [90, 11]
+
+    # Must match a full recomputation
+    expected = original(revised, exposures_df, method='ols')
+    pd.testing.assert_frame_equal(second, expected, check_freq=False)
+
+    # 3. Nothing changed -> nothing to estimate
+    update_factor_returns(revised, exposures_df, store_path, method='ols')
+    assert calls == [90, 11]
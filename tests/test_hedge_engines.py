@@ -0,0 +1,65 @@
+"""
+tests/test_hedge_engines.py
+Tests for the concrete HedgeEngine implementations.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from adv_hedging.hedging.core import EmbeddingHedgeEngine, FactorHedgeEngine
+from adv_hedging.hedging.optimization import optimize_hedge_weights
+
+def _mock_embeddings(assets, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.standard_normal((len(assets), dim)), index=assets)
+
+def test_factor_engine_single_and_bulk_queries(mock_risk_model):
+    exposures, cov, spec_risk = mock_risk_model(num_assets=30)
+    engine = FactorHedgeEngine(exposures, cov, spec_risk, max_positions=5)
+    assert engine.get_hedge_rationale() == "No hedge calculated yet."
+
+    # Fitted lazily on first use
+    hedge = engine.calculate_hedge('S_3')
+    assert engine.is_fitted
+    assert hedge['S_3'] == 0.0
+    assert (hedge > 0).sum() <= 5
+    assert 'S_3' in engine.get_hedge_rationale()
+
+    expected = optimize_hedge_weights(
+        exposures.loc['S_3'], exposures.drop('S_3'), cov, spec_risk.drop('S_3'), max_positions=5,
+        solver='admm', cardinality='iht'
+    )
+    np.testing.assert_allclose(hedge.drop('S_3'), expected, atol=1e-6)
+
+    bulk = engine.calculate_hedges(['S_3', 'S_7'])
+    assert list(bulk.index) == ['S_3', 'S_7']
+    np.testing.assert_allclose(bulk.loc['S_3'], hedge, atol=1e-6)
+
+    # Targets outside the universe are rejected the same way by both queries
+    with pytest.raises(ValueError, match="NOT_IN_UNIVERSE"):
+        engine.calculate_hedge('NOT_IN_UNIVERSE')
+    with pytest.raises(ValueError, match="NOT_IN_UNIVERSE"):
+        engine.calculate_hedges(['S_3', 'NOT_IN_UNIVERSE'])
+
+def test_embedding_engine_picks_nearest_neighbors():
+    embeddings = _mock_embeddings([f"S_{i}" for i in range(30)])
+    engine = EmbeddingHedgeEngine(embeddings, num_neighbors=4).fit()
+
+    unit = embeddings.values / np.linalg.norm(embeddings.values, axis=1, keepdims=True)
+    sims = pd.Series(unit @ unit[0], index=embeddings.index).drop('S_0')
+    expected = set(sims.nlargest(4).index)
+
+    hedge = engine.calculate_hedge('S_0')
+    assert set(hedge[hedge > 0].index) == expected
+    np.testing.assert_allclose(hedge.sum(), 1.0)
+    assert 'S_0' in engine.get_hedge_rationale()
+
+    # Restricting the universe only changes the candidates
+    universe = embeddings.index[10:]
+    bulk = engine.calculate_hedges(['S_0', 'S_12'], universe=universe)
+    assert set(bulk.columns[(bulk > 0).any()]) <= set(universe)
+    assert bulk.loc['S_12', 'S_12'] == 0.0
+    assert ((bulk > 0).sum(axis=1) == 4).all()
+
+    with pytest.raises(ValueError, match="NOT_IN_UNIVERSE"):
+        engine.calculate_hedge('NOT_IN_UNIVERSE')
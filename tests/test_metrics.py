@@ -0,0 +1,50 @@
+"""
+tests/test_metrics.py
+Tests for the hedge evaluation metrics.
+"""
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from adv_hedging.hedging.metrics import (
+    calculate_hedged_volatility,
+    calculate_risk_reduction,
+    evaluate_rolling_hedges,
+)
+
+def test_rolling_evaluator_matches_per_window_metrics():
+    """Every rolling window equals the single-window metrics on that slice."""
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range('2020-01-01', periods=120)
+    tickers = [f"S_{i}" for i in range(20)]
+    returns = pd.DataFrame(rng.standard_normal((120, 20)) * 0.01, index=dates, columns=tickers)
+    returns.iloc[30:33, 5:8] = np.nan  # Gaps in hedge names
+    returns.iloc[70, 0] = np.nan       # Gap in a target
+
+    hedge_weights = {
+        name: pd.DataFrame(
+            rng.uniform(0, 0.2, (3, 17)) * (rng.random((3, 17)) < 0.4),
+            index=tickers[:3], columns=tickers[3:]
+        )
+        for name in ['topn', 'iht']
+    }
+
+    result = evaluate_rolling_hedges(returns, hedge_weights, window=20, min_periods=15)
+    assert len(result) == 120 * 2 * 3
+    assert result.loc[dates[10]].isna().all().all()
+
+    for t, (strategy, target) in itertools.product([19, 35, 75, 119], itertools.product(hedge_weights, tickers[:3])):
+        window = returns.iloc[t - 19 : t + 1]
+        weights = hedge_weights[strategy].loc[target]
+        weights = weights[weights > 0]
+
+        hedged_vol = calculate_hedged_volatility(window[target], window[weights.index], weights)
+        unhedged_vol = window[target].std() * np.sqrt(252)
+        net = window[target] - window[weights.index] @ weights
+        row = result.loc[(dates[t], strategy, target)]
+
+        np.testing.assert_allclose(row['Hedged_Vol'], hedged_vol, rtol=1e-10)
+        np.testing.assert_allclose(row['Unhedged_Vol'], unhedged_vol, rtol=1e-10)
+        np.testing.assert_allclose(row['Tracking_Error'], np.sqrt((net ** 2).mean() * 252), rtol=1e-10)
+        np.testing.assert_allclose(row['Risk_Reduction'], calculate_risk_reduction(unhedged_vol, hedged_vol), rtol=1e-8)
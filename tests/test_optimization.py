@@ -30,4 +30,164 @@ def test_cardinality_constraint():
     non_zero = (weights > 1e-4).sum()
     
     assert non_zero <= 5
-    assert non_zero > 0 # Should have bought something
\ No newline at end of file
+    assert non_zero > 0 # Should have bought something
+
+def test_qp_gradient_and_hessian_vector_product(mock_risk_model):
+    """Analytic derivatives must agree with finite differences."""
+    from adv_hedging.hedging.qp import TrackingErrorQP
+
+    universe_exposures, cov, spec_risk = mock_risk_model()
+    qp = TrackingErrorQP(universe_exposures.values, cov.values, spec_risk.values)
+    rng = np.random.default_rng(1)
+    target = rng.standard_normal(3)
+    w, v = rng.uniform(0, 0.1, 40), rng.standard_normal(40)
+
+    h = 1e-6
+    fd_grad = np.array([
+        (qp.objective(w + h * e, target) - qp.objective(w - h * e, target)) / (2 * h)
+        for e in np.eye(40)
+    ])
+    np.testing.assert_allclose(qp.gradient(w, target), fd_grad, rtol=1e-5, atol=1e-8)
+
+    fd_hvp = (qp.gradient(w + h * v, target) - qp.gradient(w - h * v, target)) / (2 * h)
+    np.testing.assert_allclose(qp.hessian_vector(v), fd_hvp, rtol=1e-5, atol=1e-8)
+
+def test_admm_matches_slsqp(mock_risk_model):
+    """The ADMM backend must reach the SLSQP optimum and respect the constraints."""
+    from adv_hedging.hedging.optimization import _solve_slsqp
+    from adv_hedging.hedging.qp import TrackingErrorQP
+
+    universe_exposures, cov, spec_risk = mock_risk_model()
+    target = -universe_exposures.iloc[0].values
+
+    admm = TrackingErrorQP(universe_exposures.values, cov.values, spec_risk.values).solve(target)
+    slsqp = _solve_slsqp(target, universe_exposures.values, cov.values, spec_risk.values)
+
+    assert admm.success
+    assert admm.fun <= slsqp.fun + 1e-8
+    assert admm.x.min() >= 0.0 and admm.x.max() <= 0.25 + 1e-12
+    assert 0.7 - 1e-9 <= admm.x.sum() <= 1.3 + 1e-9
+
+def test_batch_matches_single_target_optimization(mock_risk_model):
+    """Each row of the batch equals a standalone optimize_hedge_weights call."""
+    from adv_hedging.hedging.optimization import optimize_hedges_batch
+
+    universe_exposures, cov, spec_risk = mock_risk_model()
+    targets_df = universe_exposures.iloc[:6] * 1.5
+
+    weights = optimize_hedges_batch(targets_df, universe_exposures, cov, spec_risk, max_positions=5)
+    assert weights.shape == (6, len(universe_exposures))
+
+    for target in targets_df.index:
+        # A target never hedges itself
+        assert weights.loc[target, target] == 0.0
+
+        hedge_universe = universe_exposures.drop(target)
+        expected = optimize_hedge_weights(
+            targets_df.loc[target], hedge_universe, cov, spec_risk.drop(target), max_positions=5,
+            solver='admm', cardinality='iht'
+        )
+        np.testing.assert_allclose(weights.loc[target, hedge_universe.index], expected, atol=1e-6)
+
+    parallel = optimize_hedges_batch(
+        targets_df, universe_exposures, cov, spec_risk, max_positions=5, n_jobs=2, chunk_size=2
+    )
+    pd.testing.assert_frame_equal(parallel, weights)
+
+def test_cardinality_strategies(mock_risk_model):
+    """Every strategy is feasible; the refinements never do worse than top-N truncation."""
+    from adv_hedging.hedging.cardinality import CARDINALITY_STRATEGIES, compare_strategies
+
+    universe_exposures, cov, spec_risk = mock_risk_model(num_assets=200)
+    target = universe_exposures.iloc[:3].mean() * 3
+
+    report = compare_strategies(target, universe_exposures, cov, spec_risk, max_positions=5)
+    assert list(report.index) == list(CARDINALITY_STRATEGIES)
+    assert (report['Positions'] <= 5).all()
+    assert report.loc['iht', 'Objective'] <= report.loc['topn', 'Objective'] + 1e-10
+    assert report.loc['swap', 'Objective'] <= report.loc['topn', 'Objective'] + 1e-10
+
+    for strategy in CARDINALITY_STRATEGIES:
+        weights = optimize_hedge_weights(
+            target, universe_exposures, cov, spec_risk, max_positions=5, solver='admm', cardinality=strategy
+        )
+        assert (weights > 0).sum() <= 5
+        assert weights.min() >= 0.0 and weights.max() <= 0.25 + 1e-12
+        assert 0.7 - 1e-9 <= weights.sum() <= 1.3 + 1e-9
+
+def test_cardinality_edge_cases(monkeypatch, mock_risk_model):
+    """IHT reuses the QP's step size and stays feasible; greedy handles riskless assets."""
+    from adv_hedging.hedging.cardinality import greedy_forward, iterative_hard_thresholding
+    from adv_hedging.hedging.qp import TrackingErrorQP
+
+    universe_exposures, cov, spec_risk = mock_risk_model()
+    qp = TrackingErrorQP(universe_exposures.values, cov.values, spec_risk.values)
+
+    # The power iteration for the step size runs once per QP, not once per target
+    calls = []
+    hessian_vector = TrackingErrorQP.hessian_vector
+    monkeypatch.setattr(TrackingErrorQP, 'hessian_vector', lambda self, v: calls.append(1) or hessian_vector(self, v))
+    for target in universe_exposures.values[:3]:
+        iterative_hard_thresholding(qp, target, 5)
+    assert len(calls) == 31
+    monkeypatch.undo()
+
+    hessian = 2.0 * (qp.B @ qp.cov @ qp.B.T + np.diag(qp.spec))
+    np.testing.assert_allclose(qp.max_eigenvalue(), np.linalg.eigvalsh(hessian)[-1], rtol=1e-6)
+
+    # Two riskless names: thresholding the positive entries alone would keep
+    # just these two, which cannot reach the 0.7 budget floor
+    spec = np.full(20, 0.04)
+    spec[:2] = 0.0
+    qp = TrackingErrorQP(np.zeros((20, 3)), cov.values, spec)
+    result = iterative_hard_thresholding(qp, np.zeros(3), 5)
+    assert len(result.support) == 5 and result.x.sum() >= 0.7 - 1e-9
+
+    # Only three usable assets, two of them without any risk (zero curvature)
+    B, spec = universe_exposures.values.copy(), spec_risk.values.copy()
+    B[1:3], spec[1:3] = 0.0, 0.0
+    qp = TrackingErrorQP(B, cov.values, spec)
+    upper = np.zeros(len(B))
+    upper[:3] = 0.25
+    with np.errstate(divide='raise', invalid='raise'):
+        result = greedy_forward(qp, B[5], 5, upper=upper)
+    assert set(result.support) <= {0, 1, 2}
+    assert result.x.sum() >= 0.7 - 1e-9
+
+def test_warm_start_and_cache(tmp_path, mock_risk_model):
+    """A prior hedge seeds the solver; cached solutions are returned for immaterial moves."""
+    from adv_hedging.hedging.cache import HedgeCache
+    from adv_hedging.hedging.qp import TrackingErrorQP
+
+    universe_exposures, cov, spec_risk = mock_risk_model(num_assets=200)
+    qp = TrackingErrorQP(universe_exposures.values, cov.values, spec_risk.values)
+    target = universe_exposures.iloc[:3].mean() * 3
+    admm = dict(max_positions=5, solver='admm', cardinality='iht')
+
+    prior = optimize_hedge_weights(target, universe_exposures, cov, spec_risk, **admm)
+    moved = target + 0.01
+    cold = optimize_hedge_weights(moved, universe_exposures, cov, spec_risk, **admm)
+    warm = optimize_hedge_weights(moved, universe_exposures, cov, spec_risk, **admm, init_weights=prior)
+
+    assert (warm > 0).sum() <= 5
+    assert 0.7 - 1e-9 <= warm.sum() <= 1.3 + 1e-9
+    assert qp.objective(warm.values, moved.values) <= qp.objective(cold.values, moved.values) * 1.05
+
+    cache = HedgeCache(max_entries=2, cache_dir=tmp_path)
+    first = optimize_hedge_weights(target, universe_exposures, cov, spec_risk, **admm, cache=cache)
+    again = optimize_hedge_weights(target + 1e-7, universe_exposures, cov, spec_risk, **admm, cache=cache)
+    assert (cache.hits, cache.misses) == (1, 1)
+    pd.testing.assert_series_equal(first, again)
+
+    # A different risk model misses; the disk copy survives eviction from memory
+    optimize_hedge_weights(target, universe_exposures, cov * 2, spec_risk, **admm, cache=cache)
+    assert cache.misses == 2
+    cache.clear()
+    optimize_hedge_weights(target, universe_exposures, cov, spec_risk, **admm, cache=cache)
+    assert cache.hits == 2
+
+    # Warm and cold solves of the same problem do not share a slot
+    optimize_hedge_weights(target, universe_exposures, cov, spec_risk, **admm, init_weights=prior, cache=cache)
+    assert cache.misses == 3
+    optimize_hedge_weights(target, universe_exposures, cov, spec_risk, **admm, init_weights=prior, cache=cache)
+    assert cache.hits == 3
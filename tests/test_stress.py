@@ -0,0 +1,72 @@
+"""
+tests/test_stress.py
+Tests for the batched scenario and stress-test engine.
+"""
+import numpy as np
+import pandas as pd
+
+from adv_hedging.hedging.optimization import optimize_hedges_batch
+from adv_hedging.hedging.stress import (
+    factor_shock_grid,
+    historical_scenarios,
+    hypothetical_scenarios,
+    monte_carlo_pnl,
+    monte_carlo_scenarios,
+    scenario_pnl,
+    stress_test_hedges,
+    var_cvar,
+)
+
+def test_scenario_pnl_matches_loop(mock_risk_model):
+    exposures, cov, _ = mock_risk_model()
+    targets = exposures.index[:5]
+    weights = {'Factor': pd.DataFrame(
+        np.random.default_rng(1).uniform(0, 0.1, (5, 40)), index=targets, columns=exposures.index
+    )}
+    scenarios = hypothetical_scenarios({'Crash': {'Mom': -0.08}, 'Rally': {'Size': 0.02, 'Value': 0.01}}, cov.columns)
+
+    pnl = scenario_pnl(weights, exposures.loc[targets], exposures, scenarios)
+    for target in targets:
+        net = exposures.loc[target] - weights['Factor'].loc[target] @ exposures
+        np.testing.assert_allclose(pnl[('Factor', target)], scenarios @ net)
+        np.testing.assert_allclose(pnl[('Unhedged', target)], scenarios @ exposures.loc[target])
+
+    history = pd.DataFrame(np.arange(12.0).reshape(4, 3), columns=cov.columns)
+    np.testing.assert_allclose(historical_scenarios(history, horizon=2).iloc[0], history.iloc[:2].sum())
+
+def test_monte_carlo_var_and_hedge_benefit(mock_risk_model):
+    exposures, cov, spec = mock_risk_model()
+    spec = spec / 20  # factor risk dominates, so the factor hedge pays off in every scenario set
+    targets = exposures.index[:3]
+    hedges = optimize_hedges_batch(exposures.loc[targets], exposures, cov, spec, max_positions=8)
+
+    pnl = monte_carlo_pnl({'Factor': hedges}, exposures.loc[targets], exposures, cov, spec, num_draws=200_000)
+    risk = var_cvar(pnl, alpha=0.99)
+
+    # Gaussian one-day P&L: VaR = 2.326 sd, CVaR = 2.665 sd
+    w = hedges.reindex(columns=exposures.index).to_numpy()
+    for i, target in enumerate(targets):
+        net = exposures.loc[target].to_numpy() - w[i] @ exposures.to_numpy()
+        sd = np.sqrt((net @ cov.to_numpy() @ net + spec[target] + (w[i] ** 2) @ spec.to_numpy()) / 252)
+        assert abs(risk.loc[('Factor', target), 'VaR'] / sd - 2.326) < 0.05
+        assert abs(risk.loc[('Factor', target), 'CVaR'] / sd - 2.665) < 0.05
+
+    report = stress_test_hedges({'Factor': hedges}, exposures, cov, spec, num_draws=20_000)
+    assert set(report.index.get_level_values('Scenario_Set')) == {'Hypothetical', 'Monte Carlo'}
+    hedged = report.xs('Factor', level='Strategy')['CVaR']
+    unhedged = report.xs('Unhedged', level='Strategy')['CVaR']
+    assert (hedged < unhedged).all()
+
+def test_horizon_scales_annualized_covariance(mock_risk_model):
+    """Scenarios over `horizon` days use horizon / annualization of the annual covariance."""
+    _, cov, _ = mock_risk_model()
+
+    draws = monte_carlo_scenarios(cov, num_draws=200_000, horizon=21)
+    np.testing.assert_allclose(draws.cov(), cov * 21 / 252, rtol=0.02, atol=1e-6)
+
+    grid = factor_shock_grid(cov, sigmas=(2,), horizon=21)
+    assert np.isclose(grid.loc['Size +2sd', 'Size'], 2 * np.sqrt(cov.loc['Size', 'Size'] * 21 / 252))
+
+    # A daily covariance is passed with annualization=1
+    daily = factor_shock_grid(cov / 252, sigmas=(2,), horizon=21, annualization=1)
+    pd.testing.assert_frame_equal(daily, grid)
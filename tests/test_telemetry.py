@@ -0,0 +1,93 @@
+"""
+tests/test_telemetry.py
+Tests for the spans, counters and metrics registry.
+"""
+import json
+import logging
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from adv_hedging import telemetry
+from adv_hedging.hedging.cache import HedgeCache
+from adv_hedging.risk_model import factor_engine
+
+@pytest.fixture
+def metrics():
+    registry = telemetry.enable_metrics()
+    yield registry
+    telemetry.disable_metrics()
+    registry.reset()
+
+@pytest.fixture
+def exposures_df(mock_returns_df):
+    rng = np.random.default_rng(0)
+    tickers = mock_returns_df.columns
+    return pd.DataFrame(rng.standard_normal((len(tickers), 2)), index=tickers, columns=['Size', 'Value'])
+
+def test_disabled_registry_records_nothing():
+    telemetry.REGISTRY.reset()
+    telemetry.increment('calls', 5)
+    with telemetry.span('block'):
+        pass
+
+    assert telemetry.get_metrics() == {'counters': {}, 'timers': {}}
+    # Nothing to time or log, so no span object is created
+    assert telemetry.span('block') is telemetry.span('other')
+
+def test_counters_spans_and_json(metrics, tmp_path):
+    telemetry.increment('calls')
+    telemetry.increment('calls', 2)
+
+    @telemetry.timed('work')
+    def work(x):
+        return x * 2
+
+    assert work(3) == 6
+    assert work(4) == 8
+
+    snapshot = telemetry.get_metrics()
+    assert snapshot['counters'] == {'calls': 3}
+    assert snapshot['timers']['work']['count'] == 2
+    assert snapshot['timers']['work']['min'] <= snapshot['timers']['work']['mean'] <= snapshot['timers']['work']['max']
+
+    path = tmp_path / "metrics.json"
+    telemetry.dump_metrics(path)
+    assert json.loads(path.read_text()) == json.loads(metrics.to_json())
+
+def test_span_logs_at_debug(caplog):
+    log = logging.getLogger('adv_hedging.test')
+    with caplog.at_level(logging.DEBUG, logger='adv_hedging.test'):
+        with telemetry.span('block', log):
+            pass
+    assert any(r.message.startswith("block took") for r in caplog.records)
+
+def test_factor_engine_telemetry(metrics, caplog, mock_returns_df, exposures_df, monkeypatch):
+    # Make IRLS report non-convergence on every day, to exercise the fallback
+    irls = factor_engine._huber_irls
+
+    def not_converged(*args, **kwargs):
+        beta, scale, n_iter, converged = irls(*args, **kwargs)
+        return beta, scale, n_iter, np.zeros_like(converged)
+
+    monkeypatch.setattr(factor_engine, '_huber_irls', not_converged)
+
+    with caplog.at_level(logging.INFO, logger='adv_hedging'):
+        result = factor_engine.calculate_factor_returns(mock_returns_df, exposures_df, method='huber')
+
+    counters = telemetry.get_metrics()['counters']
+    assert counters['factor_engine.irls_nonconverged'] == len(mock_returns_df)
+    assert counters['factor_engine.dates_solved'] == len(result)
+    assert 'factor_engine.huber' in telemetry.get_metrics()['timers']
+
+    messages = [r.getMessage() for r in caplog.records]
+    assert any("Estimating factor returns using HUBER" in m for m in messages)
+    assert sum("IRLS did not converge" in m for m in messages) == len(mock_returns_df)
+
+def test_hedge_cache_counters(metrics):
+    cache = HedgeCache()
+    cache.put('a', np.ones(3))
+    cache.get('a')
+    cache.get('b')
+    assert telemetry.get_metrics()['counters'] == {'hedge_cache.hits': 1, 'hedge_cache.misses': 1}
@@ -18,4 +18,101 @@ def test_metadata_persistence(mock_wiki_row):
     
     # It should start with the header
     assert chunk_2.startswith("Title: Test Company")
-    assert "Sector: Technology" in chunk_2
\ No newline at end of file
+    assert "Sector: Technology" in chunk_2
+
+def test_streaming_chunks_match_corpus():
+    """Streamed batches hold the same chunks as the in-memory corpus, from pandas or Arrow."""
+    import pandas as pd
+    import pyarrow as pa
+    from adv_hedging.nlp.text_processing import iter_corpus_chunks, prepare_corpus_with_index
+
+    df = pd.DataFrame({
+        'ticker': ['AAA', 'BBB', 'CCC'],
+        'title': ['A', 'B', 'C'],
+        'content': [" ".join(f"w{i}" for i in range(45)), None, "one two  three"],
+    })
+    chunks, _, offsets = prepare_corpus_with_index(df, chunk_size=10, overlap=3)
+
+    batches = list(iter_corpus_chunks(df, chunk_size=10, overlap=3, batch_size=4))
+    assert [len(b) for b in batches] == [4, 3]
+    streamed = [item for b in batches for item in b]
+    assert [text for _, _, text in streamed] == chunks
+    assert [(t, i) for t, i, _ in streamed][-2:] == [('AAA', 5), ('CCC', 0)]
+
+    # Windows are sliced on character offsets: same words as re-joining
+    assert streamed[1][2].endswith(" ".join(f"w{i}" for i in range(7, 17)))
+    assert streamed[-1][2].endswith("one two  three")
+
+    record_batches = pa.Table.from_pandas(df).to_batches(max_chunksize=2)
+    from_arrow = [item for b in iter_corpus_chunks(record_batches, chunk_size=10, overlap=3) for item in b]
+    assert from_arrow == streamed
+
+class _FakeFastTokenizer:
+    """
+    Splits words into pieces of at most 3 characters, like a subword tokenizer.
+    With first=1 the first piece of every word is a single character, so a
+    word cut in the middle re-tokenizes into more pieces than it had in context.
+    """
+    is_fast = True
+
+    def __init__(self, first=3):
+        self.first = first
+
+    def _spans(self, text):
+        import re
+        spans = []
+        for m in re.finditer(r"\S+", text):
+            cuts = [m.start(), *range(m.start() + self.first, m.end(), 3), m.end()]
+            spans.extend(zip(cuts[:-1], cuts[1:]))
+        return spans
+
+    def __call__(self, texts, add_special_tokens=True, return_offsets_mapping=False):
+        offsets = [self._spans(text) for text in texts]
+        specials = 2 if add_special_tokens else 0
+        out = {'input_ids': [[0] * (len(o) + specials) for o in offsets]}
+        if return_offsets_mapping:
+            out['offset_mapping'] = offsets
+        return out
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 2
+
+def test_token_aware_chunking(mock_wiki_row):
+    """Chunks, header and special tokens included, fit the token budget."""
+    from adv_hedging.nlp.text_processing import chunk_text_with_metadata, create_metadata_header
+
+    tokenizer = _FakeFastTokenizer()
+    header = create_metadata_header(mock_wiki_row)
+    content = " ".join(f"company{i}" for i in range(300))
+
+    chunks = chunk_text_with_metadata(content, header, chunk_size=64, overlap=8, tokenizer=tokenizer)
+    sizes = [len(tokenizer([c])['input_ids'][0]) for c in chunks]
+    assert max(sizes) <= 64
+    assert max(sizes) >= 60
+    assert all(c.startswith("Title: Test Company") for c in chunks)
+    assert chunks[-1].endswith("company299")
+
+    # Without a (fast) tokenizer, chunking falls back to words
+    words = chunk_text_with_metadata(content, header, chunk_size=64, overlap=8)
+    slow = _FakeFastTokenizer()
+    slow.is_fast = False
+    assert chunk_text_with_metadata(content, header, chunk_size=64, overlap=8, tokenizer=slow) == words
+    assert len(words) == 6
+
+def test_token_windows_fit_after_retokenizing(mock_wiki_row):
+    """Windows that re-tokenize over the limit are trimmed, without leaving gaps."""
+    from adv_hedging.nlp.text_processing import chunk_text_with_metadata, create_metadata_header
+
+    tokenizer = _FakeFastTokenizer(first=1)
+    header = create_metadata_header(mock_wiki_row)
+    content = " ".join(f"subwordheavy{i}" for i in range(200))
+
+    chunks = chunk_text_with_metadata(content, header, chunk_size=64, overlap=8, tokenizer=tokenizer)
+    sizes = [len(tokenizer([c])['input_ids'][0]) for c in chunks]
+    assert max(sizes) <= 64
+
+    # Consecutive windows still overlap and cover the whole document
+    starts = [content.index(c[len(header):]) for c in chunks]
+    ends = [start + len(c) - len(header) for start, c in zip(starts, chunks)]
+    assert starts[0] == 0 and ends[-1] == len(content)
+    assert all(nxt < end for nxt, end in zip(starts[1:], ends[:-1]))
@@ -0,0 +1,92 @@
+"""
+tests/test_utils.py
+Tests for the artifact cache.
+"""
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from adv_hedging.utils import ArtifactCache, content_hash
+
+def test_artifact_cache_round_trip_and_invalidation(tmp_path, mock_returns_df):
+    cache = ArtifactCache(tmp_path / "artifacts")
+    calls = []
+
+    @cache.memoize('covariance', version='1')
+    def covariance(returns_df, half_life=90):
+        calls.append(half_life)
+        return returns_df.cov()
+
+    cov = covariance(mock_returns_df)
+    cached = covariance(mock_returns_df.copy())
+    assert calls == [90]
+    pd.testing.assert_frame_equal(cached, cov)
+
+    # Changed inputs, parameters or version are new keys
+    covariance(mock_returns_df * 2)
+    covariance(mock_returns_df, half_life=60)
+    assert calls == [90, 90, 60]
+    assert content_hash(mock_returns_df) != content_hash(mock_returns_df.iloc[:, ::-1])
+    assert cache.key('covariance', mock_returns_df) != cache.key('covariance', mock_returns_df, version='2')
+
+    # Other artifact types
+    weights = pd.Series([0.5, -0.5], index=['A', 'B'], name='weights')
+    cache.put('weights', weights)
+    pd.testing.assert_series_equal(cache.get('weights'), weights)
+    cache.put('meta', {'tickers': ['A', 'B']})
+    assert cache.get('meta') == {'tickers': ['A', 'B']}
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['entries']) == (3, 5)
+    assert cache.invalidate(name='covariance') == 3
+    assert cache.invalidate(key='weights') == 1
+    assert cache.get('weights') is None
+    assert cache.stats()['entries'] == 1
+
+    # A function returning None is cached like any other result
+    @cache.memoize('nothing')
+    def nothing(x):
+        calls.append(x)
+
+    assert nothing(1) is None and nothing(1) is None
+    assert calls[-1:] == [1] and len(calls) == 4
+
+def test_artifact_cache_evicts_least_recently_used(tmp_path):
+    block = np.zeros(1000)  # 8 kB per entry
+    cache = ArtifactCache(tmp_path / "artifacts", max_bytes=30_000)
+
+    for i in range(3):
+        cache.put(f"a{i}", block + i)
+        time.sleep(0.01)
+    cache.get("a0")
+    time.sleep(0.01)
+    cache.put("a3", block)
+
+    assert "a0" in cache and "a3" in cache
+    assert "a1" not in cache
+    assert isinstance(cache.get("a3"), np.memmap)
+    assert cache.stats()['evictions'] == 1
+    assert cache.nbytes <= 30_000
+
+def test_artifact_cache_overwrite_and_stale_entries(tmp_path):
+    cache = ArtifactCache(tmp_path / "artifacts")
+    cache.put('weights', np.zeros(3))
+    cache.put('weights', np.ones(3))
+    np.testing.assert_array_equal(cache.get('weights'), np.ones(3))
+    assert cache.stats()['entries'] == 1
+
+    # Leftovers of a crashed write are removed once they are old enough
+    crashed = tmp_path / "artifacts" / ".weights.123.tmp"
+    crashed.mkdir()
+    os.utime(crashed, (0, 0))
+    fresh = tmp_path / "artifacts" / ".other.456.tmp"
+    fresh.mkdir()
+    cache.put('other', np.ones(2))
+    assert not crashed.exists() and fresh.exists()
+
+    # Objects without a content-based hash are rejected instead of keyed by address
+    with pytest.raises(TypeError, match="object"):
+        content_hash(object())